@@ -2,4 +2,22 @@
 #
 # This software may be used and distributed according to the terms of the MIT LICENSE
 
-from .model_api import ModelAPI, do_api_request, do_api_request_async
\ No newline at end of file
+from .model_api import ModelAPI, do_api_request, do_api_request_async, do_api_requests_async
+from .session_registry import ClientSessionRegistry
+from .progress_multiplexer import ProgressMultiplexer
+from .progress_policy import ProgressPolicy, FixedProgressPolicy, ExponentialProgressPolicy, EstimateProgressPolicy
+from .payloads import LazyPayload
+from .response_parser import PayloadSink, PayloadWriter, BytesSink, FileSink, CallbackSink
+from .media_writer import MediaWriter
+from .json_codec import JSONCodec, get_json_codec
+from .auth_key_store import AuthKeyStore, MemoryAuthKeyStore, FileAuthKeyStore, CallbackAuthKeyStore
+from .endpoint_catalog import EndpointCatalog
+from .param_validator import ParamValidator
+from .result_cache import ResultCache, MemoryResultCache, DiskResultCache
+from .request_coalescer import RequestCoalescer
+from .retry_policy import RetryPolicy
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .load_balancer import LoadBalancedModelAPI, ServerScore
+from .hedge_policy import HedgePolicy
+from .rate_limiter import RateLimiter, MemoryRateLimiter, FileRateLimiter
+from .job_scheduler import JobScheduler, DeadlineMissedError
@@ -0,0 +1,367 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import abc
+import asyncio
+import contextlib
+import json
+import os
+import tempfile
+import threading
+import time
+import weakref
+from pathlib import Path
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+
+
+DEFAULT_AUTH_KEY_TTL = 3600
+
+
+class AuthKeyStore(abc.ABC):
+    """
+    Base class of stores sharing client session authentication keys between ModelAPI instances and processes, so only the
+    first of them needs to login. Keys are stored per identity (api_server, endpoint_name, user) and expire after ttl seconds.
+
+    Subclasses implement get(), set() and invalidate(). Stores shared by processes implement login_lock() as well.
+
+    Args:
+        ttl (float, optional): Time in seconds a stored key is reused. Defaults to DEFAULT_AUTH_KEY_TTL.
+
+    Attributes:
+        blocking (bool): Whether get(), set(), invalidate() and login_lock() do blocking I/O and are run in a thread by the
+            asynchronous ModelAPI methods.
+    """
+
+    blocking = False
+
+    def __init__(self, ttl=DEFAULT_AUTH_KEY_TTL):
+        self.ttl = ttl
+
+
+    @abc.abstractmethod
+    def get(self, identity):
+        """Get the stored key of given identity.
+
+        Args:
+            identity (tuple): Tuple (api_server, endpoint_name, user).
+
+        Returns:
+            str: Client session authentication key or None if no valid key is stored.
+        """
+
+
+    @abc.abstractmethod
+    def set(self, identity, auth_key):
+        """Store the key of given identity for ttl seconds.
+
+        Args:
+            identity (tuple): Tuple (api_server, endpoint_name, user).
+            auth_key (str): Client session authentication key.
+        """
+
+
+    @abc.abstractmethod
+    def invalidate(self, identity, auth_key):
+        """Remove the stored key of given identity, if it is still the given key rejected by the API server.
+        A newer key stored by another instance in the meantime is kept.
+
+        Args:
+            identity (tuple): Tuple (api_server, endpoint_name, user).
+            auth_key (str): Rejected client session authentication key.
+        """
+
+
+    def login_lock(self, identity):
+        """Lock held across checking the stored key, the login and storing the new key, so only one of the processes sharing
+        the store logs in. Within a process logins are serialized by get_login_lock() anyway.
+
+        Args:
+            identity (tuple): Tuple (api_server, endpoint_name, user).
+
+        Returns:
+            context manager: Lock to hold during the login. Defaults to contextlib.nullcontext() for stores of one process.
+        """
+        return contextlib.nullcontext()
+
+
+    async def get_async(self, identity):
+        """Asynchronous version of get(), running blocking stores like the FileAuthKeyStore in a thread."""
+        return await self.__run_async(self.get, identity)
+
+
+    async def set_async(self, identity, auth_key):
+        """Asynchronous version of set(), running blocking stores like the FileAuthKeyStore in a thread."""
+        await self.__run_async(self.set, identity, auth_key)
+
+
+    async def invalidate_async(self, identity, auth_key):
+        """Asynchronous version of invalidate(), running blocking stores like the FileAuthKeyStore in a thread."""
+        await self.__run_async(self.invalidate, identity, auth_key)
+
+
+    async def __run_async(self, function, *args):
+        if not self.blocking:
+            return function(*args)
+        return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+class MemoryAuthKeyStore(AuthKeyStore):
+    """
+    Auth key store sharing the keys between all ModelAPI instances of a process using the same store.
+
+    Args:
+        ttl (float, optional): Time in seconds a stored key is reused. Defaults to DEFAULT_AUTH_KEY_TTL.
+    """
+
+    def __init__(self, ttl=DEFAULT_AUTH_KEY_TTL):
+        super().__init__(ttl)
+        self.auth_keys = dict()
+        self.lock = threading.Lock()
+
+
+    def get(self, identity):
+        with self.lock:
+            auth_key, expires = self.auth_keys.get(identity, (None, 0))
+            return auth_key if expires > time.time() else None
+
+
+    def set(self, identity, auth_key):
+        with self.lock:
+            self.auth_keys[identity] = (auth_key, time.time() + self.ttl)
+
+
+    def invalidate(self, identity, auth_key):
+        with self.lock:
+            if self.auth_keys.get(identity, (None, 0))[0] == auth_key:
+                del self.auth_keys[identity]
+
+
+class FileAuthKeyStore(AuthKeyStore):
+    """
+    Auth key store in a JSON file shared by all processes on a host, like short-lived workers started in parallel.
+    Accesses are serialized with an flock on path + '.lock' where fcntl is available. Logins hold an flock on path + '.login.lock'
+    from checking the stored key until the new key is stored, so only one process logs in. The file is replaced atomically
+    and only readable by the owner.
+
+    Args:
+        path (str or pathlib.Path): Path of the JSON file. Created on first write.
+        ttl (float, optional): Time in seconds a stored key is reused. Defaults to DEFAULT_AUTH_KEY_TTL.
+    """
+
+    blocking = True
+
+    def __init__(self, path, ttl=DEFAULT_AUTH_KEY_TTL):
+        super().__init__(ttl)
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self.login_lock_path = self.path.with_name(self.path.name + '.login.lock')
+        self.lock = threading.Lock()
+        self.login_thread_lock = threading.Lock()
+
+
+    def get(self, identity):
+        with self.__locked(exclusive=False):
+            auth_key, expires = self.__read().get(self.__make_entry_key(identity), (None, 0))
+        return auth_key if expires > time.time() else None
+
+
+    def set(self, identity, auth_key):
+        with self.__locked(exclusive=True):
+            auth_keys = self.__read()
+            auth_keys[self.__make_entry_key(identity)] = (auth_key, time.time() + self.ttl)
+            self.__write(auth_keys)
+
+
+    def invalidate(self, identity, auth_key):
+        with self.__locked(exclusive=True):
+            auth_keys = self.__read()
+            entry_key = self.__make_entry_key(identity)
+            if auth_keys.get(entry_key, (None, 0))[0] == auth_key:
+                del auth_keys[entry_key]
+                self.__write(auth_keys)
+
+
+    def login_lock(self, identity):
+        return _FileLock(self.login_thread_lock, self.login_lock_path, True)
+
+
+    def __locked(self, exclusive):
+        return _FileLock(self.lock, self.lock_path, exclusive)
+
+
+    def __read(self):
+        """Read all entries, dropping expired ones.
+
+        Returns:
+            dict: Entries {entry_key: (auth_key, expires)}.
+        """
+        try:
+            with open(self.path, 'r') as file:
+                auth_keys = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return dict()
+        now = time.time()
+        return {entry_key: tuple(entry) for entry_key, entry in auth_keys.items() if entry[1] > now}
+
+
+    def __write(self, auth_keys):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w') as file:
+                json.dump(auth_keys, file)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+    @staticmethod
+    def __make_entry_key(identity):
+        return '\t'.join(str(part or '') for part in identity)
+
+
+class _FileLock():
+    """
+    Context manager holding a thread lock and an flock on given lock file.
+    """
+
+    def __init__(self, thread_lock, lock_path, exclusive):
+        self.thread_lock = thread_lock
+        self.lock_path = lock_path
+        self.exclusive = exclusive
+        self.file = None
+
+
+    def __enter__(self):
+        self.thread_lock.acquire()
+        if fcntl:
+            try:
+                self.lock_path.parent.mkdir(parents=True, exist_ok=True)
+                self.file = open(self.lock_path, 'a')
+                fcntl.flock(self.file, fcntl.LOCK_EX if self.exclusive else fcntl.LOCK_SH)
+            except BaseException:
+                self.__exit__(None, None, None)
+                raise
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if self.file:
+            self.file.close()
+            self.file = None
+        self.thread_lock.release()
+
+
+class CallbackAuthKeyStore(AuthKeyStore):
+    """
+    Auth key store delegating to callbacks, e.g. to keep the keys in Redis or a database shared by many hosts.
+
+    Args:
+        get_callback (callable): Function with argument identity (tuple) returning the stored key or None.
+        set_callback (callable): Function with arguments identity (tuple), auth_key (str) and ttl (float) storing the key.
+        invalidate_callback (callable, optional): Function with arguments identity (tuple) and auth_key (str) removing the key if it is
+            still the given one. Defaults to None.
+        ttl (float, optional): Time in seconds a stored key is reused, handed to set_callback. Defaults to DEFAULT_AUTH_KEY_TTL.
+    """
+
+    blocking = True
+
+    def __init__(self, get_callback, set_callback, invalidate_callback=None, ttl=DEFAULT_AUTH_KEY_TTL):
+        super().__init__(ttl)
+        self.get_callback = get_callback
+        self.set_callback = set_callback
+        self.invalidate_callback = invalidate_callback
+
+
+    def get(self, identity):
+        return self.get_callback(identity)
+
+
+    def set(self, identity, auth_key):
+        self.set_callback(identity, auth_key, self.ttl)
+
+
+    def invalidate(self, identity, auth_key):
+        if self.invalidate_callback:
+            self.invalidate_callback(identity, auth_key)
+
+
+_login_locks = dict()
+_async_login_locks = weakref.WeakKeyDictionary()
+_login_locks_lock = threading.Lock()
+
+
+def get_login_lock(identity):
+    """Get the process-wide lock serializing logins of given identity in synchronous code, so concurrent threads login only once.
+
+    Args:
+        identity (tuple): Tuple (api_server, endpoint_name, user).
+
+    Returns:
+        threading.Lock: Login lock of the identity.
+    """
+    with _login_locks_lock:
+        return _login_locks.setdefault(identity, threading.Lock())
+
+
+def get_login_lock_async(identity):
+    """Get the lock serializing logins of given identity in the running event loop, so concurrent coroutines login only once.
+
+    Args:
+        identity (tuple): Tuple (api_server, endpoint_name, user).
+
+    Returns:
+        asyncio.Lock: Login lock of the identity.
+    """
+    loop = asyncio.get_running_loop()
+    with _login_locks_lock:
+        return _async_login_locks.setdefault(loop, dict()).setdefault(identity, asyncio.Lock())
+
+
+@contextlib.contextmanager
+def hold_login_lock(identity, auth_key_store=None):
+    """Serialize logins of given identity between the threads of the process and the processes sharing the auth_key_store.
+
+    Args:
+        identity (tuple): Tuple (api_server, endpoint_name, user).
+        auth_key_store (AuthKeyStore, optional): Store whose login_lock() is held as well. Defaults to None.
+    """
+    with get_login_lock(identity), (auth_key_store.login_lock(identity) if auth_key_store else contextlib.nullcontext()):
+        yield
+
+
+@contextlib.asynccontextmanager
+async def hold_login_lock_async(identity, auth_key_store=None):
+    """Serialize logins of given identity between the coroutines of the event loop and the processes sharing the auth_key_store.
+    The login_lock() of blocking stores is acquired in a thread, so the event loop keeps running while another process logs in.
+
+    Args:
+        identity (tuple): Tuple (api_server, endpoint_name, user).
+        auth_key_store (AuthKeyStore, optional): Store whose login_lock() is held as well. Defaults to None.
+    """
+    async with get_login_lock_async(identity):
+        if not auth_key_store:
+            yield
+            return
+        store_lock = auth_key_store.login_lock(identity)
+        if auth_key_store.blocking:
+            acquired = asyncio.get_running_loop().run_in_executor(None, store_lock.__enter__)
+            try:
+                await asyncio.shield(acquired)
+            except asyncio.CancelledError:
+                acquired.add_done_callback(
+                    lambda future: store_lock.__exit__(None, None, None) if not future.cancelled() and not future.exception() else None
+                )
+                raise
+        else:
+            store_lock.__enter__()
+        try:
+            yield
+        finally:
+            store_lock.__exit__(None, None, None)
@@ -0,0 +1,214 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import collections
+import logging
+import threading
+import time
+
+
+DEFAULT_FAILURE_RATE_THRESHOLD = 0.5
+DEFAULT_WINDOW_SIZE = 20
+DEFAULT_MINIMUM_CALLS = 10
+DEFAULT_OPEN_DURATION = 30.0
+DEFAULT_HALF_OPEN_CALLS = 1
+
+CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+logger = logging.getLogger(__name__)
+
+
+class CircuitOpenError(ConnectionError):
+    """
+    Raised instead of sending a request while the circuit breaker of the API server is open.
+
+    Attributes:
+        api_server (str): API server of the open circuit.
+        retry_in (float): Seconds until the circuit lets trial requests through again.
+    """
+
+    def __init__(self, api_server, retry_in):
+        super().__init__(f'Circuit breaker of {api_server or "API server"} is open after repeated failures. Next trial in {retry_in:.1f} seconds.')
+        self.api_server = api_server
+        self.retry_in = retry_in
+
+
+class CircuitBreaker():
+    """
+    Circuit breaker of an API server, failing requests immediately with CircuitOpenError while the server is down.
+
+    The outcomes of the last window_size requests are recorded. Connection errors, timeouts and responses with status 5xx count as failures,
+    requests taking longer than slow_call_duration as slow. If at least minimum_calls requests are recorded and the failure rate or the
+    slow call rate reaches its threshold, the circuit opens. After open_duration seconds it is half-open and lets half_open_calls trial
+    requests through: if they succeed the circuit closes, otherwise it opens again.
+
+    Use get_shared() to get the breaker shared by all ModelAPI instances of an api_server in the process.
+
+    Args:
+        api_server (str, optional): The base URL of the API server, used in error messages. Defaults to None.
+        failure_rate_threshold (float, optional): Failure rate between 0 and 1 opening the circuit. Defaults to DEFAULT_FAILURE_RATE_THRESHOLD.
+        slow_call_duration (float, optional): Duration in seconds a request counts as slow. Requests waiting for a job result are not
+            rated. Defaults to None, not rating latency.
+        slow_call_rate_threshold (float, optional): Rate of slow requests between 0 and 1 opening the circuit. Defaults to 1.0.
+        window_size (int, optional): Number of recent requests rated. Defaults to DEFAULT_WINDOW_SIZE.
+        minimum_calls (int, optional): Number of recorded requests needed before the circuit can open. Defaults to DEFAULT_MINIMUM_CALLS.
+        open_duration (float, optional): Seconds the circuit stays open before trial requests. Defaults to DEFAULT_OPEN_DURATION.
+        half_open_calls (int, optional): Number of successful trial requests closing the circuit. Defaults to DEFAULT_HALF_OPEN_CALLS.
+
+    Attributes:
+        state (str): 'closed', 'open' or 'half_open'.
+        rejected_count (int): Number of requests failed fast with CircuitOpenError.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            def alert(circuit_breaker, old_state, new_state):
+                logger.warning(f'{circuit_breaker.api_server}: circuit {old_state} -> {new_state}')
+
+            CircuitBreaker.get_shared('https://api.aime.info', open_duration=10).add_listener(alert)
+            model_api = ModelAPI('https://api.aime.info', 'llama3_chat', user, key, circuit_breaker=True)
+    """
+
+    breakers = dict()
+    breakers_lock = threading.Lock()
+
+    def __init__(
+        self,
+        api_server=None,
+        failure_rate_threshold=DEFAULT_FAILURE_RATE_THRESHOLD,
+        slow_call_duration=None,
+        slow_call_rate_threshold=1.0,
+        window_size=DEFAULT_WINDOW_SIZE,
+        minimum_calls=DEFAULT_MINIMUM_CALLS,
+        open_duration=DEFAULT_OPEN_DURATION,
+        half_open_calls=DEFAULT_HALF_OPEN_CALLS
+        ):
+        self.api_server = api_server
+        self.failure_rate_threshold = failure_rate_threshold
+        self.slow_call_duration = slow_call_duration
+        self.slow_call_rate_threshold = slow_call_rate_threshold
+        self.minimum_calls = minimum_calls
+        self.open_duration = open_duration
+        self.half_open_calls = half_open_calls
+        self.state = CLOSED
+        self.rejected_count = 0
+        self.outcomes = collections.deque(maxlen=window_size)
+        self.listeners = list()
+        self.__opened_at = 0.0
+        self.__trial_calls = 0
+        self.__trial_successes = 0
+        self.__lock = threading.Lock()
+
+
+    @classmethod
+    def get_shared(cls, api_server, **config):
+        """Get the process-wide circuit breaker of given api_server, creating it with given configuration on first use.
+
+        Args:
+            api_server (str): The base URL of the API server.
+            **config: Keyword arguments of CircuitBreaker used if the breaker is created.
+
+        Returns:
+            CircuitBreaker: Shared circuit breaker.
+        """
+        with cls.breakers_lock:
+            breaker = cls.breakers.get(api_server)
+            if not breaker:
+                breaker = cls.breakers[api_server] = cls(api_server, **config)
+            return breaker
+
+
+    def add_listener(self, callback):
+        """Register a callback for state changes, e.g. for alerting.
+
+        Args:
+            callback (callable): Function with arguments circuit_breaker (CircuitBreaker), old_state (str) and new_state (str).
+                Called in the thread or task of the request causing the change. Exceptions of the callback are logged and
+                don't affect the request.
+        """
+        self.listeners.append(callback)
+
+
+    def before_request(self):
+        """Check if a request may be sent. Call record() or release() for each permitted request.
+
+        Raises:
+            CircuitOpenError: If the circuit is open or all trial requests of the half-open circuit are in flight.
+        """
+        with self.__lock:
+            change = None
+            if self.state == OPEN:
+                retry_in = self.__opened_at + self.open_duration - time.monotonic()
+                if retry_in > 0:
+                    self.rejected_count += 1
+                    raise CircuitOpenError(self.api_server, retry_in)
+                change = self.__set_state(HALF_OPEN)
+            if self.state == HALF_OPEN:
+                if self.__trial_calls >= self.half_open_calls:
+                    self.rejected_count += 1
+                    raise CircuitOpenError(self.api_server, 0.0)
+                self.__trial_calls += 1
+        self.__notify(change)
+
+
+    def record(self, failed, duration=None):
+        """Record the outcome of a permitted request.
+
+        Args:
+            failed (bool): Whether the request failed with connection error, timeout or status 5xx.
+            duration (float, optional): Duration of the request in seconds to rate its latency. Defaults to None.
+        """
+        slow = bool(self.slow_call_duration and duration is not None and duration > self.slow_call_duration)
+        with self.__lock:
+            change = None
+            if self.state == HALF_OPEN:
+                self.__trial_calls = max(0, self.__trial_calls - 1)
+                if failed or slow:
+                    change = self.__set_state(OPEN)
+                else:
+                    self.__trial_successes += 1
+                    if self.__trial_successes >= self.half_open_calls:
+                        change = self.__set_state(CLOSED)
+            elif self.state == CLOSED:
+                self.outcomes.append((failed, slow))
+                if len(self.outcomes) >= self.minimum_calls:
+                    failure_rate = sum(outcome[0] for outcome in self.outcomes) / len(self.outcomes)
+                    slow_call_rate = sum(outcome[1] for outcome in self.outcomes) / len(self.outcomes)
+                    if failure_rate >= self.failure_rate_threshold or (self.slow_call_duration and slow_call_rate >= self.slow_call_rate_threshold):
+                        change = self.__set_state(OPEN)
+        self.__notify(change)
+
+
+    def release(self):
+        """Release a permitted request without outcome, e.g. if it was cancelled."""
+        with self.__lock:
+            if self.state == HALF_OPEN and self.__trial_calls > 0:
+                self.__trial_calls -= 1
+
+
+    def __set_state(self, state):
+        """Change the state. Expects self.__lock to be held.
+
+        Returns:
+            tuple: (old_state, new_state) for __notify().
+        """
+        old_state = self.state
+        self.state = state
+        self.outcomes.clear()
+        self.__trial_calls = 0
+        self.__trial_successes = 0
+        if state == OPEN:
+            self.__opened_at = time.monotonic()
+        return old_state, state
+
+
+    def __notify(self, change):
+        if change:
+            for listener in list(self.listeners):
+                try:
+                    listener(self, *change)
+                except Exception:
+                    logger.exception(f'State change listener {listener!r} of circuit breaker of {self.api_server} failed')
@@ -0,0 +1,177 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import threading
+import time
+
+
+DEFAULT_CATALOG_TTL = 60
+DEFAULT_CATALOG_STALE_TTL = 300
+
+
+class EndpointCatalog():
+    """
+    Cache of the endpoint list and endpoint details of API servers, used by get_endpoint_list() and get_endpoint_details() of ModelAPI
+    and their asynchronous counterparts. Give the same catalog to many ModelAPI instances to share it.
+
+    Entries younger than ttl seconds are returned without request. Older entries are revalidated with a conditional request
+    (If-None-Match / If-Modified-Since) if the API server sent an ETag or Last-Modified header, so unchanged entries cost
+    an empty 304 response only. Asynchronous lookups return entries up to stale_ttl seconds after expiry immediately and
+    refresh them in a background task (stale-while-revalidate). Concurrent lookups of the same entry share one request.
+
+    Args:
+        ttl (float, optional): Time in seconds an entry is fresh. Defaults to DEFAULT_CATALOG_TTL.
+        stale_ttl (float, optional): Time in seconds after expiry an entry is still returned by asynchronous lookups while
+            being refreshed in the background. Defaults to DEFAULT_CATALOG_STALE_TTL.
+
+    Attributes:
+        entries (dict): Cached entries {key: {'value', 'etag', 'last_modified', 'fetched', 'compiled'}}.
+        request_count (int): Number of requests sent to refresh entries.
+        revalidated_count (int): Number of refreshes answered with 304 Not Modified.
+    """
+
+    def __init__(self, ttl=DEFAULT_CATALOG_TTL, stale_ttl=DEFAULT_CATALOG_STALE_TTL):
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.entries = dict()
+        self.request_count = 0
+        self.revalidated_count = 0
+        self.__refresh_tasks = dict()
+        self.__lock = threading.Lock()
+
+
+    async def get_async(self, key, fetch):
+        """Get the value of given key, refreshing it with fetch if needed.
+
+        Args:
+            key (tuple): Cache key like (api_server, route).
+            fetch (coroutine): Coroutine with argument validators (dict of conditional request headers) returning a tuple
+                (status_code, value, etag, last_modified). Only values with status code 200 are cached, 304 keeps the cached value.
+
+        Returns:
+            object: Cached or fetched value.
+        """
+        entry = self.entries.get(key)
+        age = time.monotonic() - entry['fetched'] if entry else None
+        if entry and age < self.ttl:
+            return entry['value']
+        task_key = (key, asyncio.get_running_loop())
+        task = self.__refresh_tasks.get(task_key)
+        if not task:
+            task = asyncio.ensure_future(self.__refresh_async(task_key, fetch))
+            self.__refresh_tasks[task_key] = task
+        if entry and age < self.ttl + self.stale_ttl:
+            task.add_done_callback(self.__consume_background_error)
+            return entry['value']
+        return await asyncio.shield(task)
+
+
+    def get(self, key, fetch):
+        """Get the value of given key, revalidating it with fetch if it is expired. Synchronous lookups don't serve stale entries.
+
+        Args:
+            key (tuple): Cache key like (api_server, route).
+            fetch (callable): Function with argument validators (dict of conditional request headers) returning a tuple
+                (status_code, value, etag, last_modified). Only values with status code 200 are cached, 304 keeps the cached value.
+
+        Returns:
+            object: Cached or fetched value.
+        """
+        entry = self.entries.get(key)
+        if entry and time.monotonic() - entry['fetched'] < self.ttl:
+            return entry['value']
+        return self.__store(key, fetch(self.__get_validators(entry)))
+
+
+    def get_compiled(self, key, value, compiler):
+        """Get the object compiled from the cached value of given key, like the ParamValidator of endpoint details.
+        It is compiled once per entry and kept until the entry is refreshed with a new value.
+
+        Args:
+            key (tuple): Cache key like (api_server, route).
+            value (object): Value returned by get() or get_async() for this key.
+            compiler (callable): Function with argument value returning the compiled object.
+
+        Returns:
+            object: Compiled object. Values which are not cached, e.g. of failed requests, are compiled without caching.
+        """
+        entry = self.entries.get(key)
+        if not entry or entry['value'] is not value:
+            return compiler(value)
+        compiled = entry.get('compiled')
+        if compiled is None:
+            compiled = entry['compiled'] = compiler(value)
+        return compiled
+
+
+    def invalidate(self, key=None):
+        """Remove given entry or all entries.
+
+        Args:
+            key (tuple, optional): Cache key of the entry. Defaults to None, removing all entries.
+        """
+        with self.__lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+
+    async def __refresh_async(self, task_key, fetch):
+        key = task_key[0]
+        try:
+            return self.__store(key, await fetch(self.__get_validators(self.entries.get(key))))
+        finally:
+            self.__refresh_tasks.pop(task_key, None)
+
+
+    def __store(self, key, response):
+        """Update the entry of given key with the response of a fetch.
+
+        Args:
+            key (tuple): Cache key.
+            response (tuple): Tuple (status_code, value, etag, last_modified) returned by fetch.
+
+        Returns:
+            object: Current value of the entry, or the uncached value of a failed request.
+        """
+        status_code, value, etag, last_modified = response
+        with self.__lock:
+            self.request_count += 1
+            entry = self.entries.get(key)
+            if status_code == 304 and entry:
+                self.revalidated_count += 1
+                entry['fetched'] = time.monotonic()
+                return entry['value']
+            elif status_code == 200:
+                self.entries[key] = {'value': value, 'etag': etag, 'last_modified': last_modified, 'fetched': time.monotonic()}
+        return value
+
+
+    @staticmethod
+    def __get_validators(entry):
+        """Conditional request headers for revalidating given entry.
+
+        Args:
+            entry (dict): Cached entry or None.
+
+        Returns:
+            dict: Headers If-None-Match and If-Modified-Since, as far as known.
+        """
+        validators = dict()
+        if entry and entry['etag']:
+            validators['If-None-Match'] = entry['etag']
+        if entry and entry['last_modified']:
+            validators['If-Modified-Since'] = entry['last_modified']
+        return validators
+
+
+    @staticmethod
+    def __consume_background_error(task):
+        """Retrieve the exception of a failed background refresh, so the stale entry stays in use without warnings about
+        unretrieved exceptions. The next lookup after the stale period raises the error.
+        """
+        if not task.cancelled():
+            task.exception()
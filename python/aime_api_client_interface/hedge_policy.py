@@ -0,0 +1,108 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+
+DEFAULT_HEDGE_BUDGET_RATIO = 0.1
+DEFAULT_HEDGE_BUDGET_BURST = 1
+DEFAULT_MAX_HEDGES_IN_FLIGHT = 4
+
+
+class HedgePolicy():
+    """
+    Policy deciding when do_api_request_async() of LoadBalancedModelAPI submits a duplicate of a job to another API server.
+
+    When the first progress report of a job predicts its completion later than deadline seconds after the submission, the
+    job is submitted again to the best other server. The result of whichever job finishes first is returned, the other
+    job is cancelled. The prediction is the elapsed time plus the 'estimate' of the progress report, or the 'queue_position'
+    times the average job duration of the server if the API server reports no estimate.
+
+    The budget caps the extra load: hedges are limited to budget_ratio of the requests plus budget_burst, and to
+    max_in_flight duplicates running at the same time.
+
+    Args:
+        deadline (float): Seconds after the submission a job should be done. Jobs predicted later are hedged.
+        budget_ratio (float, optional): Maximum ratio of hedged requests. Defaults to DEFAULT_HEDGE_BUDGET_RATIO.
+        budget_burst (int, optional): Hedges allowed in addition to the ratio, e.g. for the first requests. Defaults to DEFAULT_HEDGE_BUDGET_BURST.
+        max_in_flight (int, optional): Maximum number of duplicates running at the same time. Defaults to DEFAULT_MAX_HEDGES_IN_FLIGHT.
+
+    Attributes:
+        request_count (int): Number of requests done with this policy.
+        hedge_count (int): Number of duplicates submitted.
+        hedge_win_count (int): Number of duplicates finishing first.
+        in_flight (int): Number of duplicates running.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            model_api = LoadBalancedModelAPI(api_servers, 'llama3_chat', user, key, hedge_policy=HedgePolicy(deadline=10))
+    """
+
+    def __init__(
+        self,
+        deadline,
+        budget_ratio=DEFAULT_HEDGE_BUDGET_RATIO,
+        budget_burst=DEFAULT_HEDGE_BUDGET_BURST,
+        max_in_flight=DEFAULT_MAX_HEDGES_IN_FLIGHT
+        ):
+        self.deadline = deadline
+        self.budget_ratio = budget_ratio
+        self.budget_burst = budget_burst
+        self.max_in_flight = max_in_flight
+        self.request_count = 0
+        self.hedge_count = 0
+        self.hedge_win_count = 0
+        self.in_flight = 0
+
+
+    def predict_wait(self, progress_info, job_duration=0.0):
+        """Predict the seconds until a job is done from its progress report.
+
+        Args:
+            progress_info (dict): Progress info with the keys 'estimate' and 'queue_position'.
+            job_duration (float, optional): Average job duration of the API server in seconds. Defaults to 0.0.
+
+        Returns:
+            float: Predicted seconds until the job is done or None if the progress report tells nothing about it.
+        """
+        estimate = progress_info.get('estimate')
+        if isinstance(estimate, (int, float)) and estimate >= 0:
+            return float(estimate)
+        queue_position = progress_info.get('queue_position')
+        if isinstance(queue_position, int) and queue_position >= 0 and job_duration:
+            return (queue_position + 1) * job_duration
+        return None
+
+
+    def acquire(self, elapsed, predicted_wait):
+        """Decide whether a job is hedged and take a duplicate from the budget if so. Call release() when the duplicate is done.
+
+        Args:
+            elapsed (float): Seconds since the submission of the job.
+            predicted_wait (float): Predicted seconds until the job is done.
+
+        Returns:
+            bool: True if a duplicate is to be submitted.
+        """
+        if elapsed + predicted_wait <= self.deadline:
+            return False
+        if self.in_flight >= self.max_in_flight:
+            return False
+        if self.hedge_count >= self.budget_burst + self.budget_ratio * self.request_count:
+            return False
+        self.hedge_count += 1
+        self.in_flight += 1
+        return True
+
+
+    def release(self, won=False):
+        """Return a duplicate to the budget.
+
+        Args:
+            won (bool, optional): Whether the duplicate finished first. Defaults to False.
+        """
+        self.in_flight = max(0, self.in_flight - 1)
+        if won:
+            self.hedge_win_count += 1
@@ -0,0 +1,206 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import heapq
+import itertools
+import math
+
+from .model_api import DEFAULT_MAX_IN_FLIGHT, if_async_else_run
+
+
+DEFAULT_DURATION_SMOOTHING = 0.3
+
+
+class DeadlineMissedError(TimeoutError):
+    """
+    Raised by JobScheduler for a job whose deadline can't be met anymore.
+
+    Attributes:
+        job_class (str): Job class of the job.
+        reason (str): Why the deadline can't be met.
+    """
+
+    def __init__(self, job_class, reason):
+        super().__init__(f'Deadline of {job_class} job missed: {reason}')
+        self.job_class = job_class
+        self.reason = reason
+
+
+class JobScheduler():
+    """
+    Local scheduler in front of do_api_request_async() of a ModelAPI or LoadBalancedModelAPI, letting traffic classes like
+    interactive chat and background batches share the client concurrency.
+
+    Jobs wait in a queue per job class. Whenever a slot is free, the waiting job with the highest priority is started,
+    jobs of equal priority earliest deadline first. Each class can be capped to a number of running jobs and the scheduler
+    to max_in_flight jobs in total.
+
+    Jobs with deadline are given up with DeadlineMissedError, or dropped returning None with drop_missed=True, as soon as
+    the deadline can't be met anymore: when waiting in the queue longer than the deadline minus the average duration of
+    the jobs of the class, when the 'estimate' of a progress report predicts the end after the deadline, or when the
+    deadline passes. Given up running jobs are cancelled.
+
+    Args:
+        model_api (ModelAPI or LoadBalancedModelAPI): Client doing the requests.
+        job_classes (dict, optional): Configuration of each job class {name: {'priority': int, 'max_in_flight': int, 'deadline': float}}.
+            Lower priority values are started first, defaults to 0. max_in_flight defaults to no cap of the class. deadline is the
+            default deadline of the jobs in seconds after their submission, defaults to None. The first class is the default class.
+            Defaults to None, using one class 'default'.
+        max_in_flight (int, optional): Maximum number of running jobs of all classes. Defaults to DEFAULT_MAX_IN_FLIGHT.
+        drop_missed (bool, optional): Return None instead of raising DeadlineMissedError for jobs missing their deadline. Defaults to False.
+
+    Attributes:
+        queues (dict): Heaps of the waiting jobs of each class.
+        in_flight (dict): Number of running jobs of each class.
+        durations (dict): Average job duration in seconds of each class, None until a job of the class is done.
+        missed_count (int): Number of jobs given up because of their deadline.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            scheduler = JobScheduler(model_api, {
+                'interactive': {'priority': 0, 'deadline': 20},
+                'batch': {'priority': 1, 'max_in_flight': 4},
+            })
+            result = await scheduler.do_api_request_async(params, job_class='interactive')
+    """
+
+    def __init__(self, model_api, job_classes=None, max_in_flight=DEFAULT_MAX_IN_FLIGHT, drop_missed=False):
+        self.model_api = model_api
+        self.job_classes = job_classes or {'default': dict()}
+        self.default_class = next(iter(self.job_classes))
+        self.max_in_flight = max_in_flight
+        self.drop_missed = drop_missed
+        self.queues = {job_class: list() for job_class in self.job_classes}
+        self.in_flight = {job_class: 0 for job_class in self.job_classes}
+        self.durations = {job_class: None for job_class in self.job_classes}
+        self.missed_count = 0
+        self.__counter = itertools.count()
+
+
+    async def do_api_request_async(
+        self,
+        params,
+        job_class=None,
+        deadline=None,
+        result_callback=None,
+        progress_callback=None,
+        **request_config
+        ):
+        """Queue an asynchronous API request and do it when scheduled.
+        Takes the same arguments as do_api_request_async() of the model_api.
+
+        Args:
+            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'.
+            job_class (str, optional): Job class of the request. Defaults to None, using the first class.
+            deadline (float, optional): Seconds after now the result is needed. Defaults to None, using the deadline of the job class.
+            result_callback (callable or coroutine, optional): Callback function or coroutine with argument result (dict). Defaults to None.
+            progress_callback (callable or coroutine, optional): Callback function or coroutine with arguments progress_info (dict) and
+                progress_data (dict). Defaults to None.
+            **request_config: Further keyword arguments of do_api_request_async() of the model_api.
+
+        Raises:
+            ValueError: If job_class is unknown.
+            DeadlineMissedError: If the deadline can't be met and drop_missed is False.
+
+        Returns:
+            dict: Dictionary with job results or None if the job was dropped.
+        """
+        job_class = job_class or self.default_class
+        if job_class not in self.job_classes:
+            raise ValueError(f'Unknown job class {job_class!r}. Options: {list(self.job_classes)}')
+        config = self.job_classes[job_class]
+        if deadline is None:
+            deadline = config.get('deadline')
+        loop = asyncio.get_running_loop()
+        due = loop.time() + deadline if deadline is not None else math.inf
+        expected_duration = self.durations[job_class] or 0.0
+        if due - loop.time() < expected_duration:
+            return self.__miss(job_class, f'needs {expected_duration:.1f} seconds, {deadline:.1f} left')
+
+        granted = loop.create_future()
+        heapq.heappush(self.queues[job_class], (config.get('priority', 0), due, next(self.__counter), granted))
+        self.__dispatch()
+        try:
+            await asyncio.wait_for(asyncio.shield(granted), None if due == math.inf else max(0.0, due - expected_duration - loop.time()))
+        except asyncio.TimeoutError:
+            self.__withdraw(job_class, granted)
+            return self.__miss(job_class, f'waited in the queue until {expected_duration:.1f} seconds before the deadline')
+        except asyncio.CancelledError:
+            self.__withdraw(job_class, granted)
+            raise
+
+        started = loop.time()
+        missed = list()
+        try:
+            if due == math.inf:
+                result = await self.model_api.do_api_request_async(params, result_callback, progress_callback, **request_config)
+            else:
+                async def watch_progress(progress_info, progress_data):
+                    estimate = progress_info.get('estimate')
+                    if isinstance(estimate, (int, float)) and estimate >= 0 and loop.time() + estimate > due and not missed:
+                        missed.append(f'progress estimate {estimate:.1f} seconds exceeds the deadline')
+                        task.cancel()
+                    await if_async_else_run(progress_callback, progress_info, progress_data)
+
+                task = asyncio.ensure_future(
+                    self.model_api.do_api_request_async(params, result_callback, watch_progress, **request_config)
+                )
+                try:
+                    result = await asyncio.wait_for(task, max(0.0, due - loop.time()))
+                except asyncio.TimeoutError:
+                    return self.__miss(job_class, 'deadline passed while running')
+                except asyncio.CancelledError:
+                    if not missed:
+                        raise
+                    return self.__miss(job_class, missed[0])
+            if result and result.get('success') is not False:
+                self.__observe_duration(job_class, loop.time() - started)
+            return result
+        finally:
+            self.in_flight[job_class] -= 1
+            self.__dispatch()
+
+
+    def __dispatch(self):
+        """Start waiting jobs while slots are free, highest priority and earliest deadline first."""
+        while sum(self.in_flight.values()) < self.max_in_flight:
+            next_job = None
+            for job_class, queue in self.queues.items():
+                while queue and queue[0][3].done():
+                    heapq.heappop(queue)  # withdrawn
+                max_in_flight = self.job_classes[job_class].get('max_in_flight')
+                if queue and (max_in_flight is None or self.in_flight[job_class] < max_in_flight):
+                    if next_job is None or queue[0] < next_job[1]:
+                        next_job = job_class, queue[0]
+            if next_job is None:
+                break
+            job_class, job = next_job
+            heapq.heappop(self.queues[job_class])
+            self.in_flight[job_class] += 1
+            job[3].set_result(True)
+
+
+    def __withdraw(self, job_class, granted):
+        """Remove a waiting job from the queue, or give its slot back if it was started in the meantime."""
+        if granted.done():
+            self.in_flight[job_class] -= 1
+            self.__dispatch()
+        else:
+            granted.cancel()
+
+
+    def __observe_duration(self, job_class, duration):
+        average = self.durations[job_class]
+        self.durations[job_class] = duration if average is None else average + DEFAULT_DURATION_SMOOTHING * (duration - average)
+
+
+    def __miss(self, job_class, reason):
+        self.missed_count += 1
+        if self.drop_missed:
+            return None
+        raise DeadlineMissedError(job_class, reason)
@@ -0,0 +1,139 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import abc
+import importlib.util
+import json
+
+from .lazy_module import LazyModule
+
+orjson = LazyModule('orjson')
+ujson = LazyModule('ujson')
+
+
+class JSONCodec(abc.ABC):
+    """
+    Base class of the JSON codecs used for request and response bodies. Subclasses implement dumps() and loads().
+
+    Attributes:
+        name (str): Name of the codec like 'orjson', 'ujson' or 'json'.
+    """
+
+    name = None
+
+    @abc.abstractmethod
+    def dumps(self, obj):
+        """Encode given object to JSON.
+
+        Args:
+            obj: JSON serializable object.
+
+        Returns:
+            bytes: UTF-8 encoded JSON.
+        """
+
+
+    @abc.abstractmethod
+    def loads(self, data):
+        """Decode given JSON.
+
+        Args:
+            data (bytes, bytearray or str): JSON document.
+
+        Returns:
+            object: Decoded object.
+        """
+
+
+class StdlibJSONCodec(JSONCodec):
+    """
+    JSON codec using the json module of the standard library. Always available.
+    """
+
+    name = 'json'
+
+    def dumps(self, obj):
+        return json.dumps(obj).encode('utf-8')
+
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonCodec(JSONCodec):
+    """
+    JSON codec using orjson, which encodes directly to bytes and handles long base64 strings without intermediate copies.
+    """
+
+    name = 'orjson'
+
+    def dumps(self, obj):
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+class UjsonCodec(JSONCodec):
+    """
+    JSON codec using ujson. Forward slashes are not escaped, to keep base64 strings at their size.
+    """
+
+    name = 'ujson'
+
+    def dumps(self, obj):
+        return ujson.dumps(obj, ensure_ascii=False, escape_forward_slashes=False).encode('utf-8')
+
+
+    def loads(self, data):
+        return ujson.loads(data)
+
+
+JSON_CODECS = {
+    'orjson': OrjsonCodec,
+    'ujson': UjsonCodec,
+    'json': StdlibJSONCodec
+}
+
+
+def is_installed(json_codec):
+    """Check if the module of given codec is installed, without importing it.
+
+    Args:
+        json_codec (str): Name of the codec 'orjson', 'ujson' or 'json'.
+
+    Returns:
+        bool: Whether the module can be imported.
+    """
+    return json_codec == 'json' or importlib.util.find_spec(json_codec) is not None
+
+
+def get_json_codec(json_codec=None):
+    """Get a JSON codec by name. Without name, the fastest installed codec is chosen in the order orjson, ujson, json.
+    The module of the codec is imported on first use.
+
+    Args:
+        json_codec (str or JSONCodec, optional): Name of the codec 'orjson', 'ujson' or 'json', or a JSONCodec instance
+            which is returned unchanged. Defaults to None.
+
+    Raises:
+        ValueError: If the name is unknown or the module of the codec is not installed.
+
+    Returns:
+        JSONCodec: The JSON codec.
+    """
+    if isinstance(json_codec, JSONCodec):
+        return json_codec
+    if json_codec is None:
+        return next(codec_class() for name, codec_class in JSON_CODECS.items() if is_installed(name))
+    codec_class = JSON_CODECS.get(json_codec)
+    if not codec_class:
+        raise ValueError(f'Unknown JSON codec {json_codec}. Options: {", ".join(JSON_CODECS)}')
+    if not is_installed(json_codec):
+        raise ValueError(f'JSON codec {json_codec} is not installed')
+    return codec_class()
+
+
+default_json_codec = get_json_codec()
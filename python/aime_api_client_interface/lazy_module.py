@@ -0,0 +1,40 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import importlib
+
+
+class LazyModule():
+    """
+    Placeholder for a module which is imported on first attribute access.
+
+    Used for the HTTP libraries, so a process only using the synchronous interface never imports aiohttp and a process only using
+    the asynchronous interface never imports requests. This keeps the import of aime_api_client_interface fast for short-lived workers.
+
+    Args:
+        name (str): Name of the module like 'aiohttp'.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            aiohttp = LazyModule('aiohttp')
+            ...
+            session = aiohttp.ClientSession()  # aiohttp is imported here
+    """
+
+    def __init__(self, name):
+        self.__name = name
+        self.__module = None
+
+
+    def __getattr__(self, attribute):
+        if self.__module is None:
+            self.__module = importlib.import_module(self.__name)
+        return getattr(self.__module, attribute)
+
+
+    def __repr__(self):
+        return f'LazyModule({self.__name!r}, imported={self.__module is not None})'
@@ -0,0 +1,492 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import random
+import threading
+import time
+
+from .model_api import ModelAPI, if_async_else_run
+from .circuit_breaker import CircuitOpenError
+
+
+DEFAULT_SCORE_SMOOTHING = 0.3
+BALANCING_POLICIES = ('power_of_two', 'least_wait')
+
+
+class ServerScore():
+    """
+    Live score of an API server of a LoadBalancedModelAPI, estimating how long a new job would wait there.
+
+    All values are exponentially weighted moving averages with given smoothing factor. Servers without observations are
+    estimated optimistic, so every server gets jobs to be measured.
+
+    Args:
+        api_server (str): The base URL of the API server.
+        smoothing (float, optional): Weight of the newest observation between 0 and 1. Defaults to DEFAULT_SCORE_SMOOTHING.
+
+    Attributes:
+        submit_latency (float): Seconds from submitting a job to the acceptance by the API server.
+        queue_wait (float): Seconds jobs waited in the queue of the API server according to the 'estimate' or 'queue_position'
+            of their progress.
+        job_duration (float): Seconds from submitting a job to its result.
+        error_rate (float): Rate of failed jobs between 0 and 1.
+        in_flight (int): Number of running jobs submitted by this client.
+    """
+
+    def __init__(self, api_server, smoothing=DEFAULT_SCORE_SMOOTHING):
+        self.api_server = api_server
+        self.smoothing = smoothing
+        self.submit_latency = 0.0
+        self.queue_wait = 0.0
+        self.job_duration = 0.0
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.lock = threading.Lock()
+
+
+    @property
+    def estimated_wait(self):
+        """float: Estimated seconds until a new job submitted to this server is done, raised by its error rate."""
+        wait = self.submit_latency + self.queue_wait + self.in_flight * self.job_duration + self.job_duration
+        return wait / (1.0 - min(self.error_rate, 0.9))
+
+
+    def start_job(self):
+        with self.lock:
+            self.in_flight += 1
+
+
+    def observe_progress(self, progress_info, submitted, accepted):
+        """Update the score with a progress report of a job running on this server.
+
+        Args:
+            progress_info (dict): Progress info with the keys 'queue_position' and 'estimate'.
+            submitted (float): time.monotonic() when the job was submitted.
+            accepted (bool): Whether this is the first report of the job, sent when the API server accepted it.
+        """
+        with self.lock:
+            if accepted:
+                self.submit_latency = self.__smooth(self.submit_latency, time.monotonic() - submitted)
+                return
+            estimate = progress_info.get('estimate')
+            queue_position = progress_info.get('queue_position')
+            if isinstance(estimate, (int, float)) and estimate >= 0:
+                self.queue_wait = self.__smooth(self.queue_wait, estimate)
+            elif isinstance(queue_position, int) and queue_position >= 0:
+                self.queue_wait = self.__smooth(self.queue_wait, queue_position * self.job_duration)
+
+
+    def end_job(self, submitted, failed):
+        """Update the score with the outcome of a job of this server.
+
+        Args:
+            submitted (float): time.monotonic() when the job was submitted.
+            failed (bool): Whether the job failed or None if it was cancelled, leaving the averages unchanged.
+        """
+        with self.lock:
+            self.in_flight -= 1
+            if failed is None:
+                return
+            self.error_rate = self.__smooth(self.error_rate, 1.0 if failed else 0.0)
+            if not failed:
+                self.job_duration = self.__smooth(self.job_duration, time.monotonic() - submitted)
+
+
+    def __smooth(self, average, value):
+        return value if not average else average + self.smoothing * (value - average)
+
+
+class LoadBalancedModelAPI():
+    """
+    Client for an endpoint served by several AIME API servers, routing each job to the server with the shortest estimated wait.
+
+    It holds a ModelAPI for each server, so every job is submitted, polled and received at the server which accepted it.
+    The ServerScore of each server is updated from the submit latency, the errors, the job durations and the 'queue_position'
+    and 'estimate' of the progress reports. With balancing='power_of_two' the better of two randomly chosen servers gets the job,
+    which spreads bursts over the servers. With balancing='least_wait' the best server gets it. Servers with open circuit breaker
+    are skipped and jobs rejected by an open circuit breaker are submitted to the next best server.
+
+    Requests without progress_callback are submitted with wait_for_result like by ModelAPI, so their scores only learn from the job
+    durations and errors. With poll_progress=True they are polled for progress as well to keep the queue wait of the scores up to
+    date, which costs the API servers a progress request every progress_interval per job. Hedged requests are always polled.
+
+    Args:
+        api_servers (list of str): The base URLs of the API servers.
+        endpoint_name (str): The name of the API endpoint.
+        user (str, optional): Username for API authentication. Defaults to None.
+        api_key (str, optional): API key for authentication. Defaults to None.
+        balancing (str, optional): 'power_of_two' or 'least_wait'. Defaults to 'power_of_two'.
+        hedge_policy (HedgePolicy, optional): Submit a duplicate of asynchronous requests predicted to miss the deadline of the policy
+            to another API server. Defaults to None, hedging disabled.
+        smoothing (float, optional): Weight of the newest observation in the ServerScores. Defaults to DEFAULT_SCORE_SMOOTHING.
+        poll_progress (bool, optional): Poll requests without progress_callback for progress to update the scores. Defaults to False.
+        **model_api_config: Further keyword arguments for the ModelAPI of each server like output_format or retry_policy.
+
+    Attributes:
+        model_apis (dict): ModelAPI of each server {api_server: ModelAPI}.
+        scores (dict): ServerScore of each server {api_server: ServerScore}.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            model_api = LoadBalancedModelAPI(['https://api1.example.com', 'https://api2.example.com'], 'llama3_chat', user, key)
+            await model_api.do_api_login_async()
+            result = await model_api.do_api_request_async(params, progress_callback=progress_callback)
+            await model_api.close_session()
+    """
+
+    def __init__(
+        self,
+        api_servers,
+        endpoint_name,
+        user=None,
+        api_key=None,
+        balancing='power_of_two',
+        hedge_policy=None,
+        smoothing=DEFAULT_SCORE_SMOOTHING,
+        poll_progress=False,
+        **model_api_config
+        ):
+        if balancing not in BALANCING_POLICIES:
+            raise ValueError(f'Unknown balancing {balancing!r}. Options: {BALANCING_POLICIES}')
+        if not api_servers:
+            raise ValueError('LoadBalancedModelAPI needs at least one api_server')
+        self.endpoint_name = endpoint_name
+        self.balancing = balancing
+        self.hedge_policy = hedge_policy
+        self.poll_progress = poll_progress
+        self.model_apis = {
+            api_server: ModelAPI(api_server, endpoint_name, user, api_key, **model_api_config) for api_server in api_servers
+        }
+        self.scores = {api_server: ServerScore(api_server, smoothing) for api_server in api_servers}
+
+
+    async def __aenter__(self):
+        return self
+
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close_session()
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_sync_session()
+
+
+    async def do_api_login_async(self, user=None, api_key=None):
+        """Login to all API servers concurrently. Servers failing to login are counted as errors in their score and skipped
+        until a later login succeeds.
+
+        Args:
+            user (str, optional): The name of the user. Defaults to None.
+            api_key (str, optional): The user related api_key. Defaults to None.
+
+        Raises:
+            ConnectionError: If the login failed at all API servers.
+
+        Returns:
+            dict: Client session authentication keys of the servers logged in {api_server: client_session_auth_key}.
+        """
+        results = await asyncio.gather(
+            *[model_api.do_api_login_async(user, api_key) for model_api in self.model_apis.values()], return_exceptions=True
+        )
+        return self.__process_login_results(results)
+
+
+    def do_api_login(self, user=None, api_key=None):
+        """Login to all API servers one after another. Servers failing to login are skipped until a later login succeeds.
+
+        Args:
+            user (str, optional): The name of the user. Defaults to None.
+            api_key (str, optional): The user related api_key. Defaults to None.
+
+        Raises:
+            ConnectionError: If the login failed at all API servers.
+
+        Returns:
+            dict: Client session authentication keys of the servers logged in {api_server: client_session_auth_key}.
+        """
+        results = list()
+        for model_api in self.model_apis.values():
+            try:
+                results.append(model_api.do_api_login(user, api_key))
+            except ConnectionError as error:
+                results.append(error)
+        return self.__process_login_results(results)
+
+
+    def choose_server(self, exclude=()):
+        """Choose the API server for the next job according to the balancing policy.
+
+        Args:
+            exclude (iterable of str, optional): API servers not to choose. Defaults to ().
+
+        Raises:
+            ConnectionError: If no API server is available.
+
+        Returns:
+            str: The base URL of the chosen API server.
+        """
+        candidates = [
+            api_server for api_server, model_api in self.model_apis.items()
+            if api_server not in exclude and model_api.client_session_auth_key and not self.__is_circuit_open(model_api)
+        ]
+        if not candidates:
+            raise ConnectionError(f'No API server available for endpoint {self.endpoint_name}. Login first with do_api_login().')
+        if self.balancing == 'power_of_two' and len(candidates) > 2:
+            candidates = random.sample(candidates, 2)
+        return min(candidates, key=lambda api_server: self.scores[api_server].estimated_wait)
+
+
+    async def do_api_request_async(self, params, result_callback=None, progress_callback=None, hedge_policy=None, **request_config):
+        """Do an asynchronous API request at the API server chosen by the balancing policy.
+        Takes the same arguments as ModelAPI.do_api_request_async().
+
+        With a HedgePolicy a job predicted to miss its deadline by its first progress report is submitted to a second API server
+        as well. The first successful result is returned and the other job is cancelled. The progress of both jobs is passed to
+        the progress_callback, progress_info holds the key 'api_server' to tell them apart.
+
+        Args:
+            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'.
+            result_callback (callable or coroutine, optional): Callback function or coroutine with argument result (dict). Defaults to None.
+            progress_callback (callable or coroutine, optional): Callback function or coroutine with arguments progress_info (dict) and
+                progress_data (dict). Defaults to None.
+            hedge_policy (HedgePolicy, optional): Hedge policy of this request. Defaults to None, using the hedge_policy of the instance.
+            **request_config: Further keyword arguments of ModelAPI.do_api_request_async().
+
+        Raises:
+            ConnectionError: If no API server is available or the request failed.
+
+        Returns:
+            dict: Dictionary with job results including the key 'api_server'.
+        """
+        hedge_policy = hedge_policy or self.hedge_policy
+        if not hedge_policy:
+            return await self.__submit_async(
+                params, result_callback, progress_callback, request_config, set(), bool(progress_callback) or self.poll_progress
+            )
+        hedge_policy.request_count += 1
+        submitted = time.monotonic()
+        tried = set()
+        hedge_needed = asyncio.Event()
+        checked = [False]
+
+        async def watch_progress(progress_info, progress_data):
+            if not checked[0] and progress_info.get('api_server') in self.scores:
+                predicted_wait = hedge_policy.predict_wait(progress_info, self.scores[progress_info['api_server']].job_duration)
+                if predicted_wait is not None:
+                    checked[0] = True
+                    if hedge_policy.acquire(time.monotonic() - submitted, predicted_wait):
+                        hedge_needed.set()
+            await if_async_else_run(progress_callback, progress_info, progress_data)
+
+        primary = asyncio.ensure_future(self.__submit_async(params, None, watch_progress, request_config, tried, True))
+        trigger = asyncio.ensure_future(hedge_needed.wait())
+        hedge = None
+        hedge_started = False
+        pending = {primary, trigger}
+        winner = None
+        try:
+            while winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                if trigger in done:
+                    hedge_started = True
+                    hedge = self.__start_hedge(params, progress_callback, request_config, tried, hedge_policy)
+                    if hedge:
+                        pending.add(hedge)
+                for task in (primary, hedge):
+                    if task in done and not task.exception() and task.result() and task.result().get('success') is not False:
+                        winner = task
+                        break
+                else:
+                    if not pending - {trigger}:
+                        winner = primary
+        finally:
+            for task in (primary, trigger, hedge):
+                if task and not task.done():
+                    task.cancel()
+            if hedge:
+                hedge.add_done_callback(lambda task: self.__end_hedge(task, task is winner, hedge_policy))
+            elif hedge_needed.is_set() and not hedge_started:
+                hedge_policy.release()
+        result = winner.result()
+        await if_async_else_run(result_callback, result)
+        return result
+
+
+    def do_api_request(self, params, progress_callback=None, **request_config):
+        """Do a synchronous API request at the API server chosen by the balancing policy.
+        Takes the same arguments as ModelAPI.do_api_request().
+
+        Args:
+            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'.
+            progress_callback (callable, optional): Callback function with arguments progress_info (dict) and progress_data (dict).
+                Defaults to None.
+            **request_config: Further keyword arguments of ModelAPI.do_api_request().
+
+        Raises:
+            ConnectionError: If no API server is available or the request failed.
+
+        Returns:
+            dict: Dictionary with job results including the key 'api_server'.
+        """
+        tried = set()
+        while True:
+            api_server = self.choose_server(tried)
+            tried.add(api_server)
+            score = self.scores[api_server]
+            submitted = time.monotonic()
+            reports = [0]
+
+            def observe_progress(progress_info, progress_data):
+                score.observe_progress(progress_info, submitted, reports[0] == 0)
+                reports[0] += 1
+                if progress_callback:
+                    progress_callback(progress_info, progress_data)
+
+            score.start_job()
+            failed = True
+            try:
+                result = self.model_apis[api_server].do_api_request(
+                    params, observe_progress if progress_callback or self.poll_progress else None, **request_config
+                )
+                failed = not result or result.get('success') is False
+            except CircuitOpenError:
+                failed = None
+                continue
+            finally:
+                score.end_job(submitted, failed)
+            if isinstance(result, dict):
+                result['api_server'] = api_server
+            return result
+
+
+    async def get_api_request_generator(self, params, **request_config):
+        """Generator of the progress and results of a job at the API server chosen by the balancing policy.
+        Takes the same arguments as ModelAPI.get_api_request_generator().
+
+        Args:
+            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'.
+            **request_config: Further keyword arguments of ModelAPI.get_api_request_generator().
+
+        Yields:
+            dict: Job state and progress or result dictionaries including the key 'api_server'.
+        """
+        api_server = self.choose_server()
+        score = self.scores[api_server]
+        submitted = time.monotonic()
+        score.start_job()
+        failed = True
+        try:
+            async for result in self.model_apis[api_server].get_api_request_generator(params, **request_config):
+                score.observe_progress(result, submitted, result.get('job_state') == 'started')
+                if result.get('job_state') == 'done':
+                    failed = False
+                result['api_server'] = api_server
+                yield result
+        finally:
+            score.end_job(submitted, failed)
+
+
+    async def close_session(self):
+        """Close the aiohttp sessions of all API servers."""
+        for model_api in self.model_apis.values():
+            await model_api.close_session()
+
+
+    def close_sync_session(self):
+        """Close the requests sessions of all API servers."""
+        for model_api in self.model_apis.values():
+            model_api.close_sync_session()
+
+
+    async def __submit_async(self, params, result_callback, progress_callback, request_config, tried, poll_progress):
+        """Submit the job to the best API server not in tried, and to the next one if the circuit breaker of the server is open.
+
+        Args:
+            tried (set): API servers not to submit to. The API servers submitted to are added.
+            poll_progress (bool): Poll the job for progress instead of submitting it with wait_for_result.
+
+        Returns:
+            dict: Dictionary with job results including the key 'api_server'.
+        """
+        while True:
+            api_server = self.choose_server(tried)
+            tried.add(api_server)
+            score = self.scores[api_server]
+            submitted = time.monotonic()
+            reports = [0]
+
+            async def observe_progress(progress_info, progress_data):
+                score.observe_progress(progress_info, submitted, reports[0] == 0)
+                reports[0] += 1
+                progress_info['api_server'] = api_server
+                await if_async_else_run(progress_callback, progress_info, progress_data)
+
+            score.start_job()
+            failed = True
+            try:
+                result = await self.model_apis[api_server].do_api_request_async(
+                    params, result_callback, observe_progress if poll_progress else None, **request_config
+                )
+                failed = not result or result.get('success') is False
+            except CircuitOpenError:
+                failed = None
+                continue
+            except asyncio.CancelledError:
+                failed = None
+                raise
+            finally:
+                score.end_job(submitted, failed)
+            if isinstance(result, dict):
+                result['api_server'] = api_server
+            return result
+
+
+    def __start_hedge(self, params, progress_callback, request_config, tried, hedge_policy):
+        """Submit the duplicate of a hedged job to the best API server not tried yet.
+
+        Returns:
+            asyncio.Task: Task of the duplicate or None if no other API server is available.
+        """
+        try:
+            self.choose_server(tried)
+        except ConnectionError:
+            hedge_policy.release()
+            return None
+        return asyncio.ensure_future(self.__submit_async(params, None, progress_callback, request_config, set(tried), True))
+
+
+    @staticmethod
+    def __end_hedge(task, won, hedge_policy):
+        hedge_policy.release(won)
+        if not task.cancelled():
+            task.exception()  # retrieved, only the result of the winner is used
+
+
+    def __process_login_results(self, results):
+        auth_keys = dict()
+        for (api_server, model_api), result in zip(self.model_apis.items(), results):
+            if isinstance(result, BaseException):
+                model_api.client_session_auth_key = None
+                with self.scores[api_server].lock:
+                    self.scores[api_server].error_rate = 1.0
+            else:
+                auth_keys[api_server] = result
+        if not auth_keys:
+            errors = [result for result in results if isinstance(result, BaseException)]
+            raise ConnectionError(f'Login failed at all API servers: {errors}')
+        return auth_keys
+
+
+    @staticmethod
+    def __is_circuit_open(model_api):
+        return bool(model_api.circuit_breaker and model_api.circuit_breaker.state == 'open')
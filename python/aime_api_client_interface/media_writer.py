@@ -0,0 +1,180 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import base64
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from .payloads import get_data_uri_payload_start
+
+
+DEFAULT_OUTPUT_WORKERS = 4
+DEFAULT_OUTPUT_FILENAME_TEMPLATE = '{job_id}_{key}_{index}.{extension}'
+DEFAULT_DECODE_CHUNK_SIZE = 2**20
+
+
+class MediaWriter():
+    """
+    Writer of the base64 data URI fields of API results like images or audio to files, used by ModelAPI with output_format='file'.
+
+    Decoding and writing is done in a bounded thread pool, so the event loop keeps serving other jobs while large outputs are written.
+    The payloads are decoded in chunks directly into the files, the decoded data never exists completely in memory.
+    Job ids and keys received from the API server are only accepted as file name parts without path separators, results without
+    job id get a random one.
+
+    Args:
+        output_directory (str or pathlib.Path): Directory the files are written to. Created if not existing.
+        filename_template (str, optional): Template of the file names with the fields {job_id}, {key}, {index} and {extension}.
+            Defaults to DEFAULT_OUTPUT_FILENAME_TEMPLATE.
+        max_workers (int, optional): Maximum number of threads decoding and writing files in parallel. Defaults to DEFAULT_OUTPUT_WORKERS.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            model_api = ModelAPI('https://api.aime.info', 'flux-dev', output_format='file', output_directory='output')
+            ...
+            result = model_api.do_api_request(params)
+            for image in result['images']:
+                print(image['path'], image['size'], image['mime_type'])
+
+            # {'path': 'output/JID21_images_0.png', 'size': 1402339, 'mime_type': 'image/PNG'}
+    """
+
+    def __init__(self, output_directory, filename_template=DEFAULT_OUTPUT_FILENAME_TEMPLATE, max_workers=DEFAULT_OUTPUT_WORKERS):
+        self.output_directory = Path(output_directory)
+        self.filename_template = filename_template
+        self.max_workers = max_workers
+        self.executor = None
+
+
+    def get_executor(self):
+        """Get the thread pool of this writer, created on first use.
+
+        Returns:
+            concurrent.futures.ThreadPoolExecutor: Thread pool decoding and writing the files.
+        """
+        if not self.executor:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='aime_media_writer')
+        return self.executor
+
+
+    def shutdown(self, wait=True):
+        """Shut down the thread pool. A new one is created when files are written again.
+
+        Args:
+            wait (bool, optional): Wait for pending writes to be finished. Defaults to True.
+        """
+        if self.executor:
+            self.executor.shutdown(wait=wait)
+            self.executor = None
+
+
+    async def write_result_async(self, result):
+        """Write all base64 data URI fields of given result to files in the thread pool without blocking the event loop.
+
+        Args:
+            result (dict): Result dictionary received from the API server.
+
+        Returns:
+            dict: Copy of result with each data URI replaced by a dictionary with the keys 'path', 'size' and 'mime_type'.
+        """
+        loop = asyncio.get_running_loop()
+        payloads = self.__find_payloads(result)
+        file_infos = await asyncio.gather(
+            *[loop.run_in_executor(self.get_executor(), self.write_payload, *write_args) for _, _, write_args in payloads]
+        )
+        return self.__replace_payloads(result, payloads, file_infos)
+
+
+    def write_result(self, result):
+        """Write all base64 data URI fields of given result to files in the thread pool and wait for them to be written.
+
+        Args:
+            result (dict): Result dictionary received from the API server.
+
+        Returns:
+            dict: Copy of result with each data URI replaced by a dictionary with the keys 'path', 'size' and 'mime_type'.
+        """
+        payloads = self.__find_payloads(result)
+        futures = [self.get_executor().submit(self.write_payload, *write_args) for _, _, write_args in payloads]
+        return self.__replace_payloads(result, payloads, [future.result() for future in futures])
+
+
+    def write_payload(self, data_uri, payload_start, job_id, key, index):
+        """Decode the payload of given data URI chunk by chunk into a new file in the output directory.
+
+        Args:
+            data_uri (str): Base64 data URI like 'data:image/PNG;base64,iVBOR...'.
+            payload_start (int): Index of the first payload character.
+            job_id (str): Job id of the result, used for the file name.
+            key (str): Name of the result field like 'images', used for the file name.
+            index (int): Position of the payload in its field, used for the file name.
+
+        Raises:
+            ValueError: If job_id, key or the mime type contain path separators or the file would be outside the output directory.
+
+        Returns:
+            dict: Dictionary with the keys 'path', 'size' and 'mime_type' of the written file.
+        """
+        mime_type = data_uri[5:payload_start - len(';base64,')]
+        extension = mime_type.split('/')[-1].lower() or 'bin'
+        for name, part in (('job_id', job_id), ('key', key), ('extension', extension)):
+            if '/' in str(part) or '\\' in str(part) or str(part) in ('', '.', '..'):
+                raise ValueError(f'Invalid {name} {part!r:.100} for an output file name')
+        self.output_directory.mkdir(parents=True, exist_ok=True)
+        path = self.output_directory / self.filename_template.format(job_id=job_id, key=key, index=index, extension=extension)
+        if not path.resolve().is_relative_to(self.output_directory.resolve()):
+            raise ValueError(f'Output file {path} is outside of the output directory {self.output_directory}')
+        size = 0
+        with open(path, 'wb') as file:
+            for position in range(payload_start, len(data_uri), DEFAULT_DECODE_CHUNK_SIZE):
+                size += file.write(base64.b64decode(data_uri[position:position + DEFAULT_DECODE_CHUNK_SIZE]))
+        return {'path': str(path), 'size': size, 'mime_type': mime_type}
+
+
+    def __find_payloads(self, result):
+        """Find the base64 data URIs in the fields of given result, also inside lists.
+
+        Args:
+            result (dict): Result dictionary received from the API server.
+
+        Returns:
+            list: Tuples (key, index, write_args) with index None for fields not being a list and write_args the arguments of write_payload().
+        """
+        payloads = list()
+        if result:
+            job_id = result.get('job_id') or uuid.uuid4().hex
+            for key, value in result.items():
+                for index, item in enumerate(value if isinstance(value, list) else [value]):
+                    payload_start = get_data_uri_payload_start(item)
+                    if payload_start:
+                        payloads.append((key, index if isinstance(value, list) else None, (item, payload_start, job_id, key, index)))
+        return payloads
+
+
+    @staticmethod
+    def __replace_payloads(result, payloads, file_infos):
+        """Replace the found payloads in a copy of given result by the infos of the written files.
+
+        Args:
+            result (dict): Result dictionary received from the API server.
+            payloads (list): Payloads found by __find_payloads().
+            file_infos (list): Return values of write_payload() in the same order as payloads.
+
+        Returns:
+            dict: Converted copy of result.
+        """
+        if not payloads:
+            return result
+        converted = {key: list(value) if isinstance(value, list) else value for key, value in result.items()}
+        for (key, index, _), file_info in zip(payloads, file_infos):
+            if index is None:
+                converted[key] = file_info
+            else:
+                converted[key][index] = file_info
+        return converted
@@ -2,16 +2,39 @@
 #
 # This software may be used and distributed according to the terms of the MIT LICENSE
 
-import aiohttp
 import base64
 import asyncio
-import requests
 import time
-import pkg_resources
-import json
-
-
-DEFAULT_PROGRESS_INTERVAL = 0.3
+import contextlib
+import functools
+import itertools
+
+from .session_registry import ClientSessionRegistry, create_client_session
+from .progress_multiplexer import ProgressMultiplexer
+from .progress_policy import DEFAULT_PROGRESS_INTERVAL, ProgressPolicy, get_progress_interval
+from .progress_stream import ServerSentEventParser
+from .payloads import LazyPayload, StreamedInput, get_data_uri_payload_start, is_streamable_input, has_streamed_inputs, iter_json_body, aiter_json_body
+from .response_parser import DEFAULT_RESPONSE_CHUNK_SIZE, is_job_result_payload, parse_json_chunks, parse_json_chunks_async
+from .media_writer import DEFAULT_OUTPUT_FILENAME_TEMPLATE, DEFAULT_OUTPUT_WORKERS, MediaWriter
+from .json_codec import get_json_codec
+from .lazy_module import LazyModule
+from .auth_key_store import hold_login_lock, hold_login_lock_async
+from .endpoint_catalog import EndpointCatalog
+from .param_validator import ParamValidator
+from .result_cache import MemoryResultCache, make_request_key
+from .request_coalescer import RequestCoalescer
+from .retry_policy import RetryPolicy
+from .circuit_breaker import CircuitBreaker
+
+aiohttp = LazyModule('aiohttp')
+requests = LazyModule('requests')
+
+
+DEFAULT_POOL_CONNECTIONS = 10
+DEFAULT_POOL_MAXSIZE = 10
+DEFAULT_MAX_IN_FLIGHT = 16
+DEFAULT_CANCEL_TIMEOUT = 5
+AUTH_KEY_NOT_REGISTERED_ERROR = 'Client session authentication key not registered in API Server'
 
 
 class ModelAPI():
@@ -24,8 +47,46 @@ class ModelAPI():
         user (str, optional): Username for API authentication. Defaults to None.
         key (str, optional): API key for authentication. Defaults to None.
         session (aiohttp.ClientSession, optional): Existing session to use for requests. Defaults to None.
-        output_format (str, optional): Format for returned data like images/audio. Options: 'base64' or 'byte_string'. Defaults to 'base64'.
+        output_format (str, optional): Format for returned data like images/audio. Options: 'base64', 'byte_string', 'lazy' or 'file'. 
+            'lazy' returns LazyPayload objects decoding their data only on first access. 'file' writes the data of the final result to
+            files in output_directory and returns dictionaries with 'path', 'size' and 'mime_type' instead. Defaults to 'base64'.
         output_type (str, optional): Type of output data like "image" or "audio". Defaults to 'image'.
+        sync_session (requests.Session, optional): Existing session to use for synchronous requests. Defaults to None.
+        pool_connections (int, optional): Number of connection pools cached by the synchronous session. Defaults to DEFAULT_POOL_CONNECTIONS.
+        pool_maxsize (int, optional): Maximum number of keep-alive connections per pool of the synchronous session. Defaults to DEFAULT_POOL_MAXSIZE.
+        share_session (bool, optional): Share one aiohttp session and connection pool with all other ModelAPI instances of the same api_server.
+            Defaults to True.
+        connector_config (dict, optional): Keyword arguments for aiohttp.TCPConnector like 'limit', 'limit_per_host', 'ttl_dns_cache'
+            or 'keepalive_timeout'. Defaults to None.
+        timeout_config (dict, optional): Keyword arguments for aiohttp.ClientTimeout like 'total', 'sock_connect' or 'sock_read'. Defaults to None.
+        multiplex_progress (bool, optional): Poll the progress of all running asynchronous jobs in one ProgressMultiplexer loop. Defaults to False.
+        payload_sink (PayloadSink, optional): Parse responses incrementally and hand base64 data URI fields of the final results decoded to
+            this sink like a FileSink, instead of keeping them in memory. Defaults to None.
+        output_directory (str or pathlib.Path, optional): Directory for the result files with output_format='file'. Defaults to None.
+        output_filename_template (str, optional): Template of the result file names with the fields {job_id}, {key}, {index} and {extension}.
+            Defaults to DEFAULT_OUTPUT_FILENAME_TEMPLATE.
+        output_workers (int, optional): Number of threads decoding and writing result files. Defaults to DEFAULT_OUTPUT_WORKERS.
+        json_codec (str or JSONCodec, optional): JSON codec for request and response bodies: 'orjson', 'ujson' or 'json'.
+            Defaults to None, choosing the fastest installed codec.
+        auth_key_store (AuthKeyStore, optional): Store sharing client session authentication keys between instances and processes.
+            Defaults to None.
+        auto_relogin (bool, optional): Login again once and repeat the request if the API server doesn't know the client session
+            authentication key anymore. Defaults to True.
+        endpoint_catalog (EndpointCatalog, optional): Cache of endpoint list and endpoint details, shareable between instances.
+            Defaults to None, creating a catalog for this instance.
+        validate_params (bool, optional): Validate the params of requests against the input specification of the endpoint before
+            sending them. Defaults to False.
+        result_cache (ResultCache or bool, optional): Cache returning the results of repeated deterministic requests without sending them.
+            Defaults to None.
+        coalesce_requests (bool or RequestCoalescer, optional): Attach concurrent identical asynchronous requests to one job. Defaults to False.
+        retry_policy (RetryPolicy, optional): Policy repeating failed requests with exponential backoff and jitter.
+            Defaults to None, using RetryPolicy() with default settings. False disables retries.
+        circuit_breaker (bool or CircuitBreaker, optional): Fail requests immediately with CircuitOpenError while the API server is down.
+            Defaults to None.
+        rate_limiter (RateLimiter, optional): Token bucket rate limiter delaying job submissions to stay within the quota of the API key.
+            Defaults to None.
+        cancel_abandoned_jobs (bool, optional): Cancel running jobs at the API server when the task awaiting them is cancelled or the
+            request generator is closed early. Only requests with progress_callback can be canceled. Defaults to True.
 
     Attributes:
         api_server (str): The base URL of the API server.
@@ -35,6 +96,8 @@ class ModelAPI():
         key (str): API key for authentication.
         output_format (str): Format for returned data.
         output_type (str): Type of output data.
+        sync_session (requests.Session): Pooled keep-alive session shared by all synchronous requests.
+        progress_stream_supported (bool): Whether the API server supports pushing progress via route /stream_progress. None if not tested yet.
 
     API Parameters:
         The params dictionary passed to do_api_request methods which are defined in the input configuration of each endpoint.
@@ -66,7 +129,38 @@ class ModelAPI():
 
     """
 
-    def __init__(self, api_server, endpoint_name, user=None, api_key=None, session=None, output_format='base64', output_type = 'image'):
+    def __init__(
+        self,
+        api_server,
+        endpoint_name,
+        user=None,
+        api_key=None,
+        session=None,
+        output_format='base64',
+        output_type='image',
+        sync_session=None,
+        pool_connections=DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize=DEFAULT_POOL_MAXSIZE,
+        share_session=True,
+        connector_config=None,
+        timeout_config=None,
+        multiplex_progress=False,
+        payload_sink=None,
+        output_directory=None,
+        output_filename_template=DEFAULT_OUTPUT_FILENAME_TEMPLATE,
+        output_workers=DEFAULT_OUTPUT_WORKERS,
+        json_codec=None,
+        auth_key_store=None,
+        auto_relogin=True,
+        endpoint_catalog=None,
+        validate_params=False,
+        result_cache=None,
+        coalesce_requests=False,
+        retry_policy=None,
+        circuit_breaker=None,
+        rate_limiter=None,
+        cancel_abandoned_jobs=True
+        ):
         
         """
         Constructor
@@ -78,21 +172,120 @@ class ModelAPI():
             session (aiohttp.ClientSession): Give existing session to ModelAPI to make upcoming requests in given session. 
                 Defaults to None.
             output_format (str): Output format of objects like images in result dictionary of do_api_request() and do_api_request_async().
-                Defaults to 'base64'.  
+                Options: 'base64', 'byte_string', 'lazy' or 'file'. Defaults to 'base64'.  
             output_type(str): Output data type like "image" or "audio". Defaults to'image'.
+            sync_session (requests.Session): Give existing session to ModelAPI to make upcoming synchronous requests in given session.
+                Defaults to None.
+            pool_connections (int): Number of connection pools cached by the synchronous session. Defaults to DEFAULT_POOL_CONNECTIONS.
+            pool_maxsize (int): Maximum number of keep-alive connections per pool of the synchronous session. Defaults to DEFAULT_POOL_MAXSIZE.
+            share_session (bool): Share one reference counted aiohttp session with all ModelAPI instances of the same api_server
+                in the running event loop. Defaults to True.
+            connector_config (dict): Keyword arguments for aiohttp.TCPConnector. Defaults to None.
+            timeout_config (dict): Keyword arguments for aiohttp.ClientTimeout. Defaults to None.
+            multiplex_progress (bool): Poll the progress of all running asynchronous jobs of this instance in one ProgressMultiplexer loop,
+                using batched progress requests if the API server supports them. Defaults to False.
+            payload_sink (PayloadSink): Parse result and progress responses incrementally while they arrive and hand the decoded base64 data URI
+                fields of the final result to this sink, e.g. FileSink to write images directly to disk. The fields are replaced by the
+                return values of the sink. Preview images in the progress_data of progress responses are kept as data URI strings.
+                Defaults to None.
+            output_directory (str or pathlib.Path): Directory the MediaWriter writes the images and audio of the final results to
+                with output_format='file'. Required for output_format='file'. Defaults to None.
+            output_filename_template (str): Template of the result file names. Defaults to DEFAULT_OUTPUT_FILENAME_TEMPLATE.
+            output_workers (int): Size of the thread pool decoding and writing result files, so the event loop is not blocked.
+                Defaults to DEFAULT_OUTPUT_WORKERS.
+            json_codec (str or JSONCodec): Codec encoding request bodies to bytes and decoding responses, given by name 'orjson', 'ujson'
+                or 'json' or as JSONCodec instance. Defaults to None, picking orjson if installed with fallback to ujson and the json module.
+            auth_key_store (AuthKeyStore): Store for client session authentication keys keyed by (api_server, endpoint_name, user) like
+                MemoryAuthKeyStore or FileAuthKeyStore. do_api_login() reuses a valid stored key instead of logging in. Defaults to None.
+            auto_relogin (bool): If a request is rejected because the client session authentication key is not registered in the API
+                server, e.g. after a restart of the server, login again and repeat the request once. Concurrent requests share a single
+                login. Defaults to True.
+            endpoint_catalog (EndpointCatalog): Cache for get_endpoint_list() and get_endpoint_details() and their asynchronous counterparts.
+                Give the same catalog to many instances to share it. Defaults to None, creating a catalog with default ttl for this instance.
+            validate_params (bool): Check the params of requests with the ParamValidator compiled from the input specification in the
+                endpoint details before anything is sent. Defaults are filled in and values coerced to the specified types, invalid params
+                raise ValueError without a round trip to the API server. The validator is cached with the details in the endpoint_catalog.
+                Defaults to False.
+            result_cache (ResultCache or bool): Cache for the results of do_api_request() and do_api_request_async() like
+                MemoryResultCache or DiskResultCache, keyed by endpoint_name and params. Requests without seed or with seed -1 are not cached.
+                Hits call the progress_callback once with job_state 'done' and 'cached' True in progress_info.
+                True creates a MemoryResultCache with default size. Defaults to None.
+            coalesce_requests (bool or RequestCoalescer): Let concurrent identical calls of do_api_request_async() share one job
+                instead of submitting one each. Progress and result of the job are handed to the callbacks of all of them. Requests with
+                progress_callback are only coalesced with requests having one as well. Requests with seed -1 are not coalesced. True creates a RequestCoalescer for this instance, give the same RequestCoalescer to many
+                instances to coalesce their requests too. Defaults to False.
+            retry_policy (RetryPolicy): Policy deciding if and when failed submissions, logins, progress and endpoint catalog
+                requests are repeated. Submissions are only repeated if the API server can't have started the job. Give the same
+                policy to many instances to share its statistics. Defaults to None, using RetryPolicy(). False disables retries.
+            circuit_breaker (bool or CircuitBreaker): Circuit breaker rating the requests to the API server. While it is open, requests
+                fail immediately with CircuitOpenError instead of waiting for connection errors. True uses the breaker of api_server
+                shared by all instances of the process from CircuitBreaker.get_shared(). Defaults to None.
+            rate_limiter (RateLimiter): Rate limiter like MemoryRateLimiter or FileRateLimiter. Each job submission takes a token from the
+                bucket of (api_server, endpoint_name, api_key) and waits until one is available. Give the same limiter to many instances
+                to share its budget. Defaults to None.
+            cancel_abandoned_jobs (bool): Send a best-effort cancel_job() request for running jobs nobody waits for anymore: when the task
+                of do_api_request_async() is cancelled, e.g. by asyncio.wait_for(), when the generator of get_api_request_generator() is
+                closed before the job is done or when do_api_request() is interrupted by KeyboardInterrupt. Requests without
+                progress_callback are submitted with wait_for_result and only learn their job id with the result, so their jobs can't
+                be canceled and keep running at the API server. Give a progress_callback to requests that may be abandoned.
+                Requires an API server providing the route /cancel, see cancel_job(). Defaults to True.
+
+        Raises:
+            ValueError: If output_format is 'file' and no output_directory is given or if given json_codec is unknown or not installed.
         """
         self.api_server = api_server
         self.endpoint_name = endpoint_name
+        self.user = user
         self.api_key = api_key
         self.session = session
         self.client_session_auth_key = None
         self.output_format = output_format
         self.output_type = output_type
+        self.sync_session = sync_session
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.__owns_sync_session = False
+        self.share_session = share_session
+        self.connector_config = connector_config
+        self.timeout_config = timeout_config
+        self.__shared_session = None
+        self.multiplex_progress = multiplex_progress
+        self.progress_multiplexer = None
+        self.progress_stream_supported = None
+        self.payload_sink = payload_sink
+        self.json_codec = get_json_codec(json_codec)
+        self.auth_key_store = auth_key_store
+        self.auto_relogin = auto_relogin
+        self.endpoint_catalog = endpoint_catalog or EndpointCatalog()
+        self.validate_params = validate_params
+        self.result_cache = MemoryResultCache() if result_cache is True else result_cache or None
+        self.request_coalescer = RequestCoalescer() if coalesce_requests is True else coalesce_requests or None
+        self.retry_policy = RetryPolicy() if retry_policy is None else retry_policy or None
+        self.circuit_breaker = CircuitBreaker.get_shared(api_server) if circuit_breaker is True else circuit_breaker or None
+        self.rate_limiter = rate_limiter
+        self.cancel_abandoned_jobs = cancel_abandoned_jobs
+        if output_format == 'file':
+            if not output_directory:
+                raise ValueError("output_format='file' requires an output_directory")
+            self.media_writer = MediaWriter(output_directory, output_filename_template, output_workers)
+        else:
+            self.media_writer = None
+
+
+    def __enter__(self):
+        return self
+
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close_sync_session()
+
 
+    async def __aenter__(self):
+        return self
 
 
-    async def __aexit__(self):
-        await self.session.close()
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close_session()
 
 
     async def init_api_key_async(self, api_key=None, error_callback=None, session=None):
@@ -109,16 +302,20 @@ class ModelAPI():
         url = f'{self.api_server}/api/validate_key'
         params = {'version': ModelAPI.get_version(), 'key': self.api_key}
         self.setup_session(session)
-        try:
-            async with self.session.get(url=url, params=params) as response:
-                response_json = await response.json()
-                if response.status == 200:
-                    return response_json
-                else:
-                    return await self.__error_handler_async(response, 'key_validation', error_callback)
+        for attempt in itertools.count():
+            try:
+                async with self.__send_async(self.session.get, url=url, params=params) as response:
+                    if response.status == 200:
+                        return self.json_codec.loads(await response.read())
+                    delay = self.__get_retry_delay(attempt, True, response=response)
+                    if delay is None:
+                        return await self.__error_handler_async(response, 'key_validation', error_callback)
 
-        except aiohttp.client_exceptions.ClientConnectorError as error:
-            return await self.__error_handler_async(error, 'key_validation', error_callback)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return await self.__error_handler_async(error, 'key_validation', error_callback)
+            await asyncio.sleep(delay)
 
 
     def init_api_key(self, api_key=None):
@@ -133,16 +330,21 @@ class ModelAPI():
         self.api_key = api_key or self.api_key
         url = f'{self.api_server}/api/validate_key'
         params = {'version': ModelAPI.get_version(), 'key': self.api_key}
-        try:
-            response = requests.get(url=url, params=params)
-
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return self.__error_handler_sync(response, 'key_validation', None)
+        self.setup_sync_session()
+        for attempt in itertools.count():
+            try:
+                response = self.__send_sync(self.sync_session.get, url=url, params=params)
+                if response.status_code == 200:
+                    return self.json_codec.loads(response.content)
+                delay = self.__get_retry_delay(attempt, True, response=response)
+                if delay is None:
+                    return self.__error_handler_sync(response, 'key_validation', None)
 
-        except requests.exceptions.ConnectionError as error:
-            return self.__error_handler_sync(error, 'key_validation', None)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return self.__error_handler_sync(error, 'key_validation', None)
+            time.sleep(delay)
 
 
     async def do_api_login_async(
@@ -171,9 +373,17 @@ class ModelAPI():
         Returns:
             str: Client session authentication key
         """
-        api_key = api_key or self.api_key
+        self.user = user or self.user
+        self.api_key = api_key or self.api_key
         self.setup_session(session)
-        self.client_session_auth_key = await self.__fetch_auth_key_async(user, api_key, error_callback)
+        identity = self.__get_auth_key_identity()
+        async with hold_login_lock_async(identity, self.auth_key_store):
+            auth_key = await self.auth_key_store.get_async(identity) if self.auth_key_store else None
+            if not auth_key:
+                auth_key = await self.__fetch_auth_key_async(self.user, self.api_key, error_callback)
+                if self.auth_key_store and isinstance(auth_key, str):
+                    await self.auth_key_store.set_async(identity, auth_key)
+        self.client_session_auth_key = auth_key
         return self.client_session_auth_key
         
 
@@ -194,8 +404,16 @@ class ModelAPI():
         Returns:
             str: Client session authentication key
         """
-        api_key = api_key or self.api_key
-        self.client_session_auth_key = self.__fetch_auth_key(user, api_key)
+        self.user = user or self.user
+        self.api_key = api_key or self.api_key
+        identity = self.__get_auth_key_identity()
+        with hold_login_lock(identity, self.auth_key_store):
+            auth_key = self.auth_key_store.get(identity) if self.auth_key_store else None
+            if not auth_key:
+                auth_key = self.__fetch_auth_key(self.user, self.api_key)
+                if self.auth_key_store and isinstance(auth_key, str):
+                    self.auth_key_store.set(identity, auth_key)
+        self.client_session_auth_key = auth_key
         return self.client_session_auth_key
 
 
@@ -215,7 +433,8 @@ class ModelAPI():
         Do an asynchronous API request with optional progress data via asynchronous or synchronous callbacks. 
 
         Args:
-            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'.
+            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'. Binary inputs can be given as bytes,
+                or as pathlib.Path, binary file object or mmap to be streamed without holding their base64 encoding in memory.
             result_callback (callable or coroutine, optional): Callback function or coroutine with argument result (dict) to handle the API request result.
                 Accepts synchronous functions and asynchrouns couroutines. Defaults to None
             progress_callback (callable or coroutine, optional): Callback function or coroutine with arguments progress_info (dict) and 
@@ -226,15 +445,18 @@ class ModelAPI():
             progress_error_callback (callable or coroutine, optional): Callback function or coroutine with argument error_description (str) for catching 
                 progress errors with successful initial request. Accepts synchronous functions and asynchrouns couroutines.
                 Prevents ConnectionErrors during Transmitting. Defaults to None.
-            progress_interval (int, optional): Interval in seconds at which progress is checked. Default is {DEFAULT_PROGRESS_INTERVAL}.
-            progress_stream (bool, optional): Not implemented yet
+            progress_interval (float or ProgressPolicy, optional): Interval in seconds at which progress is checked or polling policy
+                deciding the interval like EstimateProgressPolicy(). Defaults to DEFAULT_PROGRESS_INTERVAL.
+            progress_stream (bool, optional): Receive progress and result pushed as server-sent events from route /stream_progress
+                instead of polling. Falls back to polling if the API server doesn't support it. Defaults to False.
             session (aiohttp.ClientSession): Give existing session to ModelApi API to make login request in given session. Defaults to None.
 
         Raises:
             ConnectionError: Raised if client couldn't connect with API sserver and no request_error_callback is given. Also raised if client lost 
                 connection during transmitting and no progress_error_callback is given.
             PermissionError: Raised if client is not logged in the API server and no error_callback given.
-            NotImplementedError: If progress_stream != None.
+            ValueError: Raised if validate_params is True and params don't match the input specification of the endpoint.
+            CircuitOpenError: Raised without sending the request if the circuit_breaker of the API server is open.
 
         Returns:
             dict: Dictionary with job results
@@ -277,6 +499,52 @@ class ModelAPI():
                 }
         """
         self.setup_session(session)
+        if self.validate_params:
+            params = (await self.get_param_validator_async(request_error_callback)).validate(params)
+        else:
+            params = dict(params)
+        coalesce_key = self.__make_coalesce_key(params, progress_callback) if self.request_coalescer else None
+        # Coalesced jobs are submitted like single ones, following the progress only for requests with progress_callback
+        cache_key = self.__make_cache_key(params, not progress_callback)
+        if cache_key:
+            result = await self.result_cache.lookup_async(cache_key)
+            if result is not None:
+                return await self.__return_cached_result_async(result, result_callback, progress_callback)
+        if coalesce_key:
+            result = await self.request_coalescer.run(
+                coalesce_key,
+                lambda publish_progress: self.__submit_api_request_async(
+                    params, None, publish_progress, request_error_callback, progress_error_callback, progress_interval, progress_stream, cache_key
+                ),
+                progress_callback
+            )
+            await if_async_else_run(result_callback, result)
+            return result
+        return await self.__submit_api_request_async(
+            params, result_callback, progress_callback, request_error_callback, progress_error_callback, progress_interval, progress_stream, cache_key
+        )
+
+
+    async def __submit_api_request_async(
+        self,
+        params,
+        result_callback,
+        progress_callback,
+        request_error_callback,
+        progress_error_callback,
+        progress_interval,
+        progress_stream,
+        cache_key
+        ):
+        """Submit the job of do_api_request_async() and receive its result.
+
+        Args:
+            params (dict): Validated copy of the request params, completed here by the session params.
+            cache_key (str): Key to store the result under in the result_cache or None.
+
+        Returns:
+            dict: Dictionary with job results
+        """
         url = f'{self.api_server}/{self.endpoint_name}'
         params['client_session_auth_key'] = self.client_session_auth_key
         params['key'] = self.api_key
@@ -291,23 +559,26 @@ class ModelAPI():
                     'queue_position': -1, 
                     'estimate': -1
                 }
-                await if_async_else_run(progress_callback, init_progress_info, None)
-
-                if progress_stream:
-                    raise NotImplementedError()
-                    await self.__do_progress_stream(result_callback, progress_callback)
-                else:
+                try:
+                    await if_async_else_run(progress_callback, init_progress_info, None)
                     return await self.__finish_api_request_while_receiving_progress_async(
                         job_id,
                         result_callback,
                         progress_callback,
                         progress_error_callback,
-                        progress_interval
+                        progress_interval,
+                        progress_stream,
+                        cache_key
                     )
+                except asyncio.CancelledError:
+                    await self.__cancel_abandoned_job_async(job_id)
+                    raise
             else:
                 await if_async_else_run(result_callback, result)
         else:
-            result = self.__convert_result_params(result)
+            if cache_key and result.get('success'):
+                await self.result_cache.store_async(cache_key, result)
+            result = await self.__write_output_files_async(self.__convert_result_params(result))
             await if_async_else_run(result_callback, result)
 
         return result
@@ -318,15 +589,19 @@ class ModelAPI():
         params,
         progress_interval=DEFAULT_PROGRESS_INTERVAL,
         session=None,
-        output_format='base64'
+        output_format='base64',
+        progress_stream=False
         ):
         """Generator function to get request generator, yielding the results
 
         Args:
             params (dict): Dictionary with parameters for the the API request.
-            progress_interval (int, optional): Interval in seconds at which progress is checked. Defaults to DEFAULT_PROGRESS_INTERVAL.
+            progress_interval (float or ProgressPolicy, optional): Interval in seconds at which progress is checked or polling policy
+                deciding the interval like EstimateProgressPolicy(). Defaults to DEFAULT_PROGRESS_INTERVAL.
             session (aiohttp.ClientSession): Give existing session to ModelApi API to make login request in given session. Defaults to None.
             output_format (str, optional): Define a different output_format. Defaults to 'base64'.
+            progress_stream (bool, optional): Receive progress and result pushed as server-sent events from route /stream_progress
+                instead of polling. Falls back to polling if the API server doesn't support it. Defaults to False.
 
         Yields:
             dict: Result dictionary containing job and progress results.
@@ -394,30 +669,160 @@ class ModelAPI():
                 }            
         """        
         self.setup_session(session)
+        if self.validate_params:
+            params = (await self.get_param_validator_async()).validate(params)
+        else:
+            params = dict(params)
         params['client_session_auth_key'] = self.client_session_auth_key
         params['key'] = self.api_key
         params['wait_for_result'] = False
         result = await self.__fetch_async(f'{self.api_server}/{self.endpoint_name}', params)
         if result.get('success'):
             job_id = result['job_id']
-            yield {
-                'job_id': job_id,
-                'success': result.get('success'),
-                'job_state': 'started'
-            }
-            job_done = False
-            now = time.time()
-            while not job_done:
-                progress_result = await self.__fetch_progress_async(job_id)
-                if progress_result:
-                    job_state = progress_result.get('job_state')
-                    job_done = job_state == 'done'
-                    result, result_data = self.__process_progress_result(progress_result)
-                    result[f'{"result" if job_done else "progress"}_data'] = result_data
-                    
-                    if job_state != 'canceled':
-                        yield result
-                        await asyncio.sleep(progress_interval)
+            job_finished = False
+            progress_results = self.__receive_progress_results_async(job_id, None, progress_interval, progress_stream)
+            try:
+                yield {
+                    'job_id': job_id,
+                    'success': result.get('success'),
+                    'job_state': 'started'
+                }
+                async for progress_result in progress_results:
+                    if progress_result:
+                        job_state = progress_result.get('job_state')
+                        job_done = job_state == 'done'
+                        job_finished = job_state in ('done', 'canceled')
+                        result, result_data = self.__process_progress_result(progress_result)
+                        if job_done:
+                            result_data = await self.__write_output_files_async(result_data)
+                        result[f'{"result" if job_done else "progress"}_data'] = result_data
+                        
+                        if job_state != 'canceled':
+                            yield result
+                        if job_done:
+                            break
+            except (GeneratorExit, asyncio.CancelledError):
+                if not job_finished:
+                    await self.__cancel_abandoned_job_async(job_id)
+                raise
+            finally:
+                await progress_results.aclose()
+
+
+    async def do_api_requests_async(
+        self,
+        params_list,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        result_callback=None,
+        progress_callback=None,
+        progress_interval=DEFAULT_PROGRESS_INTERVAL,
+        session=None
+        ):
+        """
+        Do many asynchronous API requests with at most max_in_flight jobs running at the same time.
+        Errors are captured per request instead of cancelling the whole batch.
+
+        Args:
+            params_list (iterable of dict): Parameter dictionaries, one for each API request. Not modified.
+            max_in_flight (int, optional): Maximum number of concurrently running jobs. Defaults to DEFAULT_MAX_IN_FLIGHT.
+            result_callback (callable or coroutine, optional): Callback function or coroutine with arguments index (int) and result (dict or Exception)
+                called as soon as a job finished. Accepts synchronous functions and asynchrouns couroutines. Defaults to None.
+            progress_callback (callable or coroutine, optional): Callback function or coroutine with arguments progress_info (dict) and 
+                progress_data (dict) for tracking progress of each job. Accepts synchronous functions and asynchrouns couroutines. Defaults to None.
+            progress_interval (float or ProgressPolicy, optional): Interval in seconds at which progress is checked or polling policy
+                deciding the interval like EstimateProgressPolicy(). Defaults to DEFAULT_PROGRESS_INTERVAL.
+            session (aiohttp.ClientSession): Give existing session to ModelApi API to make requests in given session. Defaults to None.
+
+        Returns:
+            list: Job result dictionaries in the order of params_list. Failed requests hold the raised exception instead.
+
+        Example usage:
+
+            .. highlight:: python
+            .. code-block:: python
+
+                results = await model_api.do_api_requests_async([{'prompt': 'cat'}, {'prompt': 'dog'}], max_in_flight=8)
+                for result in results:
+                    if isinstance(result, Exception):
+                        handle_error(result)
+        """
+        results = dict()
+        async for index, result in self.get_api_requests_as_completed(
+            params_list,
+            max_in_flight,
+            progress_callback,
+            progress_interval,
+            session
+        ):
+            results[index] = result
+            await if_async_else_run(result_callback, index, result)
+        return [results[index] for index in range(len(results))]
+
+
+    async def get_api_requests_as_completed(
+        self,
+        params_list,
+        max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+        progress_callback=None,
+        progress_interval=DEFAULT_PROGRESS_INTERVAL,
+        session=None
+        ):
+        """
+        Asynchronous generator doing many API requests with at most max_in_flight jobs running at the same time, 
+        yielding the results in the order the jobs finish.
+
+        Args:
+            params_list (iterable of dict): Parameter dictionaries, one for each API request. Can be a lazy iterator. Not modified.
+            max_in_flight (int, optional): Maximum number of concurrently running jobs. Defaults to DEFAULT_MAX_IN_FLIGHT.
+            progress_callback (callable or coroutine, optional): Callback function or coroutine with arguments progress_info (dict) and 
+                progress_data (dict) for tracking progress of each job. Accepts synchronous functions and asynchrouns couroutines. Defaults to None.
+            progress_interval (float or ProgressPolicy, optional): Interval in seconds at which progress is checked or polling policy
+                deciding the interval like EstimateProgressPolicy(). Defaults to DEFAULT_PROGRESS_INTERVAL.
+            session (aiohttp.ClientSession): Give existing session to ModelApi API to make requests in given session. Defaults to None.
+
+        Yields:
+            tuple: Index of the request in params_list and its job result dictionary or the raised exception.
+
+        Example usage:
+
+            .. highlight:: python
+            .. code-block:: python
+
+                async for index, result in model_api.get_api_requests_as_completed(params_list, max_in_flight=8):
+                    print(index, result)
+        """
+        self.setup_session(session)
+        indexed_params = enumerate(params_list)
+        finished_queue = asyncio.Queue()
+
+        async def worker():
+            try:
+                for index, params in indexed_params:
+                    try:
+                        result = await self.do_api_request_async(
+                            params,
+                            progress_callback=progress_callback,
+                            progress_interval=progress_interval,
+                            session=session
+                        )
+                    except Exception as error:
+                        result = error
+                    await finished_queue.put((index, result))
+            finally:
+                finished_queue.put_nowait(None)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(max(1, max_in_flight))]
+        running_workers = len(workers)
+        try:
+            while running_workers:
+                finished = await finished_queue.get()
+                if finished is None:
+                    running_workers -= 1
+                else:
+                    yield finished
+        finally:
+            for worker_task in workers:
+                worker_task.cancel()
 
 
     def do_api_request(
@@ -426,25 +831,29 @@ class ModelAPI():
         progress_callback=None,
         progress_error_callback=None,
         progress_interval=DEFAULT_PROGRESS_INTERVAL,
-        progress_stream=None
+        progress_stream=False
         ):
         """
         Do an synchronous API request with optional progress data via callbacks. 
 
         Args:
-            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'
+            params (dict): Dictionary with parameters for the the API request like 'prompt' or 'image'. Binary inputs can be given as bytes,
+                or as pathlib.Path, binary file object or mmap to be streamed without holding their base64 encoding in memory.
             progress_callback (callable, optional): Callback function or coroutine with arguments  progress_info (dict) and 
                 progress_data (dict) for receiving progress data. Defaults to None.
             progress_error_callback (callable, optional): Callback function or coroutine with argument error_description (str) for catching 
                 progress errors with successful initial request. Prevents ConnectionErrors during Transmitting. Defaults to None.
-            progress_interval (int, optional): Interval in seconds at which progress is checked. Default is 300.
-            progress_stream (int, optional): Not implemented yet
+            progress_interval (float or ProgressPolicy, optional): Interval in seconds at which progress is checked or polling policy
+                deciding the interval like EstimateProgressPolicy(). Defaults to DEFAULT_PROGRESS_INTERVAL.
+            progress_stream (bool, optional): Receive progress and result pushed as server-sent events from route /stream_progress
+                instead of polling. Falls back to polling if the API server doesn't support it. Defaults to False.
 
         Raises:
             ConnectionError: Raised if client couldn't connect with API server. Also raised if client lost connection during transmitting
                 and no progress_error_callback given.
             PermissionError: Raised if client is not logged in the API server
-            NotImplementedError: If progress_stream != None
+            ValueError: Raised if validate_params is True and params don't match the input specification of the endpoint.
+            CircuitOpenError: Raised without sending the request if the circuit_breaker of the API server is open.
 
         Returns:
             dict: Dictionary with request result parameters.
@@ -487,6 +896,15 @@ class ModelAPI():
 
         """
         url = f'{self.api_server}/{self.endpoint_name}'
+        if self.validate_params:
+            params = self.get_param_validator().validate(params)
+        else:
+            params = dict(params)
+        cache_key = self.__make_cache_key(params, not progress_callback)
+        if cache_key:
+            result = self.result_cache.lookup(cache_key)
+            if result is not None:
+                return self.__return_cached_result_sync(result, progress_callback)
         params['client_session_auth_key'] = self.client_session_auth_key
         params['key'] = self.api_key
         params['wait_for_result'] = not progress_callback
@@ -500,72 +918,319 @@ class ModelAPI():
                     'queue_position': -1,
                     'estimate': -1
                 }
-                progress_callback(init_progress_info, None)
-
-                if progress_stream:
-                    raise NotImplementedError()
-                    self.__do_progress_stream(result_callback, progress_callback)
-                else:
+                try:
+                    progress_callback(init_progress_info, None)
                     result = self.__finish_api_request_while_receiving_progress_sync(
                         job_id,
                         progress_callback,
                         progress_error_callback,
-                        progress_interval
+                        progress_interval,
+                        progress_stream,
+                        cache_key
                     )
+                except KeyboardInterrupt:
+                    self.__cancel_abandoned_job_sync(job_id)
+                    raise
         else:
-            result = self.__convert_result_params(result)
+            if cache_key and result.get('success'):
+                self.result_cache.store(cache_key, result)
+            result = self.__write_output_files_sync(self.__convert_result_params(result))
 
         return result
 
+
+    async def cancel_job_async(self, job_id, error_callback=None, session=None):
+        """Cancel a running job at the API server via route /cancel. Its progress then reports job_state 'canceled'.
+        The route /{endpoint_name}/cancel is not used by the JavaScript client and not provided by older AIME API server versions,
+        it requires an API server version providing it. Other API servers answer with an error.
+
+        Args:
+            job_id (str): Job id of the job to cancel.
+            error_callback (callable or coroutine, optional): Callback function or coroutine with argument error_response (dict) for catching
+                errors. Accepts synchronous functions and asynchrouns couroutines. Defaults to None.
+            session (aiohttp.ClientSession): Give existing session to ModelApi API to make requests in given session. Defaults to None.
+
+        Raises:
+            ConnectionError: If the API server rejected the cancellation or is not reachable and no error_callback is given.
+
+        Returns:
+            dict: Response of the API server like {'success': True, 'job_id': 'JID21', 'job_state': 'canceled'}.
+        """
+        self.setup_session(session)
+        url = f'{self.api_server}/{self.endpoint_name}/cancel'
+        params = {
+            'client_session_auth_key': self.client_session_auth_key,
+            'key': self.api_key,
+            'job_id': job_id
+        }
+        for attempt in itertools.count():
+            try:
+                async with self.__send_async(self.session.get, url, params=params) as response:
+                    if response.status == 200:
+                        return self.json_codec.loads(await response.read())
+                    delay = self.__get_retry_delay(attempt, True, response=response)
+                    if delay is None:
+                        return await self.__error_handler_async(response, 'cancel', error_callback)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return await self.__error_handler_async(error, 'cancel', error_callback)
+            await asyncio.sleep(delay)
+
+
+    def cancel_job(self, job_id):
+        """Cancel a running job at the API server via route /cancel. Its progress then reports job_state 'canceled'.
+        The route /{endpoint_name}/cancel is not used by the JavaScript client and not provided by older AIME API server versions,
+        it requires an API server version providing it. Other API servers answer with an error.
+
+        Args:
+            job_id (str): Job id of the job to cancel.
+
+        Raises:
+            ConnectionError: If the API server rejected the cancellation or is not reachable.
+
+        Returns:
+            dict: Response of the API server like {'success': True, 'job_id': 'JID21', 'job_state': 'canceled'}.
+        """
+        url = f'{self.api_server}/{self.endpoint_name}/cancel'
+        params = {
+            'client_session_auth_key': self.client_session_auth_key,
+            'key': self.api_key,
+            'job_id': job_id
+        }
+        self.setup_sync_session()
+        for attempt in itertools.count():
+            try:
+                with self.__send_sync(self.sync_session.get, url, params=params) as response:
+                    if response.status_code == 200:
+                        return self.json_codec.loads(response.content)
+                    delay = self.__get_retry_delay(attempt, True, response=response)
+                    if delay is None:
+                        return self.__error_handler_sync(response, 'cancel')
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return self.__error_handler_sync(error, 'cancel')
+            time.sleep(delay)
+
+
     def get_endpoint_list(self, api_key=None, error_callback=None):
-        try:
-            response = requests.get(
-                url=f'{self.api_server}/api/endpoints',
-                params={
-                    'key': api_key
-                }
+        """Get the names of the endpoints available for the api key. Cached in the endpoint_catalog.
+
+        Args:
+            api_key (str, optional): API key. Defaults to None, using self.api_key.
+            error_callback (callable, optional): Callback function with argument error_description (str) for catching errors. Defaults to None.
+
+        Raises:
+            ConnectionError: If the request failed and no error_callback is given.
+
+        Returns:
+            list: Names of the available endpoints.
+        """
+        api_key = api_key or self.api_key
+        return self.endpoint_catalog.get(
+            (self.api_server, 'endpoints', api_key),
+            lambda validators: self.__fetch_catalog_entry_sync(
+                f'{self.api_server}/api/endpoints', {'key': api_key}, validators, 'get_endpoint_list', error_callback, 'endpoints'
             )
-            if response.status_code == 200:
-                return response.json().get('endpoints')
-            else:
-                return self.__error_handler_sync(response, 'get_endpoint_list', error_callback)
+        )
+
 
-        except requests.exceptions.ConnectionError as error:
-            return self.__error_handler_sync(error, 'get_endpoint_list', error_callback)
+    async def get_endpoint_list_async(self, api_key=None, error_callback=None, session=None):
+        """Asynchronous version of get_endpoint_list(). Expired entries of the endpoint_catalog are returned while being refreshed
+        in the background.
+
+        Args:
+            api_key (str, optional): API key. Defaults to None, using self.api_key.
+            error_callback (callable or coroutine, optional): Callback function or coroutine with argument error_description (str)
+                for catching errors. Defaults to None.
+            session (aiohttp.ClientSession): Give existing session to ModelApi API to make upcoming requests in given session. Defaults to None.
+
+        Raises:
+            ConnectionError: If the request failed and no error_callback is given.
+
+        Returns:
+            list: Names of the available endpoints.
+        """
+        api_key = api_key or self.api_key
+        self.setup_session(session)
+        return await self.endpoint_catalog.get_async(
+            (self.api_server, 'endpoints', api_key),
+            lambda validators: self.__fetch_catalog_entry_async(
+                f'{self.api_server}/api/endpoints', {'key': api_key} if api_key else {}, validators, 'get_endpoint_list', error_callback, 'endpoints'
+            )
+        )
 
 
     def get_endpoint_details(self, endpoint_name, error_callback=None):
-        try:
-            response = requests.get(
-                url=f'{self.api_server}/api/{endpoint_name}',
-                params={}
+        """Get the description of an endpoint with its input and output parameters. Cached in the endpoint_catalog.
+
+        Args:
+            endpoint_name (str): Name of the endpoint.
+            error_callback (callable, optional): Callback function with argument error_description (str) for catching errors. Defaults to None.
+
+        Raises:
+            ConnectionError: If the request failed and no error_callback is given.
+
+        Returns:
+            dict: Endpoint details.
+        """
+        return self.endpoint_catalog.get(
+            (self.api_server, 'details', endpoint_name),
+            lambda validators: self.__fetch_catalog_entry_sync(
+                f'{self.api_server}/api/{endpoint_name}', {}, validators, 'get_endpoint_details', error_callback
             )
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return self.__error_handler_sync(response, 'get_endpoint_details', error_callback)
+        )
+
 
-        except requests.exceptions.ConnectionError as error:
-            return self.__error_handler_sync(error, 'get_endpoint_details', error_callback)
+    async def get_endpoint_details_async(self, endpoint_name, error_callback=None, session=None):
+        """Asynchronous version of get_endpoint_details(). Expired entries of the endpoint_catalog are returned while being refreshed
+        in the background.
+
+        Args:
+            endpoint_name (str): Name of the endpoint.
+            error_callback (callable or coroutine, optional): Callback function or coroutine with argument error_description (str)
+                for catching errors. Defaults to None.
+            session (aiohttp.ClientSession): Give existing session to ModelApi API to make upcoming requests in given session. Defaults to None.
+
+        Raises:
+            ConnectionError: If the request failed and no error_callback is given.
+
+        Returns:
+            dict: Endpoint details.
+        """
+        self.setup_session(session)
+        return await self.endpoint_catalog.get_async(
+            (self.api_server, 'details', endpoint_name),
+            lambda validators: self.__fetch_catalog_entry_async(
+                f'{self.api_server}/api/{endpoint_name}', {}, validators, 'get_endpoint_details', error_callback
+            )
+        )
+
+
+    def get_param_validator(self, error_callback=None):
+        """Get the ParamValidator compiled from the input specification of this endpoint. It is compiled once and cached with
+        the endpoint details in the endpoint_catalog.
+
+        Args:
+            error_callback (callable, optional): Callback function with argument error_description (str) for catching errors
+                of the endpoint details request. Defaults to None.
+
+        Raises:
+            ConnectionError: If the endpoint details request failed and no error_callback is given.
+
+        Returns:
+            ParamValidator: Validator of the request params.
+        """
+        return self.endpoint_catalog.get_compiled(
+            (self.api_server, 'details', self.endpoint_name),
+            self.get_endpoint_details(self.endpoint_name, error_callback),
+            ParamValidator.from_endpoint_details
+        )
+
+
+    async def get_param_validator_async(self, error_callback=None, session=None):
+        """Asynchronous version of get_param_validator().
+
+        Args:
+            error_callback (callable or coroutine, optional): Callback function or coroutine with argument error_description (str)
+                for catching errors of the endpoint details request. Defaults to None.
+            session (aiohttp.ClientSession): Give existing session to ModelApi API to make upcoming requests in given session. Defaults to None.
+
+        Raises:
+            ConnectionError: If the endpoint details request failed and no error_callback is given.
+
+        Returns:
+            ParamValidator: Validator of the request params.
+        """
+        return self.endpoint_catalog.get_compiled(
+            (self.api_server, 'details', self.endpoint_name),
+            await self.get_endpoint_details_async(self.endpoint_name, error_callback, session),
+            ParamValidator.from_endpoint_details
+        )
 
 
     def setup_session(self, session):
-        """Open a new session if session is
+        """Open a new session if session is None and there is no open session yet. If self.share_session is True,
+        the session is taken from the process-wide ClientSessionRegistry and shared with all ModelAPI instances of the same api_server.
 
         Args:
             session (aiohttp.ClientSession): Give existing session to ModelApi API to make upcoming requests in given session.
         """        
         if session:
+            if session is not self.session:
+                self.__detach_shared_session()
             self.session = session
         elif not self.session or self.session.closed:
-            self.session = aiohttp.ClientSession()
+            self.__detach_shared_session()
+            if self.share_session:
+                self.session = ClientSessionRegistry.acquire(self.api_server, self.connector_config, self.timeout_config)
+                self.__shared_session = self.session
+            else:
+                self.session = create_client_session(self.connector_config, self.timeout_config)
 
     async def close_session(self):
         """
-        Close the aiohttp client session saved in ModelApi().session.
+        Close the aiohttp client session saved in ModelApi().session. A shared session is only closed 
+        if no other ModelAPI instance is using it anymore.
         """
+        if self.progress_multiplexer:
+            await self.progress_multiplexer.close()
+        if self.media_writer:
+            await asyncio.get_running_loop().run_in_executor(None, self.media_writer.shutdown)
         if self.session:
-            await self.session.close()
+            if self.session is self.__shared_session:
+                self.__shared_session = None
+                await ClientSessionRegistry.release(self.session)
+            else:
+                await self.session.close()
+            self.session = None
+
+
+    def __detach_shared_session(self):
+        """
+        Give back the reference to the shared session without waiting for it to be closed.
+        """
+        if self.__shared_session:
+            if ClientSessionRegistry.detach(self.__shared_session) and not self.__shared_session.closed:
+                asyncio.ensure_future(self.__shared_session.close())
+            self.__shared_session = None
+
+
+    def setup_sync_session(self, sync_session=None):
+        """Open a new pooled keep-alive requests session if no session is present yet.
+
+        Args:
+            sync_session (requests.Session, optional): Give existing session to ModelApi API to make upcoming synchronous requests
+                in given session. Defaults to None.
+        """
+        if sync_session:
+            self.close_sync_session()
+            self.sync_session = sync_session
+        elif not self.sync_session:
+            self.sync_session = requests.Session()
+            adapter = requests.adapters.HTTPAdapter(
+                pool_connections=self.pool_connections,
+                pool_maxsize=self.pool_maxsize
+            )
+            self.sync_session.mount('http://', adapter)
+            self.sync_session.mount('https://', adapter)
+            self.__owns_sync_session = True
+
+
+    def close_sync_session(self):
+        """
+        Close the requests session saved in ModelApi().sync_session, if it was opened by ModelAPI.
+        Sessions given by the caller are left open.
+        """
+        if self.sync_session and self.__owns_sync_session:
+            self.sync_session.close()
+            self.sync_session = None
+        self.__owns_sync_session = False
+        if self.media_writer:
+            self.media_writer.shutdown()
 
 
     def __get_data_format_from_byte_string(self, byte_string_data):
@@ -598,23 +1263,29 @@ class ModelAPI():
         Returns:
             bool: True if the string is a valid base64-encoded string, False otherwise.
         """
+        separator = test_string.find(',') if isinstance(test_string, str) else -1
+        if separator < 0 or separator == len(test_string) - 1:
+            return False
         try:
-            body = test_string.split(',')[1] if ',' in test_string else None
-            return base64.b64encode(base64.b64decode(body.encode('utf-8'))).decode('utf-8') == body if body else False
-        except (TypeError, base64.binascii.Error, ValueError):
+            base64.b64decode(test_string[separator + 1:], validate=True)
+            return True
+        except (base64.binascii.Error, ValueError):
             return False
 
 
     @staticmethod
+    @functools.lru_cache(maxsize=None)
     def get_version():
-        """Parses name and version of AIME API Client Interface with pkg_resources
+        """Parses name and version of AIME API Client Interface with importlib.metadata. Resolved once and cached.
 
         Returns:
             str: Name and version of AIME API Client Interface
         """        
+        from importlib import metadata
         try:
-            version = 'Python ' + str(pkg_resources.get_distribution("aime_api_client_interface"))
-        except pkg_resources.DistributionNotFound: # If package is not installed via pip
+            distribution = metadata.distribution('aime_api_client_interface')
+            version = f'Python {distribution.metadata["Name"]} {distribution.version}'
+        except metadata.PackageNotFoundError: # If package is not installed via pip
             import re
             from pathlib import Path
             setup_py = Path(__file__).resolve().parent.parent / 'setup.py'
@@ -630,10 +1301,12 @@ class ModelAPI():
         result_callback,
         progress_callback,
         progress_error_callback,
-        progress_interval
+        progress_interval,
+        progress_stream=False,
+        cache_key=None
         ):
         """
-        Finish the asynchronous API request while receiving progress data every progress_interval=300 seconds.
+        Finish the asynchronous API request while receiving progress data every progress_interval seconds or pushed by the API server.
 
         Args:
             job_id (str): ID of related job.
@@ -643,30 +1316,179 @@ class ModelAPI():
                 progress_data (dict) for tracking progress. Accepts synchronous functions and asynchronous couroutines. Default is None.
             progress_error_callback (callable or coroutine, optional): Callback function or coroutine with arguments error_description (str) for catching 
                 progress errors with successful initial request. Accepts synchronous functions and asynchronous couroutines. Defaults to None.
-            progress_interval (int): Interval in seconds at which progress is checked.
+            progress_interval (float or ProgressPolicy): Interval in seconds at which progress is checked or polling policy.
+            progress_stream (bool, optional): Receive progress pushed as server-sent events if supported. Defaults to False.
+            cache_key (str, optional): Key to store the final result under in the result_cache. Defaults to None.
         """ 
-        job_done = False
-        while not job_done:
-            progress_result = await self.__fetch_progress_async(job_id, progress_error_callback)
-            job_done = progress_result.get('job_state') == 'done'
-            progress_info, progress_data = self.__process_progress_result(progress_result)
-
-            if progress_result.get('job_state') != 'canceled':
-                await if_async_else_run(progress_callback, progress_info, progress_data)
-                await asyncio.sleep(progress_interval)
+        progress_data = None
+        progress_results = self.__receive_progress_results_async(job_id, progress_error_callback, progress_interval, progress_stream)
+        try:
+            async for progress_result in progress_results:
+                if not progress_result:
+                    continue
+                job_done = progress_result.get('job_state') == 'done'
+                progress_info, progress_data = self.__process_progress_result(progress_result)
+                if job_done and cache_key and progress_result.get('success'):
+                    await self.result_cache.store_async(cache_key, progress_result.get('job_result', {}))
+                if job_done:
+                    progress_data = await self.__write_output_files_async(progress_data)
+
+                if progress_result.get('job_state') != 'canceled':
+                    await if_async_else_run(progress_callback, progress_info, progress_data)
+                if job_done:
+                    break
+        finally:
+            await progress_results.aclose()
         await if_async_else_run(result_callback, progress_data)
         return progress_data
 
 
+    def __make_coalesce_key(self, params, progress_callback):
+        """Key under which identical requests are coalesced by the request_coalescer. Requests with progress_callback follow the
+        progress of their job while the others are submitted with wait_for_result, so they are coalesced separately.
+
+        Args:
+            params (dict): Parameters of the API request.
+            progress_callback (callable or coroutine): Progress callback of the request or None.
+
+        Returns:
+            tuple: (api_server, endpoint_name, output_format, with_progress, request_key) or None for requests with seed -1 or
+                streamed inputs.
+        """
+        if params.get('seed') == -1:
+            return None
+        request_key = make_request_key(self.endpoint_name, params)
+        return (self.api_server, self.endpoint_name, self.output_format, bool(progress_callback), request_key) if request_key else None
+
+
+    def __make_cache_key(self, params, wait_for_result):
+        """Key under which the result of the request is stored in the result_cache. Jobs submitted with wait_for_result and jobs
+        followed by their progress return results of different shape, so they are cached under different keys.
+
+        Args:
+            params (dict): Parameters of the API request.
+            wait_for_result (bool): Whether the job is submitted with wait_for_result.
+
+        Returns:
+            str: Cache key or None if there is no result_cache or the request is not cacheable.
+        """
+        if not self.result_cache:
+            return None
+        return self.result_cache.make_key(self.endpoint_name, {**params, 'wait_for_result': wait_for_result})
+
+
+    async def __return_cached_result_async(self, result, result_callback, progress_callback):
+        """Hand a result found in the result_cache to the callbacks like a finished job.
+
+        Args:
+            result (dict): Cached result.
+            result_callback (callable or coroutine): Callback function or coroutine with argument result (dict).
+            progress_callback (callable or coroutine): Callback function or coroutine with arguments progress_info (dict) and progress_data (dict).
+
+        Returns:
+            dict: Result converted to self.output_format.
+        """
+        result = await self.__write_output_files_async(self.__convert_result_params(result))
+        if progress_callback:
+            await if_async_else_run(progress_callback, self.__make_cached_progress_info(result), result)
+        await if_async_else_run(result_callback, result)
+        return result
+
+
+    def __return_cached_result_sync(self, result, progress_callback):
+        """Hand a result found in the result_cache to the progress callback like a finished job.
+
+        Args:
+            result (dict): Cached result.
+            progress_callback (callable): Callback function with arguments progress_info (dict) and progress_data (dict).
+
+        Returns:
+            dict: Result converted to self.output_format.
+        """
+        result = self.__write_output_files_sync(self.__convert_result_params(result))
+        if progress_callback:
+            progress_callback(self.__make_cached_progress_info(result), result)
+        return result
+
+
+    @staticmethod
+    def __make_cached_progress_info(result):
+        return {'job_id': result.get('job_id'), 'success': True, 'job_state': 'done', 'progress': 100, 'cached': True}
+
+
+    async def __receive_progress_results_async(self, job_id, progress_error_callback, progress_interval, progress_stream=False):
+        """
+        Asynchronous generator yielding the progress result dictionaries of the job with given job id as received from the API server,
+        either pushed via route /stream_progress if progress_stream is True and supported by the API server, by polling every 
+        progress_interval seconds, or via the ProgressMultiplexer if self.multiplex_progress is True. If the stream is not supported 
+        or breaks before the job is finished, polling takes over. Stops after the job got canceled.
+
+        Args:
+            job_id (str): ID of related job.
+            progress_error_callback (callable or coroutine): Callback function or coroutine with arguments error_description (str) for catching 
+                progress errors with successful initial request. Accepts synchronous functions and asynchronous couroutines.
+            progress_interval (float or ProgressPolicy): Interval in seconds at which progress is checked or polling policy.
+            progress_stream (bool, optional): Receive progress pushed as server-sent events if supported. Defaults to False.
+
+        Yields:
+            dict: Progress result dictionary received from API server.
+        """
+        try:
+            if progress_stream and self.progress_stream_supported is not False:
+                try:
+                    async for progress_result in self.__stream_progress_results_async(job_id):
+                        yield progress_result
+                        if progress_result.get('job_state') in ('done', 'canceled'):
+                            return
+                except (aiohttp.ClientError, asyncio.TimeoutError, ValueError):
+                    pass
+            if self.multiplex_progress:
+                multiplexer = self.get_progress_multiplexer()
+                queue = multiplexer.register(job_id, progress_interval, progress_error_callback)
+                try:
+                    while True:
+                        progress_result = await queue.get()
+                        if isinstance(progress_result, Exception):
+                            raise progress_result
+                        yield progress_result
+                        if progress_result and progress_result.get('job_state') == 'canceled':
+                            return
+                finally:
+                    multiplexer.unregister(job_id)
+            else:
+                while True:
+                    progress_result = await self.__fetch_progress_async(job_id, progress_error_callback)
+                    yield progress_result
+                    if progress_result and progress_result.get('job_state') == 'canceled':
+                        return
+                    await asyncio.sleep(get_progress_interval(progress_interval, job_id, progress_result))
+        finally:
+            if isinstance(progress_interval, ProgressPolicy):
+                progress_interval.end_job(job_id)
+
+
+    def get_progress_multiplexer(self):
+        """Get the ProgressMultiplexer polling the progress of all running jobs of this instance. Created on first use.
+
+        Returns:
+            ProgressMultiplexer: The progress multiplexer of this instance.
+        """
+        if not self.progress_multiplexer:
+            self.progress_multiplexer = ProgressMultiplexer(self.__fetch_progress_async, self.__fetch_batch_progress_async)
+        return self.progress_multiplexer
+
+
     def __finish_api_request_while_receiving_progress_sync(
         self,
         job_id,
         progress_callback,
         progress_error_callback,
-        progress_interval
+        progress_interval,
+        progress_stream=False,
+        cache_key=None
         ):
         """
-        Finish the API request while receiving progress data every progress_interval=300 seconds.
+        Finish the API request while receiving progress data every progress_interval seconds or pushed by the API server.
 
         Args:
             job_id (str): ID of related job.
@@ -674,21 +1496,147 @@ class ModelAPI():
                 for tracking progress.
             progress_error_callback (callable): Callback function with arguments error_description (str) for catching 
                 progress errors with successful initial request.
-            progress_interval (int): Interval in seconds at which progress is checked.
+            progress_interval (float or ProgressPolicy): Interval in seconds at which progress is checked or polling policy.
+            progress_stream (bool, optional): Receive progress pushed as server-sent events if supported. Defaults to False.
+            cache_key (str, optional): Key to store the final result under in the result_cache. Defaults to None.
 
         Returns:
             dict: Dictionary with job results
         """ 
-        job_done = False
-        while not job_done:         
-            progress_result = self.__fetch_progress_sync(job_id, progress_error_callback)
-            job_done = progress_result.get('job_state') == 'done'
-            progress_info, progress_data = self.__process_progress_result(progress_result)
-            if progress_result.get('job_state') != 'canceled':
-                progress_callback(progress_info, progress_data)
-                time.sleep(progress_interval)
+        progress_data = None
+        progress_results = self.__receive_progress_results_sync(job_id, progress_error_callback, progress_interval, progress_stream)
+        try:
+            for progress_result in progress_results:
+                job_done = progress_result.get('job_state') == 'done'
+                progress_info, progress_data = self.__process_progress_result(progress_result)
+                if job_done and cache_key and progress_result.get('success'):
+                    self.result_cache.store(cache_key, progress_result.get('job_result', {}))
+                if job_done:
+                    progress_data = self.__write_output_files_sync(progress_data)
+                if progress_result.get('job_state') != 'canceled':
+                    progress_callback(progress_info, progress_data)
+                if job_done:
+                    break
+        finally:
+            progress_results.close()
         return progress_data
-        
+
+
+    def __receive_progress_results_sync(self, job_id, progress_error_callback, progress_interval, progress_stream=False):
+        """
+        Generator yielding the progress result dictionaries of the job with given job id as received from the API server,
+        either pushed via route /stream_progress if progress_stream is True and supported by the API server or by polling 
+        every progress_interval seconds. Stops after the job got canceled.
+
+        Args:
+            job_id (str): ID of related job.
+            progress_error_callback (callable): Callback function with arguments error_description (str) for catching 
+                progress errors with successful initial request.
+            progress_interval (float or ProgressPolicy): Interval in seconds at which progress is checked or polling policy.
+            progress_stream (bool, optional): Receive progress pushed as server-sent events if supported. Defaults to False.
+
+        Yields:
+            dict: Progress result dictionary received from API server.
+        """
+        try:
+            if progress_stream and self.progress_stream_supported is not False:
+                try:
+                    for progress_result in self.__stream_progress_results_sync(job_id):
+                        yield progress_result
+                        if progress_result.get('job_state') in ('done', 'canceled'):
+                            return
+                except (requests.exceptions.RequestException, ValueError):
+                    pass
+            while True:
+                progress_result = self.__fetch_progress_sync(job_id, progress_error_callback)
+                yield progress_result
+                if progress_result.get('job_state') == 'canceled':
+                    return
+                time.sleep(get_progress_interval(progress_interval, job_id, progress_result))
+        finally:
+            if isinstance(progress_interval, ProgressPolicy):
+                progress_interval.end_job(job_id)
+
+
+    async def __stream_progress_results_async(self, job_id):
+        """
+        Asynchronous generator yielding the progress result dictionaries pushed by the API server as server-sent events via route /stream_progress.
+        Yields nothing and sets self.progress_stream_supported to False if the API server doesn't support progress streaming.
+        Yields nothing for other error responses, so the request falls back to polling, but streaming is tried again by later requests.
+
+        Args:
+            job_id (str): Job id of running job.
+
+        Raises:
+            aiohttp.ClientError: If the connection to the API server failed or broke.
+
+        Yields:
+            dict: Progress result dictionary like returned by route /progress.
+        """
+        url = f'{self.api_server}/stream_progress'
+        params = {
+            'client_session_auth_key': self.client_session_auth_key,
+            'key': self.api_key,
+            'job_id': job_id
+        }
+        async with self.__send_async(self.session.get, url, params=params, headers={'Accept': 'text/event-stream'}, measure_latency=False) as response:
+            if not self.__check_progress_stream_support(response.status, response.content_type):
+                return
+            parser = ServerSentEventParser(self.json_codec)
+            async for chunk in response.content.iter_any():
+                for progress_result in parser.feed(chunk):
+                    yield progress_result
+
+
+    def __stream_progress_results_sync(self, job_id):
+        """
+        Generator yielding the progress result dictionaries pushed by the API server as server-sent events via route /stream_progress.
+        Yields nothing and sets self.progress_stream_supported to False if the API server doesn't support progress streaming.
+        Yields nothing for other error responses, so the request falls back to polling, but streaming is tried again by later requests.
+
+        Args:
+            job_id (str): Job id of running job.
+
+        Raises:
+            requests.exceptions.RequestException: If the connection to the API server failed or broke.
+
+        Yields:
+            dict: Progress result dictionary like returned by route /progress.
+        """
+        url = f'{self.api_server}/stream_progress'
+        params = {
+            'client_session_auth_key': self.client_session_auth_key,
+            'key': self.api_key,
+            'job_id': job_id
+        }
+        self.setup_sync_session()
+        with self.__send_sync(self.sync_session.get, url, params=params, headers={'Accept': 'text/event-stream'}, stream=True, measure_latency=False) as response:
+            content_type = response.headers.get('Content-Type', '').split(';')[0].strip()
+            if not self.__check_progress_stream_support(response.status_code, content_type):
+                return
+            parser = ServerSentEventParser(self.json_codec)
+            for chunk in response.iter_content(chunk_size=None):
+                for progress_result in parser.feed(chunk):
+                    yield progress_result
+
+
+    def __check_progress_stream_support(self, status, content_type):
+        """Check the response of route /stream_progress. The route is marked as not supported by the API server for status 404
+        or 405 or a response without event stream, other errors are seen as temporary.
+
+        Args:
+            status (int): Status code of the response.
+            content_type (str): Content type of the response without parameters.
+
+        Returns:
+            bool: Whether the response is an event stream.
+        """
+        if status in (404, 405) or (status == 200 and content_type != 'text/event-stream'):
+            self.progress_stream_supported = False
+        elif status == 200:
+            self.progress_stream_supported = True
+        return status == 200 and content_type == 'text/event-stream'
+
 
     def __process_progress_result(self, progress_result):
         """Format received progress results depending on job state and self.output_format.
@@ -709,7 +1657,7 @@ class ModelAPI():
                 progress_info['job_state'] = job_state
                 progress_info['progress'] = 100
             else:
-                progress = progress_result.get('progress', {})
+                progress = progress_result.get('progress') or {}
                 progress_info['progress'] = progress.get('progress')
                 progress_info['queue_position'] = progress.get('queue_position')
                 progress_info['estimate'] = progress.get('estimate')
@@ -731,10 +1679,12 @@ class ModelAPI():
         url,
         params,
         error_callback=None,
-        do_post=True
+        do_post=True,
+        relogin=True
         ):
         """
         Perform an asynchronous HTTP request to the API server. Python objects and byte string params will be converted automatically to base64 string.
+        File paths, file objects and mmap objects are streamed as base64 strings in a chunked request body.
         Base64 strings containing in the result will be converted to self.output_format='base64'.
 
         Args:
@@ -743,6 +1693,8 @@ class ModelAPI():
             error_callback (callable or coroutine, optional): Callback function or coroutine with argument error_description (str) for catching 
                 errors. Accepts synchronous functions and asynchrouns couroutines. Defaults to None.
             do_post (bool, optional): Whether to use a POST request. Defaults to True.
+            relogin (bool, optional): Login again and repeat the request once if the client session authentication key is rejected
+                and auto_relogin is enabled. Defaults to True.
 
         Returns:
             dict: The result from the API worker via API server.
@@ -768,35 +1720,58 @@ class ModelAPI():
                 }
         """
         params = self.__convert_object_or_byte_string_params_to_base64(params)
-        try:       
-            method = self.session.post if do_post else self.session.get
-            request_params = {'json': params} if do_post else {'params': params}
-
-            async with method(url, **request_params) as response:
-                response_json = await response.json()
-                if response.status == 200:
-                    return response_json
+        replayable = self.__is_replayable(params)
+        for attempt in itertools.count():
+            if do_post and self.rate_limiter:
+                await self.rate_limiter.acquire_async((self.api_server, self.endpoint_name, self.api_key))
+            try:       
+                method = self.session.post if do_post else self.session.get
+                if do_post and has_streamed_inputs(params):
+                    request_params = {'data': aiter_json_body(params, self.json_codec), 'headers': {'Content-Type': 'application/json'}}
+                elif do_post:
+                    request_params = {'data': self.json_codec.dumps(params), 'headers': {'Content-Type': 'application/json'}}
                 else:
-                    return await self.__error_handler_async(response, 'API request', error_callback)
+                    request_params = {'params': params}
+
+                async with self.__send_async(method, url, **request_params, measure_latency=not params.get('wait_for_result')) as response:
+                    if response.status == 200:
+                        return await self.__read_response_json_async(response)
+                    elif relogin and self.__may_relogin(params) and self.__is_auth_key_rejected(await response.read()):
+                        break
+                    delay = self.__get_retry_delay(attempt, not do_post, response=response) if replayable else None
+                    if delay is None:
+                        return await self.__error_handler_async(response, 'API request', error_callback)
                         
-        except aiohttp.client_exceptions.ClientConnectorError as error:
-            return await self.__error_handler_async(error, 'API request', error_callback)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                delay = self.__get_retry_delay(
+                    attempt, not do_post, error=error, request_sent=not isinstance(error, aiohttp.ClientConnectorError)
+                ) if replayable else None
+                if delay is None:
+                    return await self.__error_handler_async(error, 'API request', error_callback)
+            await asyncio.sleep(delay)
+
+        params['client_session_auth_key'] = await self.__relogin_async(params['client_session_auth_key'])
+        return await self.__fetch_async(url, params, error_callback, do_post, relogin=False)
 
 
     def __fetch_sync(
         self,
         url,
         params,
-        do_post=True
+        do_post=True,
+        relogin=True
         ):
         """
         Perform a synchronous HTTP request to the API server. Python objects and byte string params will be converted automatically to base64 string.
+        File paths, file objects and mmap objects are streamed as base64 strings in a chunked request body.
         Base64 strings containing in the result will be converted back to python objects or to byte strings.
 
         Args:
             url (str): The URL for the HTTP request.
             params (dict): Parameters for the HTTP request.
             do_post (bool, optional): Whether to use a POST request. Defaults to True.
+            relogin (bool, optional): Login again and repeat the request once if the client session authentication key is rejected
+                and auto_relogin is enabled. Defaults to True.
 
         Returns:
             dict: The result from the API worker via API server.
@@ -822,20 +1797,329 @@ class ModelAPI():
                 }
         """
         params = self.__convert_object_or_byte_string_params_to_base64(params)
+        replayable = self.__is_replayable(params)
+        self.setup_sync_session()
+        for attempt in itertools.count():
+            if do_post and self.rate_limiter:
+                self.rate_limiter.acquire((self.api_server, self.endpoint_name, self.api_key))
+            try:
+                method = self.sync_session.post if do_post else self.sync_session.get
+                if do_post and has_streamed_inputs(params):
+                    request_params = {'data': iter_json_body(params, self.json_codec), 'headers': {'Content-Type': 'application/json'}}
+                elif do_post:
+                    request_params = {'data': self.json_codec.dumps(params), 'headers': {'Content-Type': 'application/json'}}
+                else:
+                    request_params = {'params': params}
+
+                with self.__send_sync(
+                    method, url, **request_params, stream=self.payload_sink is not None, measure_latency=not params.get('wait_for_result')
+                    ) as response:
+                    if response.status_code == 200:
+                        return self.__read_response_json_sync(response)
+                    elif relogin and self.__may_relogin(params) and self.__is_auth_key_rejected(response.content):
+                        break
+                    delay = self.__get_retry_delay(attempt, not do_post, response=response) if replayable else None
+                    if delay is None:
+                        return self.__error_handler_sync(response, 'API request')
+      
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                delay = self.__get_retry_delay(
+                    attempt, not do_post, error=error, request_sent=not self.__is_unsent_request_error(error)
+                ) if replayable else None
+                if delay is None:
+                    return self.__error_handler_sync(error, 'API request')
+            time.sleep(delay)
+
+        params['client_session_auth_key'] = self.__relogin_sync(params['client_session_auth_key'])
+        return self.__fetch_sync(url, params, do_post, relogin=False)
+
+
+    def __fetch_catalog_entry_sync(self, url, params, validators, request_type, error_callback, field=None):
+        """Fetch an entry of the endpoint catalog with a conditional GET request.
+
+        Args:
+            url (str): The URL for the HTTP request.
+            params (dict): Query parameters.
+            validators (dict): Conditional request headers If-None-Match and If-Modified-Since.
+            request_type (str): Type of request for error descriptions.
+            error_callback (callable): Callback function with argument error_description (str) for catching errors.
+            field (str, optional): Field of the response to be cached instead of the whole response. Defaults to None.
+
+        Returns:
+            tuple: (status_code, value, etag, last_modified) as expected by EndpointCatalog.
+        """
+        self.setup_sync_session()
+        for attempt in itertools.count():
+            try:
+                response = self.__send_sync(self.sync_session.get, url=url, params=params, headers=validators)
+                if response.status_code == 200:
+                    response_json = self.json_codec.loads(response.content)
+                    value = response_json.get(field) if field else response_json
+                    return 200, value, response.headers.get('ETag'), response.headers.get('Last-Modified')
+                elif response.status_code == 304:
+                    return 304, None, None, None
+                delay = self.__get_retry_delay(attempt, True, response=response)
+                if delay is None:
+                    return response.status_code, self.__error_handler_sync(response, request_type, error_callback), None, None
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return None, self.__error_handler_sync(error, request_type, error_callback), None, None
+            time.sleep(delay)
+
+
+    async def __fetch_catalog_entry_async(self, url, params, validators, request_type, error_callback, field=None):
+        """Fetch an entry of the endpoint catalog with an asynchronous conditional GET request.
+
+        Args:
+            url (str): The URL for the HTTP request.
+            params (dict): Query parameters.
+            validators (dict): Conditional request headers If-None-Match and If-Modified-Since.
+            request_type (str): Type of request for error descriptions.
+            error_callback (callable or coroutine): Callback function or coroutine with argument error_description (str) for catching errors.
+            field (str, optional): Field of the response to be cached instead of the whole response. Defaults to None.
+
+        Returns:
+            tuple: (status_code, value, etag, last_modified) as expected by EndpointCatalog.
+        """
+        for attempt in itertools.count():
+            try:
+                async with self.__send_async(self.session.get, url=url, params=params, headers=validators) as response:
+                    if response.status == 200:
+                        response_json = self.json_codec.loads(await response.read())
+                        value = response_json.get(field) if field else response_json
+                        return 200, value, response.headers.get('ETag'), response.headers.get('Last-Modified')
+                    elif response.status == 304:
+                        return 304, None, None, None
+                    delay = self.__get_retry_delay(attempt, True, response=response)
+                    if delay is None:
+                        return response.status, await self.__error_handler_async(response, request_type, error_callback), None, None
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return None, await self.__error_handler_async(error, request_type, error_callback), None, None
+            await asyncio.sleep(delay)
+
+
+    def __get_auth_key_identity(self):
+        """Identity under which the client session authentication key is stored and logins are serialized.
+
+        Returns:
+            tuple: Tuple (api_server, endpoint_name, user).
+        """
+        return (self.api_server, self.endpoint_name, self.user)
+
+
+    @contextlib.asynccontextmanager
+    async def __send_async(self, method, *args, measure_latency=True, **kwargs):
+        """Send an asynchronous request, checked and rated by the circuit_breaker if given.
+
+        Args:
+            method (callable): Request method of the aiohttp session like self.session.get.
+            *args: Positional arguments of the request method.
+            measure_latency (bool, optional): Rate the duration of the request. Defaults to True.
+            **kwargs: Keyword arguments of the request method.
+
+        Raises:
+            CircuitOpenError: If the circuit of the API server is open.
+
+        Yields:
+            aiohttp.ClientResponse: Response of the request.
+        """
+        if not self.circuit_breaker:
+            async with method(*args, **kwargs) as response:
+                yield response
+            return
+        self.circuit_breaker.before_request()
+        started = time.monotonic()
+        recorded = False
         try:
-            method = requests.post if do_post else requests.get
-            request_params = {'json': params} if do_post else {'params': params}
+            async with method(*args, **kwargs) as response:
+                self.circuit_breaker.record(response.status >= 500, time.monotonic() - started if measure_latency else None)
+                recorded = True
+                yield response
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            if not recorded:
+                self.circuit_breaker.record(True)
+                recorded = True
+            raise
+        finally:
+            if not recorded:
+                self.circuit_breaker.release()
+
+
+    def __send_sync(self, method, *args, measure_latency=True, **kwargs):
+        """Send a synchronous request, checked and rated by the circuit_breaker if given.
 
-            response = method(url, **request_params)
-            
+        Args:
+            method (callable): Request method of the requests session like self.sync_session.get.
+            *args: Positional arguments of the request method.
+            measure_latency (bool, optional): Rate the duration of the request. Defaults to True.
+            **kwargs: Keyword arguments of the request method.
+
+        Raises:
+            CircuitOpenError: If the circuit of the API server is open.
+
+        Returns:
+            requests.Response: Response of the request.
+        """
+        if not self.circuit_breaker:
+            return method(*args, **kwargs)
+        self.circuit_breaker.before_request()
+        started = time.monotonic()
+        try:
+            response = method(*args, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.circuit_breaker.record(True)
+            raise
+        except BaseException:
+            self.circuit_breaker.release()
+            raise
+        self.circuit_breaker.record(response.status_code >= 500, time.monotonic() - started if measure_latency else None)
+        return response
+
+
+    def __get_retry_delay(self, attempt, idempotent, response=None, error=None, request_sent=True):
+        """Ask the retry_policy whether a failed request is repeated.
+
+        Args:
+            attempt (int): Number of the failed attempt, 0 for the first one.
+            idempotent (bool): Whether the request can be repeated without side effects. False for job submissions.
+            response (aiohttp.ClientResponse or requests.Response, optional): Response with error status. Defaults to None.
+            error (Exception, optional): Connection error or timeout of the request. Defaults to None.
+            request_sent (bool, optional): Whether the request may have reached the API server. Defaults to True.
+
+        Returns:
+            float: Wait in seconds before the next attempt, or None if the request is not repeated.
+        """
+        if not self.retry_policy:
+            return None
+        elif response is not None:
+            status_code = response.status if hasattr(response, 'status') else response.status_code
+            return self.retry_policy.get_retry_delay(attempt, idempotent, status_code=status_code, retry_after=response.headers.get('Retry-After'))
+        return self.retry_policy.get_retry_delay(attempt, idempotent, error=error, request_sent=request_sent)
+
+
+    @staticmethod
+    def __is_unsent_request_error(error):
+        """Check if a connection error of requests occurred before the request was sent, like a refused connection or a connect timeout.
+
+        Args:
+            error (requests.exceptions.RequestException): Connection error or timeout.
+
+        Returns:
+            bool: True if the API server can't have received the request.
+        """
+        if isinstance(error, requests.exceptions.ConnectTimeout):
+            return True
+        reason = getattr(error.args[0], 'reason', None) if error.args else None
+        return isinstance(reason, requests.packages.urllib3.exceptions.NewConnectionError)
+
+
+    @staticmethod
+    def __is_replayable(params):
+        """Check if the body of a request can be sent again.
+
+        Args:
+            params (dict): Converted parameters of the request.
+
+        Returns:
+            bool: False if params contain streamed inputs which can't be read again, like pipes.
+        """
+        return all(value.replayable for value in params.values() if isinstance(value, StreamedInput))
+
+
+    def __may_relogin(self, params):
+        """Check if a request rejected because of an unknown client session authentication key may be repeated after a new login.
+
+        Args:
+            params (dict): Converted parameters of the rejected request.
+
+        Returns:
+            bool: True if auto_relogin is enabled, the request contained a client session authentication key and its body can be sent again.
+        """
+        return bool(self.auto_relogin and params.get('client_session_auth_key') and self.__is_replayable(params))
+
+
+    def __is_auth_key_rejected(self, body):
+        """Check if an error response of the API server states that the client session authentication key is not registered.
+
+        Args:
+            body (bytes): Body of the error response.
+
+        Returns:
+            bool: True if the key was rejected.
+        """
+        try:
+            error = self.json_codec.loads(body).get('error')
+        except (ValueError, AttributeError):
+            return False
+        return isinstance(error, str) and AUTH_KEY_NOT_REGISTERED_ERROR in error
+
+
+    async def __relogin_async(self, rejected_auth_key):
+        """Replace a rejected client session authentication key. Concurrent callers wait for a single login. If another instance
+        already stored a new key in the auth_key_store, it is used without login.
 
-            if response.status_code == 200:
-                return response.json()
+        Args:
+            rejected_auth_key (str): Client session authentication key rejected by the API server.
+
+        Returns:
+            str: New client session authentication key.
+        """
+        identity = self.__get_auth_key_identity()
+        async with hold_login_lock_async(identity, self.auth_key_store):
+            if self.auth_key_store:
+                await self.auth_key_store.invalidate_async(identity, rejected_auth_key)
+                auth_key = await self.auth_key_store.get_async(identity)
             else:
-                return self.__error_handler_sync(response, 'API request')
-      
-        except requests.exceptions.ConnectionError as error:
-            return self.__error_handler_sync(error, 'API request')
+                auth_key = self.__get_replacement_auth_key(identity, rejected_auth_key)
+            if not auth_key:
+                auth_key = await self.__fetch_auth_key_async(self.user, self.api_key, None)
+                if self.auth_key_store:
+                    await self.auth_key_store.set_async(identity, auth_key)
+            self.client_session_auth_key = auth_key
+        return auth_key
+
+
+    def __relogin_sync(self, rejected_auth_key):
+        """Replace a rejected client session authentication key. Concurrent threads wait for a single login. If another instance
+        already stored a new key in the auth_key_store, it is used without login.
+
+        Args:
+            rejected_auth_key (str): Client session authentication key rejected by the API server.
+
+        Returns:
+            str: New client session authentication key.
+        """
+        identity = self.__get_auth_key_identity()
+        with hold_login_lock(identity, self.auth_key_store):
+            auth_key = self.__get_replacement_auth_key(identity, rejected_auth_key)
+            if not auth_key:
+                auth_key = self.__fetch_auth_key(self.user, self.api_key)
+                if self.auth_key_store:
+                    self.auth_key_store.set(identity, auth_key)
+            self.client_session_auth_key = auth_key
+        return auth_key
+
+
+    def __get_replacement_auth_key(self, identity, rejected_auth_key):
+        """Get a key obtained by a concurrent login after given key was rejected.
+
+        Args:
+            identity (tuple): Tuple (api_server, endpoint_name, user).
+            rejected_auth_key (str): Client session authentication key rejected by the API server.
+
+        Returns:
+            str: Newer client session authentication key or None if a login is needed.
+        """
+        if self.auth_key_store:
+            self.auth_key_store.invalidate(identity, rejected_auth_key)
+            return self.auth_key_store.get(identity)
+        elif self.client_session_auth_key != rejected_auth_key:
+            return self.client_session_auth_key
 
 
     async def __fetch_auth_key_async(self, user, api_key, error_callback):
@@ -852,16 +2136,24 @@ class ModelAPI():
         """
         url = f'{self.api_server}/{self.endpoint_name}/login'
         params = {'version': ModelAPI.get_version(), 'user': user, 'key': api_key}
-        try:
-            async with self.session.get(url=url, params=params) as response:
-                response_json = await response.json()
-                if response.status == 200 and response_json.get('success'):
-                    return response_json.get('client_session_auth_key')
-                else:
-                    return await self.__error_handler_async(response, 'login', error_callback)
+        for attempt in itertools.count():
+            try:
+                async with self.__send_async(self.session.get, url=url, params=params) as response:
+                    if response.status == 200:
+                        response_json = self.json_codec.loads(await response.read())
+                        if response_json.get('success'):
+                            return response_json.get('client_session_auth_key')
+                        delay = None
+                    else:
+                        delay = self.__get_retry_delay(attempt, True, response=response)
+                    if delay is None:
+                        return await self.__error_handler_async(response, 'login', error_callback)
 
-        except aiohttp.client_exceptions.ClientConnectorError as error:
-            return await self.__error_handler_async(error, 'login', error_callback)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return await self.__error_handler_async(error, 'login', error_callback)
+            await asyncio.sleep(delay)
 
 
     def __fetch_auth_key(self, user, api_key):
@@ -873,16 +2165,25 @@ class ModelAPI():
         """
         url = f'{self.api_server}/{self.endpoint_name}/login'
         params = {'version': ModelAPI.get_version(), 'user': user, 'key': api_key}
-        try:
-            response = requests.get(url=url, params=params)
-
-            if response.status_code == 200 and response.json().get('success'):
-                return response.json().get('client_session_auth_key')
-            else:
-                return self.__error_handler_sync(response, 'login', None)
+        self.setup_sync_session()
+        for attempt in itertools.count():
+            try:
+                response = self.__send_sync(self.sync_session.get, url=url, params=params)
+                if response.status_code == 200:
+                    response_json = self.json_codec.loads(response.content)
+                    if response_json.get('success'):
+                        return response_json.get('client_session_auth_key')
+                    delay = None
+                else:
+                    delay = self.__get_retry_delay(attempt, True, response=response)
+                if delay is None:
+                    return self.__error_handler_sync(response, 'login', None)
 
-        except requests.exceptions.ConnectionError as error:
-            return self.__error_handler_sync(error, 'login', None)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return self.__error_handler_sync(error, 'login', None)
+            time.sleep(delay)
 
 
     async def __fetch_progress_async(self, job_id, progress_error_callback=None):
@@ -962,32 +2263,57 @@ class ModelAPI():
                     'success': True
                 }
         """
-        counter = 0
-        while True:
-            counter += 1
+        url = f'{self.api_server}/{self.endpoint_name}/progress'
+        params = {
+            'key': self.api_key, 
+            'job_id': job_id
+        }
+        for attempt in itertools.count():
             try:
-                url = f'{self.api_server}/{self.endpoint_name}/progress'
-                params = {
-                    'key': self.api_key, 
-                    'job_id': job_id
-                }
-                async with self.session.get(url, params=params) as response:
-                    response_json = await response.json()
+                async with self.__send_async(self.session.get, url, params=params) as response:
                     if response.status == 200:
-                        return response_json
-                    else:
-                        if counter > 3:
-                            return await self.__error_handler_async(response, 'progress', progress_error_callback)
-                        else:
-                            await asyncio.sleep(1)
-                            continue
-
-            except aiohttp.client_exceptions.ClientConnectionError as error:
-                if counter > 3:
+                        return await self.__read_response_json_async(response, is_job_result_payload)
+                    delay = self.__get_retry_delay(attempt, True, response=response)
+                    if delay is None:
+                        return await self.__error_handler_async(response, 'progress', progress_error_callback)
+
+            except (aiohttp.ClientError, asyncio.TimeoutError) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
                     return await self.__error_handler_async(error, 'progress', progress_error_callback)
-                else:
-                    await asyncio.sleep(1)
-                    continue
+            await asyncio.sleep(delay)
+
+
+    async def __fetch_batch_progress_async(self, job_ids):
+        """
+        Fetch progress data of many running jobs with a single request to the route /progress_batch.
+
+        Args:
+            job_ids (list): Job ids of running jobs.
+
+        Raises:
+            aiohttp.ClientError: If the connection to the API server failed.
+            ConnectionError: If the API server answered with an error status other than 404 or 405, e.g. a transient 503.
+
+        Returns:
+            dict: Dictionary {job_id: progress_result} or None if the API server doesn't support batched progress requests,
+                answering with status 404 or 405 or without the key 'progress_results'.
+        """
+        url = f'{self.api_server}/{self.endpoint_name}/progress_batch'
+        params = {
+            'key': self.api_key,
+            'job_ids': job_ids
+        }
+        async with self.__send_async(self.session.post, url, data=self.json_codec.dumps(params), headers={'Content-Type': 'application/json'}) as response:
+            if response.status in (404, 405):
+                return None
+            elif response.status != 200:
+                raise ConnectionError(f'Batched progress request at {self.api_server} failed with status code {response.status}')
+            response_json = self.json_codec.loads(await response.read())
+        progress_results = response_json.get('progress_results')
+        if isinstance(progress_results, list):
+            return {progress_result.get('job_id'): progress_result for progress_result in progress_results}
+        return None
 
 
     def __fetch_progress_sync(self, job_id, progress_error_callback=None):
@@ -1069,20 +2395,89 @@ class ModelAPI():
                     'success': True
                 }
         """
-        try:
-            url = f'{self.api_server}/{self.endpoint_name}/progress'
-            params = {
-                'key': self.api_key, 
-                'job_id':job_id
-            }
-            response = requests.get(url, params=params)
-            if response.status_code == 200:
-                return response.json()
-            else:
-                return self.__error_handler_sync(response, 'progress', progress_error_callback)
+        url = f'{self.api_server}/{self.endpoint_name}/progress'
+        params = {
+            'key': self.api_key, 
+            'job_id':job_id
+        }
+        self.setup_sync_session()
+        for attempt in itertools.count():
+            try:
+                with self.__send_sync(self.sync_session.get, url, params=params, stream=self.payload_sink is not None) as response:
+                    if response.status_code == 200:
+                        return self.__read_response_json_sync(response, is_job_result_payload)
+                    delay = self.__get_retry_delay(attempt, True, response=response)
+                    if delay is None:
+                        return self.__error_handler_sync(response, 'progress', progress_error_callback)
+
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as error:
+                delay = self.__get_retry_delay(attempt, True, error=error)
+                if delay is None:
+                    return self.__error_handler_sync(error, 'progress', progress_error_callback)
+            time.sleep(delay)
+
+
+    async def __cancel_abandoned_job_async(self, job_id):
+        """Best-effort cancellation of a job nobody waits for anymore. Errors are ignored and the request is given up after
+        DEFAULT_CANCEL_TIMEOUT seconds.
+
+        Args:
+            job_id (str): Job id of the abandoned job.
+        """
+        if self.cancel_abandoned_jobs:
+            try:
+                await asyncio.wait_for(self.cancel_job_async(job_id), DEFAULT_CANCEL_TIMEOUT)
+            except Exception:
+                pass
+
+
+    def __cancel_abandoned_job_sync(self, job_id):
+        """Best-effort cancellation of a job nobody waits for anymore. Errors are ignored.
+
+        Args:
+            job_id (str): Job id of the abandoned job.
+        """
+        if self.cancel_abandoned_jobs:
+            try:
+                self.cancel_job(job_id)
+            except Exception:
+                pass
+
+
+    async def __read_response_json_async(self, response, payload_filter=None):
+        """Read the JSON body of a successful response. With payload_sink given, the body is parsed incrementally while it arrives
+        and base64 data URI fields are handed to the sink instead of being kept in memory.
 
-        except requests.exceptions.ConnectionError as error:
-            return self.__error_handler_sync(error, 'progress', progress_error_callback)
+        Args:
+            response (aiohttp.ClientResponse): Response of the API server.
+            payload_filter (callable, optional): Filter of the payloads handed to the sink like is_job_result_payload() for
+                progress responses. Defaults to None.
+
+        Returns:
+            dict: Response dictionary.
+        """
+        if self.payload_sink:
+            return await parse_json_chunks_async(
+                response.content.iter_chunked(DEFAULT_RESPONSE_CHUNK_SIZE), self.payload_sink, self.json_codec, payload_filter
+            )
+        return self.json_codec.loads(await response.read())
+
+
+    def __read_response_json_sync(self, response, payload_filter=None):
+        """Read the JSON body of a successful response. With payload_sink given, the body is parsed incrementally while it arrives
+        and base64 data URI fields are handed to the sink instead of being kept in memory.
+
+        Args:
+            response (requests.Response): Response of the API server, requested with stream=True if payload_sink is given.
+            payload_filter (callable, optional): Filter of the payloads handed to the sink like is_job_result_payload() for
+                progress responses. Defaults to None.
+
+        Returns:
+            dict: Response dictionary.
+        """
+        if self.payload_sink:
+            return parse_json_chunks(response.iter_content(DEFAULT_RESPONSE_CHUNK_SIZE), self.payload_sink, self.json_codec, payload_filter)
+        return self.json_codec.loads(response.content)
 
 
     async def __error_handler_async(
@@ -1109,14 +2504,14 @@ class ModelAPI():
         if self.session and not self.session.close:
             await self.session.close()
         status_code = response.status if hasattr(response, 'status') else None
-        response_json = await response.json() if status_code else None
+        response_json = self.json_codec.loads(await response.read()) if status_code else None
             
         error_description = self.__make_error_description(status_code, response_json, request_type)
         
         if error_callback:
             await if_async_else_run(error_callback, response_json)
             return response_json
-        elif response_json and response_json.get('error') and 'Client session authentication key not registered in API Server' in response_json.get('error'):
+        elif response_json and response_json.get('error') and AUTH_KEY_NOT_REGISTERED_ERROR in response_json.get('error'):
             raise ConnectionRefusedError('Login failed! You first need to run do_login() to login to the API server!\n'+error_description)
         elif request_type == 'progress':
             raise BrokenPipeError(
@@ -1152,9 +2547,9 @@ class ModelAPI():
         if status_code == 404:
             error_response = response.text
         elif status_code == 401:
-            error_response = response.json().get('error')
+            error_response = self.json_codec.loads(response.content).get('error')
         elif status_code is not None:
-            error_response = str(response.json())
+            error_response = str(self.json_codec.loads(response.content))
         else:
             error_response = None
 
@@ -1163,7 +2558,7 @@ class ModelAPI():
         if error_callback:
             error_callback(error_response)
             return error_response
-        elif error_response and 'Client session authentication key not registered in API Server' in error_response:
+        elif error_response and AUTH_KEY_NOT_REGISTERED_ERROR in error_response:
             raise ConnectionRefusedError('Login failed! You first need to run do_login() to login to the API server!\n'+error_description)
         elif request_type == 'progress':
             raise BrokenPipeError('Lost connection while receiving progress. To catch this error, use progress_error_callback')
@@ -1207,7 +2602,7 @@ class ModelAPI():
             for key, value in params.items():
                 if isinstance(value, list):
                     value = [self.__convert_base64_to_desired_format(base64_string) for base64_string in value]
-                elif isinstance(value, str):
+                elif isinstance(value, str) and value.startswith('data:'):
                     value = self.__convert_base64_to_desired_format(value)
                     
                 params_converted[key] = value
@@ -1216,25 +2611,62 @@ class ModelAPI():
 
 
     def __convert_base64_to_desired_format(self, value):
-        """Convert given base64 string to byte-string if outputformat == byte-string.
+        """Convert given base64 data URI string to byte-string if output_format == 'byte_string' or wrap it in a LazyPayload if
+        output_format == 'lazy'. The data URI is recognized by its header 'data:<mime_type>;base64,' and its payload is decoded at most once.
 
         Args:
             value (str): Base64 string to be converted
 
         Returns:
-            str, bytes or object: Base64 string bytes string or python object, depending on self.output_format.
+            str, bytes or LazyPayload: Base64 string, bytes string or LazyPayload, depending on self.output_format.
+                Final results with output_format == 'file' are written to files afterwards by the MediaWriter, so the base64 string is kept.
         """
-        if ModelAPI.check_if_valid_base64_string(value):
-            if self.output_format == 'byte_string':
-                return base64.b64decode(value.split(',')[1].encode('utf-8'))
-            else:
-                return value
-        else:
-            return value
+        if self.output_format == 'byte_string':
+            payload_start = get_data_uri_payload_start(value)
+            if payload_start:
+                try:
+                    return base64.b64decode(value[payload_start:], validate=True)
+                except (base64.binascii.Error, ValueError):
+                    return value
+        elif self.output_format == 'lazy':
+            payload_start = get_data_uri_payload_start(value)
+            if payload_start:
+                return LazyPayload(value, payload_start)
+        return value
+
+
+    async def __write_output_files_async(self, result):
+        """Write the images and audio of a final result to files in the thread pool of the MediaWriter if output_format == 'file'.
+
+        Args:
+            result (dict): Result dictionary.
+
+        Returns:
+            dict: Result with data URIs replaced by file infos, or result unchanged if output_format != 'file'.
+        """
+        if self.media_writer:
+            return await self.media_writer.write_result_async(result)
+        return result
+
+
+    def __write_output_files_sync(self, result):
+        """Write the images and audio of a final result to files in the thread pool of the MediaWriter if output_format == 'file'.
+
+        Args:
+            result (dict): Result dictionary.
+
+        Returns:
+            dict: Result with data URIs replaced by file infos, or result unchanged if output_format != 'file'.
+        """
+        if self.media_writer:
+            return self.media_writer.write_result(result)
+        return result
+
 
     def __convert_object_or_byte_string_params_to_base64(self, params):
         """
-        Convert byte string data parameters to base64 encoding in a dictionary.
+        Convert byte string data parameters to base64 encoding in a dictionary. File paths given as pathlib.Path, binary file objects
+        and mmap objects are wrapped in StreamedInput to be base64 encoded chunk by chunk while the request body is sent.
 
         Args:
             params (dict): Dictionary of parameters.
@@ -1250,36 +2682,11 @@ class ModelAPI():
                     if not data_format:
                         data_format = self.__get_data_format_from_byte_string(value)
                     params[key] = f'data:{self.output_type}/{data_format};base64,' + base64.b64encode(value).decode('utf-8')
+                elif is_streamable_input(value):
+                    params[key] = StreamedInput(value, f'data:{self.output_type}/{data_format};base64,')
         return params
 
 
-    def __do_progress_stream(self, result_callback, progress_callback):
-        """
-        Stream progress updates for running API request and handle progress events.
-        (Old untested implementation, functionality not guaranteed)
-
-        Args:
-            result_callback (callback): Callback function with job_result (dict) as argument to handle the API request result.
-            progress_callback (callback, optional): Callback function with arguments progress_info (dict) and progress_data (dict) for tracking progress. Defaults to None.
-        """
-        async def on_progress(event):
-            print('OnProgress:', event.data)
-            data = json.loads(event.data)
-            progress_info = {
-                'progress': data['progress'],
-                'queue_position': data['queue_position'],
-                'estimate': -1
-                            }
-            progress_callback(progress_info, data['progress_data'])
-            if data['job_state'] == "done":
-                await if_async_else_run(result_callback, data['job_result'])
-
-        event_source = self.session.ws_connect(
-            f'/stream_progress?client_session_auth_key={self.client_session_auth_key}'
-                                                        )
-        event_source.receive_json = on_progress
-
-
 async def do_api_request_async(
     api_server, 
     endpoint_name, 
@@ -1430,6 +2837,61 @@ async def do_api_request_async(
     return result
 
 
+async def do_api_requests_async(
+    api_server,
+    endpoint_name,
+    params_list,
+    user=None,
+    api_key=None,
+    max_in_flight=DEFAULT_MAX_IN_FLIGHT,
+    result_callback=None,
+    progress_callback=None,
+    session=None
+    ):
+    """
+    A simplified interface for making many asynchronous API requests with bounded concurrency and do_api_login included.
+
+    Args:
+        api_server (str): The address of the API server
+        endpoint_name (str): The name of the API endpoint
+        params_list (iterable of dict): Parameter dictionaries, one for each API request
+        user (str): The name of the user
+        api_key (str): The user related api key
+        max_in_flight (int, optional): Maximum number of concurrently running jobs. Defaults to DEFAULT_MAX_IN_FLIGHT.
+        result_callback (callback, optional): Callback function with arguments index (int) and result (dict or Exception)
+            called as soon as a job finished. Defaults to None.
+        progress_callback (callback, optional): Callback function with arguments progress_info (dict)
+            and progress_data (dict) for tracking progress. Defaults to None.
+        session (aiohttp.ClientSession): Give existing session to ModelApi API to make requests in given session. Defaults to None.
+
+    Returns:
+        list: Job result dictionaries in the order of params_list. Failed requests hold the raised exception instead.
+
+    Examples:
+
+        Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            import asyncio
+
+            params_list = [{'prompt': prompt} for prompt in prompts]
+            results = asyncio.run(do_api_requests_async('https://api.aime.info', 'flux-dev', params_list, 'user_name', 'api_key', max_in_flight=8))
+    """
+    model_api = ModelAPI(api_server, endpoint_name, user, api_key, session)
+    try:
+        await model_api.do_api_login_async()
+        return await model_api.do_api_requests_async(
+            params_list,
+            max_in_flight,
+            result_callback,
+            progress_callback
+        )
+    finally:
+        await model_api.close_session()
+
+
 def do_api_request(
     api_server, 
     endpoint_name,
@@ -1540,9 +3002,9 @@ def do_api_request(
                 'success': True
             }
     """ 
-    model_api = ModelAPI(api_server, endpoint_name, user, api_key)
-    client_session_auth_key = model_api.do_api_login()
-    return model_api.do_api_request(params, progress_callback, progress_error_callback)
+    with ModelAPI(api_server, endpoint_name, user, api_key) as model_api:
+        client_session_auth_key = model_api.do_api_login()
+        return model_api.do_api_request(params, progress_callback, progress_error_callback)
     
     
 async def if_async_else_run(callback, *args):    
@@ -0,0 +1,207 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import math
+
+
+class ParamValidator():
+    """
+    Validator of request params, compiled once from the input specification of an endpoint as returned by get_endpoint_details().
+
+    Each input spec like {'type': 'integer', 'default': 20, 'minimum': 1, 'maximum': 50} is turned into a tuple of check functions
+    when the validator is created, so validating a request only runs the checks that apply and costs microseconds.
+    validate() fills in defaults, coerces the values to the specified type and rejects missing required params, values out of range
+    and values not in the allowed values. Params without spec are passed on unchanged.
+
+    Supported spec keys:
+        - type (str): 'string', 'integer', 'float', 'bool' or 'selection'. Other types like 'image' or 'audio' are not coerced.
+        - required (bool): Reject requests without this param.
+        - default: Value filled in if the param is missing or None.
+        - minimum / min, maximum / max: Allowed range of numbers.
+        - min_length, max_length: Allowed length of strings.
+        - supported / allowed_values / enum (list): Allowed values, e.g. of voice or language selections.
+
+    Args:
+        inputs (dict): Input specification {param_name: spec} of the endpoint.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            validator = ParamValidator({'steps': {'type': 'integer', 'default': 20, 'minimum': 1, 'maximum': 50}})
+            validator.validate({'steps': '30'})  # {'steps': 30}
+            validator.validate({})  # {'steps': 20}
+            validator.validate({'steps': 100})  # ValueError
+    """
+
+    def __init__(self, inputs):
+        self.inputs = inputs or dict()
+        self.__params = tuple(
+            (name, bool(spec.get('required')), spec.get('default'), self.__compile_checks(spec))
+            for name, spec in self.inputs.items() if isinstance(spec, dict)
+        )
+
+
+    @classmethod
+    def from_endpoint_details(cls, endpoint_details):
+        """Create the validator of an endpoint from its details.
+
+        Args:
+            endpoint_details (dict): Endpoint details returned by get_endpoint_details(). Details without 'inputs', e.g. of a failed request
+                caught by an error callback, give a validator accepting all params.
+
+        Returns:
+            ParamValidator: Compiled validator.
+        """
+        return cls(endpoint_details.get('inputs') if isinstance(endpoint_details, dict) else None)
+
+
+    def validate(self, params):
+        """Check the params of a request, fill in defaults and coerce the values to the specified types.
+
+        Args:
+            params (dict): Parameters of the API request.
+
+        Raises:
+            ValueError: If params are invalid, describing all invalid params.
+
+        Returns:
+            dict: Validated copy of params.
+        """
+        validated = dict(params)
+        errors = None
+        for name, required, default, checks in self.__params:
+            value = validated.get(name)
+            if value is None:
+                if default is not None:
+                    validated[name] = default
+                elif required:
+                    errors = (errors or list()) + [f'Missing required parameter {name!r}']
+                continue
+            try:
+                for check in checks:
+                    value = check(value)
+                validated[name] = value
+            except (TypeError, ValueError) as error:
+                errors = (errors or list()) + [f'Invalid parameter {name!r}: {error}']
+        if errors:
+            raise ValueError('; '.join(errors))
+        return validated
+
+
+    @staticmethod
+    def __compile_checks(spec):
+        """Compile the checks of an input spec, leaving out everything the spec doesn't specify.
+
+        Args:
+            spec (dict): Input spec of a parameter.
+
+        Returns:
+            tuple: Check functions with argument value returning the coerced value or raising TypeError or ValueError.
+        """
+        checks = list()
+        coerce = TYPE_COERCERS.get(str(spec.get('type', '')).lower())
+        if coerce:
+            checks.append(coerce)
+
+        minimum = spec.get('minimum', spec.get('min'))
+        if minimum is not None:
+            def check_minimum(value):
+                if value < minimum:
+                    raise ValueError(f'{value!r} is smaller than minimum {minimum!r}')
+                return value
+            checks.append(check_minimum)
+
+        maximum = spec.get('maximum', spec.get('max'))
+        if maximum is not None:
+            def check_maximum(value):
+                if value > maximum:
+                    raise ValueError(f'{value!r} is greater than maximum {maximum!r}')
+                return value
+            checks.append(check_maximum)
+
+        min_length = spec.get('min_length')
+        if min_length is not None:
+            def check_min_length(value):
+                if len(value) < min_length:
+                    raise ValueError(f'length {len(value)} is smaller than min_length {min_length}')
+                return value
+            checks.append(check_min_length)
+
+        max_length = spec.get('max_length')
+        if max_length is not None:
+            def check_max_length(value):
+                if len(value) > max_length:
+                    raise ValueError(f'length {len(value)} is greater than max_length {max_length}')
+                return value
+            checks.append(check_max_length)
+
+        allowed_values = spec.get('supported', spec.get('allowed_values', spec.get('enum')))
+        if isinstance(allowed_values, (list, tuple)) and allowed_values:
+            try:
+                allowed_values = frozenset(allowed_values)
+            except TypeError:
+                allowed_values = tuple(allowed_values)
+            def check_allowed_values(value):
+                if value not in allowed_values:
+                    raise ValueError(f'{value!r} is not one of {sorted(map(str, allowed_values))}')
+                return value
+            checks.append(check_allowed_values)
+
+        return tuple(checks)
+
+
+def coerce_string(value):
+    if not isinstance(value, str):
+        raise TypeError(f'expected string, got {type(value).__name__}')
+    return value
+
+
+def coerce_integer(value):
+    if isinstance(value, bool):
+        raise TypeError('expected integer, got bool')
+    elif isinstance(value, int):
+        return value
+    elif isinstance(value, float) and value.is_integer():
+        return int(value)
+    elif isinstance(value, str):
+        return int(value.strip())
+    raise TypeError(f'expected integer, got {type(value).__name__}')
+
+
+def coerce_float(value):
+    if isinstance(value, bool):
+        raise TypeError('expected float, got bool')
+    elif isinstance(value, (int, float, str)):
+        value = float(value)
+        if math.isfinite(value):
+            return value
+        raise ValueError(f'{value!r} is not a finite number')
+    raise TypeError(f'expected float, got {type(value).__name__}')
+
+
+def coerce_bool(value):
+    if isinstance(value, bool):
+        return value
+    elif isinstance(value, int) and value in (0, 1):
+        return bool(value)
+    elif isinstance(value, str) and value.strip().lower() in BOOL_STRINGS:
+        return BOOL_STRINGS[value.strip().lower()]
+    raise TypeError(f'expected bool, got {value!r}')
+
+
+BOOL_STRINGS = {'true': True, 'false': False, '1': True, '0': False, 'yes': True, 'no': False}
+
+TYPE_COERCERS = {
+    'string': coerce_string,
+    'str': coerce_string,
+    'text': coerce_string,
+    'integer': coerce_integer,
+    'int': coerce_integer,
+    'float': coerce_float,
+    'number': coerce_float,
+    'bool': coerce_bool,
+    'boolean': coerce_bool,
+}
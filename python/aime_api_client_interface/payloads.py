@@ -0,0 +1,253 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import base64
+import mmap
+from os import PathLike
+from pathlib import Path
+
+from .json_codec import default_json_codec
+
+
+MAX_DATA_URI_HEADER_LENGTH = 256
+DEFAULT_UPLOAD_CHUNK_SIZE = 3 * 2**18
+
+
+def get_data_uri_payload_start(value):
+    """Recognize a base64 data URI like 'data:image/PNG;base64,iVBOR...' by its header without touching the payload.
+
+    Args:
+        value (str): String to be checked.
+
+    Returns:
+        int: Index of the first payload character or None if value is no base64 data URI.
+    """
+    if isinstance(value, str) and value.startswith('data:'):
+        separator = value.find(',', 5, MAX_DATA_URI_HEADER_LENGTH)
+        if separator > 0 and value.endswith(';base64', 5, separator):
+            return separator + 1
+
+
+class LazyPayload():
+    """
+    Binary field of a result or progress dictionary like an image or audio, returned for output_format='lazy'.
+    Mime type and size are available without decoding, the base64 payload is decoded on first access and cached.
+
+    Args:
+        data_uri (str): Base64 data URI like 'data:image/PNG;base64,iVBOR...'.
+        payload_start (int, optional): Index of the first payload character. Detected from data_uri if None. Defaults to None.
+
+    Attributes:
+        mime_type (str): Mime type given in the data URI header like 'image/PNG' or 'audio/wav'.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            model_api = ModelAPI('https://api.aime.info', 'flux-dev', output_format='lazy')
+            ...
+            for image in result['images']:
+                print(image.mime_type, image.size_hint)
+                image.save(f'image.{image.mime_type.split("/")[-1].lower()}')
+    """
+
+    def __init__(self, data_uri, payload_start=None):
+        self.data_uri = data_uri
+        self.payload_start = payload_start or get_data_uri_payload_start(data_uri)
+        if not self.payload_start:
+            raise ValueError('Given string is no base64 data URI')
+        self.mime_type = data_uri[5:self.payload_start - len(';base64,')]
+        self.__decoded = None
+
+
+    @property
+    def size_hint(self):
+        """Size of the decoded payload in bytes, calculated from the base64 length without decoding.
+
+        Returns:
+            int: Decoded size in bytes.
+        """
+        if self.__decoded is not None:
+            return len(self.__decoded)
+        padding = 2 if self.data_uri.endswith('==') else 1 if self.data_uri.endswith('=') else 0
+        return (len(self.data_uri) - self.payload_start) * 3 // 4 - padding
+
+
+    def bytes(self):
+        """Decoded payload. Decoded on first call, cached afterwards.
+
+        Raises:
+            binascii.Error: If the payload is no valid base64.
+
+        Returns:
+            bytes: Decoded payload.
+        """
+        if self.__decoded is None:
+            self.__decoded = base64.b64decode(self.data_uri[self.payload_start:], validate=True)
+        return self.__decoded
+
+
+    def base64(self):
+        """The complete base64 data URI as received from the API server, like with output_format='base64'.
+
+        Returns:
+            str: Base64 data URI.
+        """
+        return self.data_uri
+
+
+    def save(self, path):
+        """Write the decoded payload to a file.
+
+        Args:
+            path (str or pathlib.Path): Destination file path.
+
+        Returns:
+            pathlib.Path: Path of the written file.
+        """
+        path = Path(path)
+        path.write_bytes(self.bytes())
+        return path
+
+
+    def __repr__(self):
+        return f'LazyPayload(mime_type={self.mime_type!r}, size_hint={self.size_hint})'
+
+
+def is_streamable_input(value):
+    """Check if given parameter value is a binary input to be streamed instead of being encoded in memory.
+
+    Args:
+        value: Parameter value.
+
+    Returns:
+        bool: True for file paths given as pathlib.Path, file objects opened in binary mode and mmap objects.
+    """
+    return isinstance(value, (PathLike, mmap.mmap)) or (hasattr(value, 'read') and not isinstance(value, (str, bytes)))
+
+
+class StreamedInput():
+    """
+    Binary input parameter sent as base64 data URI, encoded chunk by chunk while the request body is transmitted.
+
+    Args:
+        source (pathlib.Path, file object or mmap.mmap): The binary input data. File objects are read from their current position.
+        header (str): Data URI header like 'data:image/JPEG;base64,'.
+        chunk_size (int, optional): Number of bytes read and encoded at once. Rounded down to a multiple of 3. Defaults to DEFAULT_UPLOAD_CHUNK_SIZE.
+    """
+
+    def __init__(self, source, header, chunk_size=DEFAULT_UPLOAD_CHUNK_SIZE):
+        self.source = source
+        self.header = header
+        self.chunk_size = max(3, chunk_size - chunk_size % 3)
+
+
+    @property
+    def replayable(self):
+        """Whether the input can be sent again, e.g. to repeat a request after a new login. File objects are consumed when sent.
+
+        Returns:
+            bool: True for file paths and mmap objects.
+        """
+        return isinstance(self.source, (PathLike, mmap.mmap))
+
+
+    def iter_base64_chunks(self):
+        """Read the source and yield its base64 encoding in chunks. The concatenated chunks equal the base64 encoding of the whole source.
+
+        Yields:
+            bytes: Base64 encoded chunk.
+        """
+        if isinstance(self.source, mmap.mmap):
+            source_view = memoryview(self.source)
+            try:
+                for position in range(0, len(source_view), self.chunk_size):
+                    yield base64.b64encode(source_view[position:position + self.chunk_size])
+            finally:
+                source_view.release()
+        elif isinstance(self.source, PathLike):
+            with open(self.source, 'rb') as file:
+                yield from self.__iter_file_base64_chunks(file)
+        else:
+            yield from self.__iter_file_base64_chunks(self.source)
+
+
+    def __iter_file_base64_chunks(self, file):
+        """Base64 encode the content of given file object in chunks of multiples of 3 bytes, so no padding occurs in between.
+
+        Args:
+            file (file object): Binary file object.
+
+        Yields:
+            bytes: Base64 encoded chunk.
+        """
+        remainder = b''
+        while True:
+            data = file.read(self.chunk_size)
+            if not data:
+                break
+            data = remainder + data if remainder else data
+            cut = len(data) - len(data) % 3
+            remainder = data[cut:]
+            if cut:
+                yield base64.b64encode(memoryview(data)[:cut])
+        if remainder:
+            yield base64.b64encode(remainder)
+
+
+def has_streamed_inputs(params):
+    """Check if given request parameters contain StreamedInput values.
+
+    Args:
+        params (dict): Request parameters.
+
+    Returns:
+        bool: True if at least one parameter is a StreamedInput.
+    """
+    return any(isinstance(value, StreamedInput) for value in params.values())
+
+
+def iter_json_body(params, json_codec=default_json_codec):
+    """Generate the JSON request body for given parameters in chunks. StreamedInput values are encoded to base64 data URI strings
+    chunk by chunk, so the complete base64 string never exists in memory.
+
+    Args:
+        params (dict): Request parameters.
+        json_codec (JSONCodec, optional): Codec encoding keys and all other values. Defaults to default_json_codec.
+
+    Yields:
+        bytes: Chunk of the JSON body.
+    """
+    yield b'{'
+    for index, (key, value) in enumerate(params.items()):
+        prefix = (b', ' if index else b'') + json_codec.dumps(str(key)) + b': '
+        if isinstance(value, StreamedInput):
+            yield prefix + b'"' + value.header.encode('utf-8')
+            yield from value.iter_base64_chunks()
+            yield b'"'
+        else:
+            yield prefix + json_codec.dumps(value)
+    yield b'}'
+
+
+async def aiter_json_body(params, json_codec=default_json_codec):
+    """Asynchronous version of iter_json_body(). Reading and encoding of the chunks is done in the default executor,
+    so file reads don't block the event loop.
+
+    Args:
+        params (dict): Request parameters.
+        json_codec (JSONCodec, optional): Codec encoding keys and all other values. Defaults to default_json_codec.
+
+    Yields:
+        bytes: Chunk of the JSON body.
+    """
+    loop = asyncio.get_running_loop()
+    chunks = iter_json_body(params, json_codec)
+    while True:
+        chunk = await loop.run_in_executor(None, next, chunks, None)
+        if chunk is None:
+            break
+        yield chunk
@@ -0,0 +1,202 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import random
+
+from .progress_policy import get_progress_interval
+
+
+DEFAULT_POLL_JITTER = 0.1
+
+
+class ProgressMultiplexer():
+    """
+    Single polling loop for all outstanding jobs of a ModelAPI instance.
+
+    Instead of running one polling loop per job, every job registers its job_id here and receives its progress results through
+    an asyncio.Queue. One scheduler task starts the polls of all jobs whose next poll is due, with a single batched progress request
+    if the API server supports it, or with one progress request per job otherwise. Each poll runs in its own task, so a slow or
+    retrying progress request doesn't delay the polls of the other jobs. A job is scheduled again when its poll is done. Without
+    batched progress requests the next poll time is randomized by poll_jitter, so jobs submitted together don't keep polling in bursts.
+
+    Args:
+        fetch_progress (coroutine): Coroutine with arguments job_id (str) and progress_error_callback fetching the progress result of a single job.
+        fetch_batch_progress (coroutine, optional): Coroutine with argument job_ids (list) fetching the progress results of many jobs in one request.
+            Has to return a dictionary {job_id: progress_result} or None if the API server doesn't support batched progress requests. Defaults to None.
+        batch_progress (bool, optional): Whether to use batched progress requests. None detects server support with the first batched request.
+            Defaults to None.
+        poll_jitter (float, optional): Relative random deviation of the poll intervals between 0 and 1. Defaults to DEFAULT_POLL_JITTER.
+
+    Attributes:
+        jobs (dict): Registered jobs with their queue, poll interval or policy, next poll time, progress error callback and last progress result.
+        batch_progress (bool): Whether batched progress requests are used. None if not detected yet.
+        poll_count (int): Number of progress requests sent by the multiplexer.
+    """
+
+    def __init__(self, fetch_progress, fetch_batch_progress=None, batch_progress=None, poll_jitter=DEFAULT_POLL_JITTER):
+        self.fetch_progress = fetch_progress
+        self.fetch_batch_progress = fetch_batch_progress
+        self.batch_progress = batch_progress if fetch_batch_progress else False
+        self.poll_jitter = poll_jitter
+        self.jobs = dict()
+        self.poll_count = 0
+        self.__scheduler_task = None
+        self.__poll_tasks = set()
+        self.__wakeup = None
+
+
+    def register(self, job_id, progress_interval, progress_error_callback=None):
+        """Register a running job to be polled by the multiplexer.
+
+        Args:
+            job_id (str): Job id of running job.
+            progress_interval (float or ProgressPolicy): Interval in seconds at which progress of this job is checked or polling policy
+                deciding the interval.
+            progress_error_callback (callable or coroutine, optional): Callback function or coroutine with argument error_description (str) for catching
+                progress errors of this job. Defaults to None.
+
+        Returns:
+            asyncio.Queue: Queue receiving the progress result dictionaries of the job, or the exception raised while fetching them.
+        """
+        queue = asyncio.Queue()
+        self.jobs[job_id] = {
+            'queue': queue,
+            'progress_interval': progress_interval,
+            'next_poll': asyncio.get_running_loop().time(),
+            'polling': False,
+            'progress_error_callback': progress_error_callback,
+            'progress_result': None
+        }
+        if not self.__scheduler_task or self.__scheduler_task.done():
+            self.__wakeup = asyncio.Event()
+            self.__scheduler_task = asyncio.ensure_future(self.__run())
+        else:
+            self.__wakeup.set()
+        return queue
+
+
+    def unregister(self, job_id):
+        """Stop polling the job with given job_id.
+
+        Args:
+            job_id (str): Job id of the registered job.
+        """
+        self.jobs.pop(job_id, None)
+
+
+    async def close(self):
+        """
+        Stop the scheduler task and forget all registered jobs.
+        """
+        self.jobs.clear()
+        tasks = [task for task in [self.__scheduler_task, *self.__poll_tasks] if task and not task.done()]
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.__scheduler_task = None
+
+
+    async def __run(self):
+        """
+        Scheduler loop starting the polls of all due jobs until no job is registered anymore.
+        """
+        loop = asyncio.get_running_loop()
+        while self.jobs:
+            now = loop.time()
+            due_job_ids = [job_id for job_id, job in self.jobs.items() if not job['polling'] and job['next_poll'] <= now]
+            for job_id in due_job_ids:
+                self.jobs[job_id]['polling'] = True
+            if len(due_job_ids) > 1 and self.batch_progress is not False:
+                self.__start_poll(self.__poll_batch(due_job_ids))
+            else:
+                for job_id in due_job_ids:
+                    self.__start_poll(self.__poll_single(job_id))
+
+            next_polls = [job['next_poll'] for job in self.jobs.values() if not job['polling']]
+            self.__wakeup.clear()
+            try:
+                await asyncio.wait_for(self.__wakeup.wait(), min(next_polls) - now if next_polls else None)
+            except asyncio.TimeoutError:
+                pass
+
+
+    def __start_poll(self, coroutine):
+        task = asyncio.ensure_future(coroutine)
+        self.__poll_tasks.add(task)
+        task.add_done_callback(self.__poll_tasks.discard)
+
+
+    async def __poll_batch(self, job_ids):
+        """Poll the progress of given jobs with one batched progress request. Jobs missing in the response and all jobs of
+        a failed request are polled single.
+
+        Args:
+            job_ids (list): Job ids of due jobs.
+        """
+        try:
+            self.poll_count += 1
+            progress_results = await self.fetch_batch_progress(job_ids)
+        except Exception:
+            progress_results = None
+        else:
+            self.batch_progress = progress_results is not None
+        if progress_results is not None:
+            for job_id, progress_result in progress_results.items():
+                if job_id in self.jobs:
+                    self.__dispatch(job_id, progress_result)
+                    self.__reschedule(job_id)
+            job_ids = [job_id for job_id in job_ids if job_id not in progress_results]
+        for job_id in job_ids:
+            self.__start_poll(self.__poll_single(job_id))
+
+
+    async def __poll_single(self, job_id):
+        """Poll the progress of a single job.
+
+        Args:
+            job_id (str): Job id of due job.
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            self.poll_count += 1
+            try:
+                progress_result = await self.fetch_progress(job_id, job['progress_error_callback'])
+            except Exception as error:
+                progress_result = error
+            self.__dispatch(job_id, progress_result)
+            self.__reschedule(job_id)
+
+
+    def __reschedule(self, job_id):
+        """Schedule the next poll of a job after its poll is done and wake up the scheduler loop.
+
+        Args:
+            job_id (str): Job id of the polled job.
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            interval = get_progress_interval(job['progress_interval'], job_id, job['progress_result'])
+            if not self.batch_progress:
+                interval *= random.uniform(1 - self.poll_jitter, 1 + self.poll_jitter)
+            job['next_poll'] = asyncio.get_running_loop().time() + interval
+            job['polling'] = False
+        if self.__wakeup:
+            self.__wakeup.set()
+
+
+    def __dispatch(self, job_id, progress_result):
+        """Put progress result into the queue of given job. Finished, canceled and failed jobs are unregistered.
+
+        Args:
+            job_id (str): Job id of the registered job.
+            progress_result (dict or Exception): Progress result dictionary received from API server or raised exception.
+        """
+        job = self.jobs.get(job_id)
+        if job:
+            job['progress_result'] = progress_result if isinstance(progress_result, dict) else None
+            job['queue'].put_nowait(progress_result)
+            if isinstance(progress_result, Exception) or \
+                (isinstance(progress_result, dict) and progress_result.get('job_state') in ('done', 'canceled')):
+                self.unregister(job_id)
@@ -0,0 +1,213 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import abc
+
+
+DEFAULT_PROGRESS_INTERVAL = 0.3
+
+
+class ProgressPolicy(abc.ABC):
+    """
+    Base class of progress polling policies deciding how long to wait before the next progress request of a job.
+    Can be given as progress_interval to the do_api_request methods of ModelAPI instead of a fixed interval.
+
+    Subclasses implement get_interval(). The policy counts the sent progress requests and compares them with the number
+    of requests a fixed baseline_interval would have needed for the same time.
+
+    Args:
+        baseline_interval (float, optional): Fixed interval in seconds used as reference for polls_saved. Defaults to DEFAULT_PROGRESS_INTERVAL.
+
+    Attributes:
+        poll_count (int): Number of progress requests scheduled by this policy.
+        waited_duration (float): Sum of all intervals in seconds returned by this policy.
+    """
+
+    def __init__(self, baseline_interval=DEFAULT_PROGRESS_INTERVAL):
+        self.baseline_interval = baseline_interval
+        self.poll_count = 0
+        self.waited_duration = 0.0
+        self.job_states = dict()
+
+
+    @property
+    def polls_saved(self):
+        """Number of progress requests saved compared to polling every baseline_interval seconds.
+
+        Returns:
+            int: Saved progress requests. Negative if the policy polled more often than the baseline.
+        """
+        return round(self.waited_duration / self.baseline_interval) - self.poll_count
+
+
+    def next_interval(self, job_id, progress_result):
+        """Get the interval in seconds to wait before the next progress request of given job and update the statistics.
+
+        Args:
+            job_id (str): Job id of running job.
+            progress_result (dict): Last progress result dictionary received from API server. None before the first progress request.
+
+        Returns:
+            float: Interval in seconds.
+        """
+        job_state = self.job_states.setdefault(job_id, dict())
+        interval = self.get_interval(job_state, self.__parse_progress(progress_result))
+        self.poll_count += 1
+        self.waited_duration += interval
+        return interval
+
+
+    def end_job(self, job_id):
+        """Forget the state of given job after it is finished.
+
+        Args:
+            job_id (str): Job id of finished job.
+        """
+        self.job_states.pop(job_id, None)
+
+
+    @abc.abstractmethod
+    def get_interval(self, job_state, progress):
+        """Calculate the next interval. To be implemented by subclasses.
+
+        Args:
+            job_state (dict): Dictionary the policy can use to keep state of the job between calls.
+            progress (dict): Parsed progress with keys 'progress', 'queue_position', 'estimate' and 'text_length'.
+
+        Returns:
+            float: Interval in seconds.
+        """
+
+
+    @staticmethod
+    def __parse_progress(progress_result):
+        """Extract the values relevant for polling policies from a progress result dictionary.
+
+        Args:
+            progress_result (dict): Progress result dictionary received from API server or None.
+
+        Returns:
+            dict: Dictionary with keys 'progress', 'queue_position', 'estimate' and 'text_length'. Unknown values are None.
+        """
+        progress = (progress_result or {}).get('progress') or {}
+        if not isinstance(progress, dict):
+            progress = {}
+        text = (progress.get('progress_data') or {}).get('text')
+        return {
+            'progress': progress.get('progress'),
+            'queue_position': progress.get('queue_position'),
+            'estimate': progress.get('estimate'),
+            'text_length': len(text) if isinstance(text, str) else None
+        }
+
+
+class FixedProgressPolicy(ProgressPolicy):
+    """
+    Poll every interval seconds, like a numeric progress_interval.
+
+    Args:
+        interval (float, optional): Interval in seconds. Defaults to DEFAULT_PROGRESS_INTERVAL.
+        baseline_interval (float, optional): Fixed interval in seconds used as reference for polls_saved. Defaults to DEFAULT_PROGRESS_INTERVAL.
+    """
+
+    def __init__(self, interval=DEFAULT_PROGRESS_INTERVAL, baseline_interval=DEFAULT_PROGRESS_INTERVAL):
+        super().__init__(baseline_interval)
+        self.interval = interval
+
+
+    def get_interval(self, job_state, progress):
+        return self.interval
+
+
+class ExponentialProgressPolicy(ProgressPolicy):
+    """
+    Increase the interval by factor after every progress request without visible progress and fall back to
+    min_interval as soon as the progress value or the streamed text changes.
+
+    Args:
+        min_interval (float, optional): Shortest interval in seconds. Defaults to DEFAULT_PROGRESS_INTERVAL.
+        max_interval (float, optional): Longest interval in seconds. Defaults to 5.
+        factor (float, optional): Growth factor of the interval. Defaults to 1.5.
+        baseline_interval (float, optional): Fixed interval in seconds used as reference for polls_saved. Defaults to DEFAULT_PROGRESS_INTERVAL.
+    """
+
+    def __init__(self, min_interval=DEFAULT_PROGRESS_INTERVAL, max_interval=5, factor=1.5, baseline_interval=DEFAULT_PROGRESS_INTERVAL):
+        super().__init__(baseline_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.factor = factor
+
+
+    def get_interval(self, job_state, progress):
+        changed = (progress['progress'], progress['text_length']) != job_state.get('last_progress')
+        job_state['last_progress'] = (progress['progress'], progress['text_length'])
+        if changed:
+            job_state['interval'] = self.min_interval
+        else:
+            job_state['interval'] = min(job_state.get('interval', self.min_interval) * self.factor, self.max_interval)
+        return job_state['interval']
+
+
+class EstimateProgressPolicy(ProgressPolicy):
+    """
+    Derive the interval from queue_position and estimate reported by the API server. Jobs deep in the queue or with a long
+    estimated remaining duration are polled rarely, jobs close to completion or streaming text are polled every min_interval.
+
+    Args:
+        min_interval (float, optional): Shortest interval in seconds. Defaults to 0.1.
+        max_interval (float, optional): Longest interval in seconds. Defaults to 5.
+        queue_position_interval (float, optional): Interval in seconds per job waiting ahead in the queue. Defaults to 0.5.
+        estimate_fraction (float, optional): Fraction of the estimated remaining duration to wait. Defaults to 0.25.
+        baseline_interval (float, optional): Fixed interval in seconds used as reference for polls_saved. Defaults to DEFAULT_PROGRESS_INTERVAL.
+    """
+
+    def __init__(
+        self,
+        min_interval=0.1,
+        max_interval=5,
+        queue_position_interval=0.5,
+        estimate_fraction=0.25,
+        baseline_interval=DEFAULT_PROGRESS_INTERVAL
+        ):
+        super().__init__(baseline_interval)
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.queue_position_interval = queue_position_interval
+        self.estimate_fraction = estimate_fraction
+
+
+    def get_interval(self, job_state, progress):
+        text_length = progress['text_length']
+        streaming = text_length is not None and text_length != job_state.get('text_length')
+        job_state['text_length'] = text_length
+        queue_position = progress['queue_position'] or 0
+        estimate = progress['estimate']
+        if streaming:
+            interval = self.min_interval
+        elif queue_position > 0:
+            interval = queue_position * self.queue_position_interval
+        elif estimate is not None and estimate > 0:
+            interval = estimate * self.estimate_fraction
+        else:
+            interval = self.min_interval
+        return min(max(interval, self.min_interval), self.max_interval)
+
+
+def get_progress_interval(progress_interval, job_id, progress_result):
+    """Get the interval to wait before the next progress request for a numeric progress_interval or a ProgressPolicy.
+
+    Args:
+        progress_interval (float or ProgressPolicy): Fixed interval in seconds or polling policy.
+        job_id (str): Job id of running job.
+        progress_result (dict): Last progress result dictionary received from API server.
+
+    Returns:
+        float: Interval in seconds.
+    """
+    if isinstance(progress_interval, ProgressPolicy):
+        if progress_result and progress_result.get('job_state') in ('done', 'canceled'):
+            progress_interval.end_job(job_id)
+            return 0
+        return progress_interval.next_interval(job_id, progress_result)
+    return progress_interval
@@ -0,0 +1,105 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+from .json_codec import default_json_codec
+
+
+class ServerSentEventParser():
+    """
+    Incremental parser for text/event-stream bodies as sent by the route /stream_progress of the API server.
+
+    Feed the received chunks in arbitrary sizes. Lines are split without size limit, so events carrying large base64 progress
+    images are no problem. Only the data field is evaluated, the payload of each event is decoded as JSON and brought to the
+    shape of the results of route /progress by normalize_progress_event().
+
+    Args:
+        json_codec (JSONCodec, optional): Codec decoding the event data. Defaults to default_json_codec.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            parser = ServerSentEventParser()
+            for chunk in chunks:
+                for progress_result in parser.feed(chunk):
+                    process(progress_result)
+    """
+
+    def __init__(self, json_codec=default_json_codec):
+        self.json_codec = json_codec
+        self.buffer = bytearray()
+        self.data_lines = list()
+        self.search_start = 0
+
+
+    def feed(self, chunk):
+        """Feed received bytes to the parser.
+
+        Args:
+            chunk (bytes): Next chunk of the response body.
+
+        Raises:
+            ValueError: If an event is no valid JSON or no progress result.
+
+        Returns:
+            list: Progress result dictionaries decoded from the data of all events completed by this chunk.
+        """
+        events = list()
+        self.buffer.extend(chunk)
+        while True:
+            line_end = self.buffer.find(b'\n', self.search_start)
+            if line_end < 0:
+                self.search_start = len(self.buffer)
+                break
+            line = bytes(self.buffer[:line_end]).rstrip(b'\r').decode('utf-8')
+            del self.buffer[:line_end + 1]
+            self.search_start = 0
+            if not line:
+                if self.data_lines:
+                    events.append(normalize_progress_event(self.json_codec.loads('\n'.join(self.data_lines))))
+                    self.data_lines = list()
+            elif line.startswith('data:'):
+                data = line[5:]
+                self.data_lines.append(data[1:] if data.startswith(' ') else data)
+        return events
+
+
+def normalize_progress_event(event):
+    """Bring a progress event of route /stream_progress to the shape of the results of route /progress.
+
+    Events are accepted nested like the results of route /progress with the keys 'progress', 'queue_position', 'estimate' and
+    'progress_data' in the dictionary 'progress', or flat with these keys at top level and 'progress' as number, as read by the
+    JavaScript client.
+
+    Args:
+        event (dict): Decoded data of the event.
+
+    Raises:
+        ValueError: If the event has neither shape, so the caller can fall back to polling.
+
+    Returns:
+        dict: Progress result dictionary like returned by route /progress.
+    """
+    if not isinstance(event, dict):
+        raise ValueError(f'Progress event is no JSON object: {event!r:.100}')
+    progress = event.get('progress')
+    if event.get('job_state') == 'done':
+        if not isinstance(event.get('job_result'), dict):
+            raise ValueError('Progress event of finished job without job_result')
+        return event
+    if progress is None or isinstance(progress, dict):
+        return event
+    if isinstance(progress, bool) or not isinstance(progress, (int, float)):
+        raise ValueError(f'Progress event with invalid progress {progress!r:.100}')
+    progress_result = {key: value for key, value in event.items() if key not in ('queue_position', 'estimate', 'progress_data')}
+    progress_result.setdefault('success', True)
+    progress_result.setdefault('job_state', 'processing')
+    progress_result['progress'] = {
+        'progress': progress,
+        'queue_position': event.get('queue_position'),
+        'estimate': event.get('estimate'),
+        'progress_data': event.get('progress_data') or dict()
+    }
+    return progress_result
@@ -0,0 +1,254 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import abc
+import asyncio
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from .auth_key_store import _FileLock
+
+
+class RateLimiter(abc.ABC):
+    """
+    Base class of client-side token bucket rate limiters for job submissions of ModelAPI. Each submission takes a token from the bucket
+    of its key (api_server, endpoint_name, api_key). Buckets refill with rate tokens per second up to burst tokens. Submissions
+    without token wait until their token is refilled instead of failing at the quota of the API server, in the order they arrived.
+
+    Subclasses implement reserve() and refund().
+
+    Args:
+        rate (float): Tokens refilled per second, the sustained submission rate.
+        burst (float, optional): Capacity of the buckets, the number of submissions sent at once after an idle period.
+            Defaults to None, using max(1, rate).
+
+    Attributes:
+        wait_count (int): Number of submissions that had to wait.
+        wait_time (float): Total seconds submissions waited.
+        blocking (bool): Whether reserve() and refund() do blocking I/O and are run in a thread by acquire_async().
+    """
+
+    blocking = False
+
+    def __init__(self, rate, burst=None):
+        if rate <= 0:
+            raise ValueError(f'rate must be positive, got {rate}')
+        self.rate = rate
+        self.burst = burst or max(1.0, rate)
+        self.wait_count = 0
+        self.wait_time = 0.0
+
+
+    def acquire(self, key):
+        """Take a token from the bucket of given key, sleeping until it is available.
+
+        Args:
+            key (tuple): Bucket key (api_server, endpoint_name, api_key).
+        """
+        wait = self.reserve(key)
+        if wait > 0:
+            self.__count_wait(wait)
+            time.sleep(wait)
+
+
+    async def acquire_async(self, key):
+        """Take a token from the bucket of given key, waiting asynchronously until it is available. The token is returned
+        if the waiting task is cancelled.
+
+        Args:
+            key (tuple): Bucket key (api_server, endpoint_name, api_key).
+        """
+        if self.blocking:
+            wait = await asyncio.get_running_loop().run_in_executor(None, self.reserve, key)
+        else:
+            wait = self.reserve(key)
+        if wait > 0:
+            self.__count_wait(wait)
+            try:
+                await asyncio.sleep(wait)
+            except asyncio.CancelledError:
+                self.refund(key)
+                raise
+
+
+    @abc.abstractmethod
+    def reserve(self, key):
+        """Take a token from the bucket of given key. The bucket may go into debt, so later submissions queue up behind this one.
+
+        Args:
+            key (tuple): Bucket key (api_server, endpoint_name, api_key).
+
+        Returns:
+            float: Seconds until the token is available, 0 if it is available now.
+        """
+
+
+    @abc.abstractmethod
+    def refund(self, key):
+        """Return a reserved token not used.
+
+        Args:
+            key (tuple): Bucket key (api_server, endpoint_name, api_key).
+        """
+
+
+    def take_token(self, tokens, updated, now):
+        """Refill a bucket for the time passed since its last update and take a token.
+
+        Args:
+            tokens (float): Tokens in the bucket at its last update, negative if in debt.
+            updated (float): Time of the last update in seconds.
+            now (float): Current time in seconds.
+
+        Returns:
+            float, float: Tokens left and seconds until the taken token is available.
+        """
+        tokens = min(self.burst, tokens + (now - updated) * self.rate) - 1
+        return tokens, max(0.0, -tokens / self.rate)
+
+
+    def __count_wait(self, wait):
+        self.wait_count += 1
+        self.wait_time += wait
+
+
+class MemoryRateLimiter(RateLimiter):
+    """
+    Rate limiter with the buckets in memory, shared by all ModelAPI instances of the process it is given to.
+    Use get_shared() to get the limiter of the process with given rate and burst.
+
+    Args:
+        rate (float): Tokens refilled per second, the sustained submission rate.
+        burst (float, optional): Capacity of the buckets. Defaults to None, using max(1, rate).
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            rate_limiter = MemoryRateLimiter.get_shared(rate=5, burst=10)
+            model_api = ModelAPI('https://api.aime.info', 'llama3_chat', user, key, rate_limiter=rate_limiter)
+    """
+
+    limiters = dict()
+    limiters_lock = threading.Lock()
+
+    def __init__(self, rate, burst=None):
+        super().__init__(rate, burst)
+        self.buckets = dict()
+        self.lock = threading.Lock()
+
+
+    @classmethod
+    def get_shared(cls, rate, burst=None):
+        """Get the process-wide rate limiter with given rate and burst, creating it on first use.
+
+        Args:
+            rate (float): Tokens refilled per second.
+            burst (float, optional): Capacity of the buckets. Defaults to None, using max(1, rate).
+
+        Returns:
+            MemoryRateLimiter: Shared rate limiter.
+        """
+        with cls.limiters_lock:
+            limiter = cls.limiters.get((rate, burst))
+            if not limiter:
+                limiter = cls.limiters[(rate, burst)] = cls(rate, burst)
+            return limiter
+
+
+    def reserve(self, key):
+        now = time.monotonic()
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (self.burst, now))
+            tokens, wait = self.take_token(tokens, updated, now)
+            self.buckets[key] = (tokens, now)
+        return wait
+
+
+    def refund(self, key):
+        with self.lock:
+            tokens, updated = self.buckets.get(key, (self.burst, time.monotonic()))
+            self.buckets[key] = (min(self.burst, tokens + 1), updated)
+
+
+class FileRateLimiter(RateLimiter):
+    """
+    Rate limiter with the buckets in a JSON file shared by all processes on a host, so parallel workers honour one budget.
+    Accesses are serialized with an flock on path + '.lock' where fcntl is available. Without fcntl the buckets are only
+    shared by the threads of the process.
+
+    Args:
+        path (str or pathlib.Path): Path of the JSON file. Created on first use.
+        rate (float): Tokens refilled per second, the sustained submission rate.
+        burst (float, optional): Capacity of the buckets. Defaults to None, using max(1, rate).
+    """
+
+    blocking = True
+
+    def __init__(self, path, rate, burst=None):
+        super().__init__(rate, burst)
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(self.path.name + '.lock')
+        self.lock = threading.Lock()
+
+
+    def reserve(self, key):
+        with _FileLock(self.lock, self.lock_path, True):
+            now = time.time()
+            buckets = self.__read(now)
+            entry_key = self.__make_entry_key(key)
+            tokens, updated = buckets.get(entry_key, (self.burst, now))
+            tokens, wait = self.take_token(tokens, updated, now)
+            buckets[entry_key] = (tokens, now)
+            self.__write(buckets)
+        return wait
+
+
+    def refund(self, key):
+        with _FileLock(self.lock, self.lock_path, True):
+            now = time.time()
+            buckets = self.__read(now)
+            entry_key = self.__make_entry_key(key)
+            tokens, updated = buckets.get(entry_key, (self.burst, now))
+            buckets[entry_key] = (min(self.burst, tokens + 1), updated)
+            self.__write(buckets)
+
+
+    def __read(self, now):
+        """Read all buckets, dropping the full ones.
+
+        Returns:
+            dict: Buckets {entry_key: (tokens, updated)}.
+        """
+        try:
+            with open(self.path, 'r') as file:
+                buckets = json.load(file)
+        except (FileNotFoundError, ValueError):
+            return dict()
+        return {
+            entry_key: tuple(bucket) for entry_key, bucket in buckets.items()
+            if bucket[0] + (now - bucket[1]) * self.rate < self.burst
+        }
+
+
+    def __write(self, buckets):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        file_descriptor, temp_path = tempfile.mkstemp(dir=self.path.parent, prefix=self.path.name, suffix='.tmp')
+        try:
+            with os.fdopen(file_descriptor, 'w') as file:
+                json.dump(buckets, file)
+            os.replace(temp_path, self.path)
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+
+
+    @staticmethod
+    def __make_entry_key(key):
+        return '\t'.join(str(part or '') for part in key)
@@ -0,0 +1,100 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import copy
+
+
+class RequestCoalescer():
+    """
+    Single-flight layer for do_api_request_async() of ModelAPI. Concurrent identical requests attach to the job of the first one
+    instead of submitting their own. Its progress is handed to the progress callbacks of all attached requests and each of them
+    receives a copy of the result.
+
+    The job is counted by the attached requests. A cancelled request only detaches its callbacks, the job is cancelled
+    when the last attached request is cancelled. Give the same coalescer to many ModelAPI instances to share it.
+
+    Attributes:
+        flights (dict): Running jobs {(key, loop): _Flight}.
+        submitted_count (int): Number of jobs started.
+        coalesced_count (int): Number of requests attached to an already running job.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            model_api = ModelAPI('https://api.aime.info', 'tts_tortoise', user, key, coalesce_requests=True)
+            results = await asyncio.gather(*[model_api.do_api_request_async({'text': 'Welcome'}) for _ in range(10)])  # one job
+    """
+
+    def __init__(self):
+        self.flights = dict()
+        self.submitted_count = 0
+        self.coalesced_count = 0
+
+
+    async def run(self, key, start, progress_callback=None):
+        """Run the job of given key or attach to it if it is already running.
+
+        Args:
+            key (tuple): Key identifying identical requests.
+            start (callable): Function with argument progress_callback (coroutine or None) returning the coroutine doing the request.
+                progress_callback is given if the first request of the job has a progress_callback. Keys of requests with and
+                without progress_callback must differ, so all requests of a job are served alike.
+            progress_callback (callable or coroutine, optional): Callback function or coroutine with arguments progress_info (dict)
+                and progress_data (dict). Defaults to None.
+
+        Returns:
+            dict: Copy of the result of the job.
+        """
+        flight_key = (key, asyncio.get_running_loop())
+        flight = self.flights.get(flight_key)
+        if flight:
+            self.coalesced_count += 1
+        else:
+            self.submitted_count += 1
+            flight = self.flights[flight_key] = _Flight()
+            flight.task = asyncio.ensure_future(start(flight.publish_progress if progress_callback else None))
+            flight.task.add_done_callback(lambda task: self.__land(flight_key, flight))
+
+        waiter = object()
+        flight.progress_callbacks[waiter] = progress_callback
+        try:
+            result = await asyncio.shield(flight.task)
+        except asyncio.CancelledError:
+            if flight.task.done():
+                raise
+            del flight.progress_callbacks[waiter]
+            if not flight.progress_callbacks:
+                flight.task.cancel()
+                self.__land(flight_key, flight)
+            raise
+        flight.progress_callbacks.pop(waiter, None)
+        return copy.deepcopy(result)
+
+
+    def __land(self, flight_key, flight):
+        if self.flights.get(flight_key) is flight:
+            del self.flights[flight_key]
+        if flight.task.done() and not flight.task.cancelled():
+            flight.task.exception()  # retrieved, raised in the attached requests
+
+
+class _Flight():
+    """
+    Running job of a RequestCoalescer with the progress callbacks of the attached requests.
+    """
+
+    def __init__(self):
+        self.task = None
+        self.progress_callbacks = dict()
+
+
+    async def publish_progress(self, progress_info, progress_data):
+        for progress_callback in list(self.progress_callbacks.values()):
+            if asyncio.iscoroutinefunction(progress_callback):
+                await progress_callback(copy.copy(progress_info), progress_data)
+            elif callable(progress_callback):
+                progress_callback(copy.copy(progress_info), progress_data)
@@ -0,0 +1,444 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import abc
+import base64
+import io
+import re
+import uuid
+from pathlib import Path
+
+from .json_codec import default_json_codec
+from .payloads import MAX_DATA_URI_HEADER_LENGTH
+
+
+DEFAULT_RESPONSE_CHUNK_SIZE = 2**16
+
+STRING_DELIMITER = re.compile(rb'["\\]')
+CONTAINER_DELIMITER = re.compile(rb'[:{}\[\]]')
+
+
+class PayloadSink(abc.ABC):
+    """
+    Base class of destinations for base64 data URI fields of API responses, decoded by the IncrementalJSONParser while the
+    response body is still arriving. One sink is shared by all concurrent requests of a ModelAPI, so the state of each
+    payload is kept in the PayloadWriter returned by open(). Subclasses implement open().
+    """
+
+    @abc.abstractmethod
+    def open(self, key, index, mime_type):
+        """Start receiving a new payload.
+
+        Args:
+            key (str): Name of the dictionary key containing the payload like 'images' or 'audio_output'.
+            index (int): Running number of payloads with this key within the response.
+            mime_type (str): Mime type given in the data URI header like 'image/PNG'.
+
+        Returns:
+            PayloadWriter: Writer receiving the decoded chunks of this payload.
+        """
+
+
+class PayloadWriter(abc.ABC):
+    """
+    Receiver of the decoded chunks of a single payload, returned by PayloadSink.open(). Subclasses implement write() and close().
+    """
+
+    @abc.abstractmethod
+    def write(self, data):
+        """Receive the next decoded chunk of the payload.
+
+        Args:
+            data (bytes): Decoded chunk.
+        """
+
+
+    @abc.abstractmethod
+    def close(self):
+        """Finish the payload.
+
+        Returns:
+            object: Value replacing the payload in the parsed response dictionary.
+        """
+
+
+class BytesSink(PayloadSink):
+    """
+    Collect each payload in an io.BytesIO and put the decoded bytes into the response dictionary.
+    """
+
+    def open(self, key, index, mime_type):
+        return BytesWriter()
+
+
+class BytesWriter(PayloadWriter):
+    """
+    Writer of the BytesSink collecting one payload in an io.BytesIO.
+    """
+
+    def __init__(self):
+        self.buffer = io.BytesIO()
+
+
+    def write(self, data):
+        self.buffer.write(data)
+
+
+    def close(self):
+        data = self.buffer.getvalue()
+        self.buffer = None
+        return data
+
+
+class FileSink(PayloadSink):
+    """
+    Write each payload directly to a file in given directory. The response dictionary receives a dictionary with path, size and mime_type instead.
+
+    Args:
+        directory (str or pathlib.Path): Output directory. Created if not existing.
+        filename_template (str, optional): Template of the file names with the fields {key}, {index}, {extension} and {uid}.
+            Defaults to '{uid}_{key}_{index}.{extension}'.
+    """
+
+    def __init__(self, directory, filename_template='{uid}_{key}_{index}.{extension}'):
+        self.directory = Path(directory)
+        self.filename_template = filename_template
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+
+    def open(self, key, index, mime_type):
+        extension = mime_type.split('/')[-1].lower() or 'bin'
+        path = self.directory / self.filename_template.format(key=key, index=index, extension=extension, uid=uuid.uuid4().hex)
+        return FileWriter(path, mime_type)
+
+
+class FileWriter(PayloadWriter):
+    """
+    Writer of the FileSink writing one payload to given path.
+    """
+
+    def __init__(self, path, mime_type):
+        self.path = path
+        self.mime_type = mime_type
+        self.file = open(path, 'wb')
+        self.size = 0
+
+
+    def write(self, data):
+        self.file.write(data)
+        self.size += len(data)
+
+
+    def close(self):
+        self.file.close()
+        return {'path': str(self.path), 'size': self.size, 'mime_type': self.mime_type}
+
+
+class CallbackSink(PayloadSink):
+    """
+    Hand each decoded chunk to a callback. The response dictionary receives a dictionary with size and mime_type instead.
+
+    Args:
+        callback (callable): Function with arguments key (str), index (int), mime_type (str) and data (bytes), called for every decoded chunk.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+
+
+    def open(self, key, index, mime_type):
+        return CallbackWriter(self.callback, key, index, mime_type)
+
+
+class CallbackWriter(PayloadWriter):
+    """
+    Writer of the CallbackSink handing the chunks of one payload to the callback.
+    """
+
+    def __init__(self, callback, key, index, mime_type):
+        self.callback = callback
+        self.key = key
+        self.index = index
+        self.mime_type = mime_type
+        self.size = 0
+
+
+    def write(self, data):
+        self.size += len(data)
+        self.callback(self.key, self.index, self.mime_type, data)
+
+
+    def close(self):
+        return {'size': self.size, 'mime_type': self.mime_type}
+
+
+class IncrementalJSONParser():
+    """
+    Incremental parser for JSON response bodies with large base64 data URI strings.
+
+    The body is fed in chunks as it arrives. String values starting with a 'data:<mime_type>;base64,' header are not kept in memory,
+    their payload is decoded chunk by chunk and handed to the sink. All other content is collected and decoded with the JSON codec
+    at the end, so only the small metadata dictionary is built in memory.
+
+    Args:
+        sink (PayloadSink): Destination of the decoded payloads.
+        json_codec (JSONCodec, optional): Codec decoding the collected metadata. Defaults to default_json_codec.
+        payload_filter (callable, optional): Function with argument path (tuple of str), the keys leading to a data URI like
+            ('job_result', 'images'), returning whether its payload goes to the sink. Other data URIs are kept as strings.
+            Defaults to None, handing all payloads to the sink.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            parser = IncrementalJSONParser(FileSink('output'))
+            async for chunk in response.content.iter_chunked(DEFAULT_RESPONSE_CHUNK_SIZE):
+                parser.feed(chunk)
+            result = parser.finish()
+    """
+
+    OUTSIDE, HEADER, STRING, PAYLOAD = range(4)
+
+    def __init__(self, sink, json_codec=default_json_codec, payload_filter=None):
+        self.sink = sink
+        self.json_codec = json_codec
+        self.payload_filter = payload_filter
+        self.containers = list()
+        self.writer = None
+        self.metadata = bytearray()
+        self.pending = b''
+        self.state = self.OUTSIDE
+        self.string_start = 0
+        self.last_string = None
+        self.current_key = None
+        self.key_counts = dict()
+        self.base64_remainder = b''
+        self.placeholder_prefix = f'__aime_payload_{uuid.uuid4().hex}_'
+        self.payloads = dict()
+
+
+    def feed(self, chunk):
+        """Feed the next chunk of the response body.
+
+        Args:
+            chunk (bytes): Next chunk of the response body.
+        """
+        data = self.pending + chunk if self.pending else bytes(chunk)
+        self.pending = b''
+        position = 0
+        length = len(data)
+        while position < length:
+            if self.state == self.OUTSIDE:
+                quote = data.find(b'"', position)
+                segment = data[position:] if quote < 0 else data[position:quote]
+                self.metadata.extend(segment)
+                if self.payload_filter:
+                    self.__track_containers(segment)
+                if b':' in segment:
+                    self.current_key = self.last_string
+                if quote < 0:
+                    position = length
+                else:
+                    position = quote + 1
+                    self.state = self.HEADER
+
+            elif self.state == self.HEADER:
+                window = data[position:position + MAX_DATA_URI_HEADER_LENGTH]
+                prefix_length = min(len(window), 5)
+                if window[:prefix_length] != b'data:'[:prefix_length]:
+                    self.__start_string()
+                    continue
+                separator = window.find(b',')
+                quote = window.find(b'"')
+                if quote >= 0 and (separator < 0 or quote < separator):
+                    self.__start_string()
+                elif separator >= 0:
+                    # JSON encoders may escape the slash of the mime type as '\/'
+                    header = window[:separator].replace(b'\\/', b'/')
+                    if header.startswith(b'data:') and header.endswith(b';base64') and b'\\' not in header and self.__accepts_payload():
+                        self.__start_payload(header[5:-7].decode('utf-8'))
+                        position += separator + 1
+                    else:
+                        self.__start_string()
+                elif len(window) < MAX_DATA_URI_HEADER_LENGTH:
+                    self.pending = data[position:]
+                    position = length
+                else:
+                    self.__start_string()
+
+            elif self.state == self.STRING:
+                delimiter = STRING_DELIMITER.search(data, position)
+                if not delimiter:
+                    self.metadata.extend(data[position:])
+                    position = length
+                elif data[delimiter.start()] == ord('\\'):
+                    if delimiter.start() + 1 >= length:
+                        self.metadata.extend(data[position:delimiter.start()])
+                        self.pending = data[delimiter.start():]
+                        position = length
+                    else:
+                        self.metadata.extend(data[position:delimiter.start() + 2])
+                        position = delimiter.start() + 2
+                else:
+                    self.metadata.extend(data[position:delimiter.start() + 1])
+                    position = delimiter.start() + 1
+                    self.__end_string()
+
+            elif self.state == self.PAYLOAD:
+                delimiter = STRING_DELIMITER.search(data, position)
+                end = delimiter.start() if delimiter else length
+                self.__write_base64(data[position:end])
+                if not delimiter:
+                    position = length
+                elif data[end] == ord('\\'):
+                    if end + 1 >= length:
+                        self.pending = data[end:]
+                        position = length
+                    else:
+                        self.__write_base64(data[end + 1:end + 2])
+                        position = end + 2
+                else:
+                    self.__end_payload()
+                    position = end + 1
+                    self.state = self.OUTSIDE
+
+
+    def finish(self):
+        """Parse the collected metadata after the complete body was fed.
+
+        Raises:
+            ValueError: If the body is no valid JSON.
+
+        Returns:
+            dict: Parsed response with payloads replaced by the return values of the sink.
+        """
+        if self.pending or self.state != self.OUTSIDE:
+            raise ValueError('Incomplete JSON response body')
+        return self.__replace_placeholders(self.json_codec.loads(self.metadata))
+
+
+    def __track_containers(self, segment):
+        """Follow the dictionaries and lists opened and closed in given segment outside of strings, remembering the key of each."""
+        key = None
+        for delimiter in CONTAINER_DELIMITER.finditer(segment):
+            character = delimiter.group()
+            if character == b':':
+                key = self.last_string
+            elif character in (b'{', b'['):
+                self.containers.append((key, character == b'['))
+                key = None
+            elif self.containers:
+                self.containers.pop()
+
+
+    def __accepts_payload(self):
+        if not self.payload_filter:
+            return True
+        path = tuple(key for key, is_list in self.containers if key is not None)
+        if self.containers and not self.containers[-1][1]:
+            path += (self.current_key,)
+        return self.payload_filter(path)
+
+
+    def __start_string(self):
+        self.metadata.extend(b'"')
+        self.string_start = len(self.metadata)
+        self.state = self.STRING
+
+
+    def __end_string(self):
+        string_length = len(self.metadata) - 1 - self.string_start
+        self.last_string = self.json_codec.loads(bytes(self.metadata[self.string_start - 1:])) if string_length <= 256 else None
+        self.state = self.OUTSIDE
+
+
+    def __start_payload(self, mime_type):
+        key = self.current_key or ''
+        index = self.key_counts.get(key, 0)
+        self.key_counts[key] = index + 1
+        self.writer = self.sink.open(key, index, mime_type)
+        self.placeholder = f'{self.placeholder_prefix}{len(self.payloads)}'
+        self.metadata.extend(f'"{self.placeholder}'.encode('utf-8'))
+        self.base64_remainder = b''
+        self.state = self.PAYLOAD
+
+
+    def __write_base64(self, data):
+        if self.base64_remainder:
+            data = self.base64_remainder + data
+        cut = len(data) - len(data) % 4
+        self.base64_remainder = bytes(data[cut:])
+        if cut:
+            self.writer.write(base64.b64decode(data[:cut]))
+
+
+    def __end_payload(self):
+        if self.base64_remainder:
+            self.writer.write(base64.b64decode(self.base64_remainder + b'=' * (-len(self.base64_remainder) % 4)))
+            self.base64_remainder = b''
+        self.payloads[self.placeholder] = self.writer.close()
+        self.writer = None
+        self.metadata.extend(b'"')
+
+
+    def __replace_placeholders(self, value):
+        if isinstance(value, dict):
+            return {key: self.__replace_placeholders(item) for key, item in value.items()}
+        elif isinstance(value, list):
+            return [self.__replace_placeholders(item) for item in value]
+        elif isinstance(value, str) and value.startswith(self.placeholder_prefix):
+            return self.payloads.get(value, value)
+        return value
+
+
+def parse_json_chunks(chunks, sink, json_codec=default_json_codec, payload_filter=None):
+    """Parse a JSON response body given as iterable of chunks with an IncrementalJSONParser.
+
+    Args:
+        chunks (iterable of bytes): Chunks of the response body.
+        sink (PayloadSink): Destination of the decoded payloads.
+        json_codec (JSONCodec, optional): Codec decoding the collected metadata. Defaults to default_json_codec.
+        payload_filter (callable, optional): Function with argument path (tuple of str) deciding which payloads go to the sink.
+            Defaults to None.
+
+    Returns:
+        dict: Parsed response with payloads replaced by the return values of the sink.
+    """
+    parser = IncrementalJSONParser(sink, json_codec, payload_filter)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.finish()
+
+
+async def parse_json_chunks_async(chunks, sink, json_codec=default_json_codec, payload_filter=None):
+    """Parse a JSON response body given as asynchronous iterable of chunks with an IncrementalJSONParser.
+
+    Args:
+        chunks (async iterable of bytes): Chunks of the response body like aiohttp's response.content.iter_chunked().
+        sink (PayloadSink): Destination of the decoded payloads.
+        json_codec (JSONCodec, optional): Codec decoding the collected metadata. Defaults to default_json_codec.
+        payload_filter (callable, optional): Function with argument path (tuple of str) deciding which payloads go to the sink.
+            Defaults to None.
+
+    Returns:
+        dict: Parsed response with payloads replaced by the return values of the sink.
+    """
+    parser = IncrementalJSONParser(sink, json_codec, payload_filter)
+    async for chunk in chunks:
+        parser.feed(chunk)
+    return parser.finish()
+
+
+def is_job_result_payload(path):
+    """Payload filter for progress responses, handing only the payloads of the final 'job_result' to the sink and keeping the
+    previews in 'progress_data' as data URI strings.
+
+    Args:
+        path (tuple of str): Keys leading to the data URI.
+
+    Returns:
+        bool: Whether the payload belongs to the final result.
+    """
+    return path[:1] == ('job_result',)
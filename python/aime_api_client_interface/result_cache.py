@@ -0,0 +1,363 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import abc
+import asyncio
+import base64
+import copy
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+from .payloads import get_data_uri_payload_start
+
+
+DEFAULT_RESULT_CACHE_ENTRIES = 256
+DEFAULT_RESULT_CACHE_SIZE = 2**30
+
+SESSION_PARAMS = frozenset(('client_session_auth_key', 'key'))
+RESULT_FILENAME = 'result.json'
+PAYLOAD_MARKER = '__aime_cached_payload__'
+
+logger = logging.getLogger(__name__)
+
+
+class ResultCache(abc.ABC):
+    """
+    Base class of caches for results of deterministic API requests, keyed by a hash of endpoint name and params. Used by
+    do_api_request() and do_api_request_async() of ModelAPI to return repeated requests without sending them to the API server.
+
+    Requests without seed or with seed -1 (random seed) and requests with streamed inputs like pathlib.Path or file objects are not
+    cached. Only successful results are stored, exactly as received. Errors of the cache are logged and never fail a request.
+    Subclasses implement get() and set().
+
+    Args:
+        cache_random_seed (bool, optional): Cache requests with random seed as well. Defaults to False.
+
+    Attributes:
+        hit_count (int): Number of lookups answered from the cache.
+        miss_count (int): Number of lookups not found in the cache.
+        blocking (bool): Whether get() and set() do blocking I/O and are run in a thread by the asynchronous lookups.
+    """
+
+    blocking = False
+
+    def __init__(self, cache_random_seed=False):
+        self.cache_random_seed = cache_random_seed
+        self.hit_count = 0
+        self.miss_count = 0
+
+
+    def make_key(self, endpoint_name, params):
+        """Canonical hash of endpoint name and params, independent of the order of the params. Session params like
+        client_session_auth_key and key are ignored, bytes are represented by their SHA-256 hash.
+
+        Args:
+            endpoint_name (str): Name of the endpoint.
+            params (dict): Parameters of the API request.
+
+        Returns:
+            str: Hex digest identifying the request or None if the request is not cacheable. Requests without seed or with
+                seed -1 get a random seed by the worker and are only cacheable with cache_random_seed.
+        """
+        if not self.cache_random_seed and params.get('seed', -1) in (None, -1):
+            return None
+        return make_request_key(endpoint_name, params)
+
+
+    def lookup(self, key):
+        """Get the cached result of given key and count the hit or miss.
+
+        Args:
+            key (str): Key created by make_key().
+
+        Returns:
+            dict: Copy of the cached result or None.
+        """
+        result = self.get(key)
+        if result is None:
+            self.miss_count += 1
+        else:
+            self.hit_count += 1
+        return result
+
+
+    async def lookup_async(self, key):
+        """Asynchronous version of lookup(), running blocking stores like the DiskResultCache in a thread.
+
+        Args:
+            key (str): Key created by make_key().
+
+        Returns:
+            dict: Copy of the cached result or None.
+        """
+        if not self.blocking:
+            return self.lookup(key)
+        return await asyncio.get_running_loop().run_in_executor(None, self.lookup, key)
+
+
+    def store(self, key, result):
+        """Store given result of a successful request. Errors like undecodable payloads, a full disk or missing permissions are
+        logged and ignored, so the request still returns its result.
+
+        Args:
+            key (str): Key created by make_key().
+            result (dict): Result received from the API server.
+        """
+        try:
+            self.set(key, result)
+        except Exception as error:
+            logger.warning(f'Storing result in {type(self).__name__} failed: {error!r}')
+
+
+    async def store_async(self, key, result):
+        """Asynchronous version of store(), running blocking stores like the DiskResultCache in a thread.
+
+        Args:
+            key (str): Key created by make_key().
+            result (dict): Result received from the API server.
+        """
+        if not self.blocking:
+            self.store(key, result)
+        else:
+            await asyncio.get_running_loop().run_in_executor(None, self.store, key, result)
+
+
+    @abc.abstractmethod
+    def get(self, key):
+        """Get the cached result of given key.
+
+        Args:
+            key (str): Key created by make_key().
+
+        Returns:
+            dict: Copy of the cached result or None.
+        """
+
+
+    @abc.abstractmethod
+    def set(self, key, result):
+        """Store the result of given key.
+
+        Args:
+            key (str): Key created by make_key().
+            result (dict): Result to be cached.
+        """
+
+
+class MemoryResultCache(ResultCache):
+    """
+    Result cache keeping the least recently used results in memory. Hits cost a few microseconds.
+
+    Args:
+        max_entries (int, optional): Maximum number of cached results. Defaults to DEFAULT_RESULT_CACHE_ENTRIES.
+        cache_random_seed (bool, optional): Cache requests with random seed as well. Defaults to False.
+    """
+
+    def __init__(self, max_entries=DEFAULT_RESULT_CACHE_ENTRIES, cache_random_seed=False):
+        super().__init__(cache_random_seed)
+        self.max_entries = max_entries
+        self.results = OrderedDict()
+        self.lock = threading.Lock()
+
+
+    def get(self, key):
+        with self.lock:
+            result = self.results.get(key)
+            if result is None:
+                return None
+            self.results.move_to_end(key)
+        return copy.deepcopy(result)
+
+
+    def set(self, key, result):
+        result = copy.deepcopy(result)
+        with self.lock:
+            self.results[key] = result
+            self.results.move_to_end(key)
+            while len(self.results) > self.max_entries:
+                self.results.popitem(last=False)
+
+
+class DiskResultCache(ResultCache):
+    """
+    Result cache in a directory, surviving restarts and shareable by processes on a host. Each result is stored in a subdirectory
+    named by its key with the metadata in result.json and each base64 data URI or bytes field decoded to a separate file.
+    The least recently used results are evicted when the total size exceeds max_size.
+
+    Args:
+        directory (str or pathlib.Path): Cache directory. Created if not existing.
+        max_size (int, optional): Maximum total size of the cached files in bytes. Defaults to DEFAULT_RESULT_CACHE_SIZE.
+        cache_random_seed (bool, optional): Cache requests with random seed as well. Defaults to False.
+    """
+
+    blocking = True
+
+    def __init__(self, directory, max_size=DEFAULT_RESULT_CACHE_SIZE, cache_random_seed=False):
+        super().__init__(cache_random_seed)
+        self.directory = Path(directory)
+        self.max_size = max_size
+        self.lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.sizes = dict()
+        self.access_times = dict()
+        for entry in os.scandir(self.directory):
+            if entry.is_dir() and not entry.name.startswith('.'):
+                self.__index(entry.name)
+
+
+    def get(self, key):
+        entry_directory = self.directory / key
+        try:
+            with open(entry_directory / RESULT_FILENAME, 'r') as file:
+                result = self.__restore_payloads(json.load(file), entry_directory)
+        except (OSError, ValueError):
+            with self.lock:
+                self.__forget(key)
+            return None
+        now = time.time()
+        with self.lock:
+            if key not in self.sizes:
+                self.__index(key)
+            self.access_times[key] = now
+        try:
+            os.utime(entry_directory / RESULT_FILENAME, (now, now))
+        except OSError:
+            pass
+        return result
+
+
+    def set(self, key, result):
+        temp_directory = Path(tempfile.mkdtemp(dir=self.directory, prefix='.'))
+        try:
+            payloads = list()
+            metadata = self.__extract_payloads(result, payloads)
+            size = 0
+            for index, (extension, data) in enumerate(payloads):
+                with open(temp_directory / f'{index}.{extension}', 'wb') as file:
+                    file.write(data)
+                size += len(data)
+            with open(temp_directory / RESULT_FILENAME, 'w') as file:
+                json.dump(metadata, file)
+            size += (temp_directory / RESULT_FILENAME).stat().st_size
+            with self.lock:
+                entry_directory = self.directory / key
+                self.__forget(key)
+                shutil.rmtree(entry_directory, ignore_errors=True)
+                try:
+                    os.replace(temp_directory, entry_directory)
+                except OSError: # stored by another process in the meantime
+                    return
+                self.sizes[key] = size
+                self.access_times[key] = time.time()
+                self.__evict()
+        finally:
+            shutil.rmtree(temp_directory, ignore_errors=True)
+
+
+    @property
+    def size(self):
+        """int: Total size of the cached files in bytes."""
+        return sum(self.sizes.values())
+
+
+    def __index(self, key):
+        entry_directory = self.directory / key
+        try:
+            with os.scandir(entry_directory) as entries:
+                self.sizes[key] = sum(entry.stat().st_size for entry in entries if entry.is_file())
+            self.access_times[key] = (entry_directory / RESULT_FILENAME).stat().st_mtime
+        except OSError:
+            self.__forget(key)
+
+
+    def __forget(self, key):
+        self.sizes.pop(key, None)
+        self.access_times.pop(key, None)
+
+
+    def __evict(self):
+        """Remove least recently used results until the total size is within max_size. Expects self.lock to be held."""
+        total_size = sum(self.sizes.values())
+        for key in sorted(self.access_times, key=self.access_times.get):
+            if total_size <= self.max_size:
+                break
+            total_size -= self.sizes.get(key, 0)
+            self.__forget(key)
+            shutil.rmtree(self.directory / key, ignore_errors=True)
+
+
+    def __extract_payloads(self, value, payloads):
+        """Replace data URIs and bytes in given result by references to payload files.
+
+        Args:
+            value (object): Result or part of it.
+            payloads (list): List the tuples (extension, data) of the payload files are appended to.
+
+        Returns:
+            object: JSON serializable copy of value.
+        """
+        if isinstance(value, dict):
+            return {key: self.__extract_payloads(item, payloads) for key, item in value.items()}
+        elif isinstance(value, (list, tuple)):
+            return [self.__extract_payloads(item, payloads) for item in value]
+        elif isinstance(value, (bytes, bytearray, memoryview)):
+            payloads.append(('bin', bytes(value)))
+            return {PAYLOAD_MARKER: f'{len(payloads) - 1}.bin'}
+        payload_start = get_data_uri_payload_start(value)
+        if payload_start:
+            header = value[:payload_start]
+            extension = header[5:-8].split('/')[-1].lower() or 'bin'
+            payloads.append((extension, base64.b64decode(value[payload_start:])))
+            return {PAYLOAD_MARKER: f'{len(payloads) - 1}.{extension}', 'header': header}
+        return value
+
+
+    def __restore_payloads(self, value, entry_directory):
+        if isinstance(value, dict):
+            filename = value.get(PAYLOAD_MARKER)
+            if filename:
+                data = (entry_directory / filename).read_bytes()
+                header = value.get('header')
+                return header + base64.b64encode(data).decode('ascii') if header else data
+            return {key: self.__restore_payloads(item, entry_directory) for key, item in value.items()}
+        elif isinstance(value, list):
+            return [self.__restore_payloads(item, entry_directory) for item in value]
+        return value
+
+
+def make_request_key(endpoint_name, params):
+    """Canonical hash of endpoint name and params, independent of the order of the params. Session params like
+    client_session_auth_key and key are ignored, bytes are represented by their SHA-256 hash.
+
+    Args:
+        endpoint_name (str): Name of the endpoint.
+        params (dict): Parameters of the API request.
+
+    Returns:
+        str: Hex digest identifying the request or None if params contain values without canonical form like streamed inputs.
+    """
+    try:
+        canonical = json.dumps(
+            [endpoint_name, {key: value for key, value in params.items() if key not in SESSION_PARAMS}],
+            sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=encode_binary_param
+        )
+    except TypeError:
+        return None
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def encode_binary_param(value):
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return {'sha256': hashlib.sha256(value).hexdigest()}
+    elif isinstance(value, tuple):
+        return list(value)
+    raise TypeError(f'{type(value).__name__} has no canonical form')
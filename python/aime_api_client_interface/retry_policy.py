@@ -0,0 +1,142 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import email.utils
+import random
+import time
+
+
+DEFAULT_MAX_RETRIES = 3
+DEFAULT_BACKOFF_BASE = 0.5
+DEFAULT_BACKOFF_MAX = 30.0
+DEFAULT_RETRY_STATUS_CODES = frozenset((429, 502, 503, 504))
+DEFAULT_REJECTED_STATUS_CODES = frozenset((429, 503))
+
+
+class RetryPolicy():
+    """
+    Policy deciding if and when failed requests of ModelAPI are repeated. Used for job submissions, logins, progress requests and
+    endpoint catalog requests of the synchronous and asynchronous interface.
+
+    Waits grow exponentially from backoff_base up to backoff_max seconds. With full jitter a random wait between zero and
+    this bound is chosen, so many clients failing at the same time don't retry in lockstep. A Retry-After header of the
+    API server is respected.
+
+    Job submissions are not idempotent: a repeated submission the API server already received would start a second job.
+    They are only repeated if the request was not sent, like a refused connection, or if the API server rejected it
+    with a status code in rejected_status_codes. Timeouts and lost connections after sending are not retried for submissions.
+
+    Args:
+        max_retries (int, optional): Maximum number of retries per request. 0 disables retries. Defaults to DEFAULT_MAX_RETRIES.
+        backoff_base (float, optional): Wait before the first retry in seconds. Defaults to DEFAULT_BACKOFF_BASE.
+        backoff_max (float, optional): Maximum wait in seconds, also capping Retry-After. Defaults to DEFAULT_BACKOFF_MAX.
+        backoff_factor (float, optional): Factor the wait grows by per retry. Defaults to 2.
+        jitter (bool, optional): Randomize the waits (full jitter). Defaults to True.
+        retry_status_codes (iterable of int, optional): Status codes of responses to retry. Defaults to DEFAULT_RETRY_STATUS_CODES.
+        rejected_status_codes (iterable of int, optional): Status codes meaning the API server refused the request without processing it,
+            so non-idempotent requests can be repeated too. Defaults to DEFAULT_REJECTED_STATUS_CODES.
+        retry_exceptions (tuple of type, optional): Exception classes to retry. Defaults to None, retrying all connection errors and timeouts
+            of the HTTP library.
+        respect_retry_after (bool, optional): Wait as long as a Retry-After header demands. Defaults to True.
+
+    Attributes:
+        retry_count (int): Number of retries scheduled by this policy.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            model_api = ModelAPI(api_server, endpoint_name, user, key, retry_policy=RetryPolicy(max_retries=5, backoff_max=10))
+    """
+
+    def __init__(
+        self,
+        max_retries=DEFAULT_MAX_RETRIES,
+        backoff_base=DEFAULT_BACKOFF_BASE,
+        backoff_max=DEFAULT_BACKOFF_MAX,
+        backoff_factor=2,
+        jitter=True,
+        retry_status_codes=DEFAULT_RETRY_STATUS_CODES,
+        rejected_status_codes=DEFAULT_REJECTED_STATUS_CODES,
+        retry_exceptions=None,
+        respect_retry_after=True
+        ):
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.backoff_factor = backoff_factor
+        self.jitter = jitter
+        self.retry_status_codes = frozenset(retry_status_codes)
+        self.rejected_status_codes = frozenset(rejected_status_codes)
+        self.retry_exceptions = retry_exceptions
+        self.respect_retry_after = respect_retry_after
+        self.retry_count = 0
+
+
+    def get_retry_delay(self, attempt, idempotent=True, status_code=None, error=None, request_sent=True, retry_after=None):
+        """Decide whether a failed request is repeated and how long to wait before.
+
+        Args:
+            attempt (int): Number of the failed attempt, 0 for the first one.
+            idempotent (bool, optional): Whether the request can be repeated without side effects. Defaults to True.
+            status_code (int, optional): Status code of the failed response. Defaults to None.
+            error (Exception, optional): Connection error or timeout of the failed request. Defaults to None.
+            request_sent (bool, optional): Whether the request may have reached the API server. Defaults to True.
+            retry_after (str, optional): Value of the Retry-After header of the response. Defaults to None.
+
+        Returns:
+            float: Wait in seconds before the next attempt, or None if the request is not repeated.
+        """
+        if attempt >= self.max_retries:
+            return None
+        if error is not None:
+            if self.retry_exceptions is not None and not isinstance(error, self.retry_exceptions):
+                return None
+            if request_sent and not idempotent:
+                return None
+        elif status_code not in self.retry_status_codes:
+            return None
+        elif not idempotent and status_code not in self.rejected_status_codes:
+            return None
+
+        delay = self.get_backoff(attempt)
+        if retry_after and self.respect_retry_after:
+            retry_after_delay = parse_retry_after(retry_after)
+            if retry_after_delay is not None:
+                delay = max(delay, min(retry_after_delay, self.backoff_max))
+        self.retry_count += 1
+        return delay
+
+
+    def get_backoff(self, attempt):
+        """Wait before the retry of given attempt without Retry-After.
+
+        Args:
+            attempt (int): Number of the failed attempt, 0 for the first one.
+
+        Returns:
+            float: Wait in seconds.
+        """
+        bound = min(self.backoff_max, self.backoff_base * self.backoff_factor ** attempt)
+        return random.uniform(0, bound) if self.jitter else bound
+
+
+def parse_retry_after(value):
+    """Parse the value of a Retry-After header given in seconds or as HTTP date.
+
+    Args:
+        value (str): Header value like '120' or 'Wed, 21 Oct 2015 07:28:00 GMT'.
+
+    Returns:
+        float: Seconds to wait or None if the value is invalid.
+    """
+    try:
+        return max(0.0, float(value))
+    except (TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError, IndexError):
+        return None
@@ -0,0 +1,130 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+from .lazy_module import LazyModule
+
+aiohttp = LazyModule('aiohttp')
+
+
+DEFAULT_CONNECTOR_CONFIG = {
+    'limit': 100,
+    'limit_per_host': 0,
+    'ttl_dns_cache': 300,
+    'keepalive_timeout': 30
+}
+DEFAULT_TIMEOUT_CONFIG = {
+    'total': None,
+    'sock_connect': 30,
+    'sock_read': 300
+}
+
+
+def create_client_session(connector_config=None, timeout_config=None):
+    """Create an aiohttp client session with a tuned TCPConnector and timeouts.
+
+    Args:
+        connector_config (dict, optional): Keyword arguments for aiohttp.TCPConnector like 'limit', 'limit_per_host', 'ttl_dns_cache'
+            and 'keepalive_timeout'. Merged into DEFAULT_CONNECTOR_CONFIG. Defaults to None.
+        timeout_config (dict, optional): Keyword arguments for aiohttp.ClientTimeout like 'total', 'sock_connect' and 'sock_read'.
+            Merged into DEFAULT_TIMEOUT_CONFIG. Defaults to None.
+
+    Returns:
+        aiohttp.ClientSession: New client session.
+    """
+    connector = aiohttp.TCPConnector(**{**DEFAULT_CONNECTOR_CONFIG, **(connector_config or {})})
+    timeout = aiohttp.ClientTimeout(**{**DEFAULT_TIMEOUT_CONFIG, **(timeout_config or {})})
+    return aiohttp.ClientSession(connector=connector, timeout=timeout)
+
+
+class ClientSessionRegistry():
+    """
+    Process-wide registry of aiohttp client sessions, keyed by API server and event loop.
+
+    All ModelAPI instances talking to the same api_server within one event loop share a single session and with it
+    one warm connection pool. Sessions are reference counted and closed when the last user releases them.
+    The connector and timeout configuration of the first acquirer is used for the lifetime of the shared session.
+
+    Example usage:
+
+        .. highlight:: python
+        .. code-block:: python
+
+            session = ClientSessionRegistry.acquire('https://api.aime.info', {'limit_per_host': 32})
+            ...
+            await ClientSessionRegistry.release(session)
+    """
+    sessions = dict()
+    ref_counts = dict()
+
+
+    @classmethod
+    def acquire(cls, api_server, connector_config=None, timeout_config=None):
+        """Get the shared session for given api_server in the running event loop and increase its reference count.
+
+        Args:
+            api_server (str): The base URL of the API server.
+            connector_config (dict, optional): TCPConnector configuration used if a new session has to be created. Defaults to None.
+            timeout_config (dict, optional): ClientTimeout configuration used if a new session has to be created. Defaults to None.
+
+        Returns:
+            aiohttp.ClientSession: Shared client session.
+        """
+        key = (api_server, asyncio.get_running_loop())
+        session = cls.sessions.get(key)
+        if not session or session.closed:
+            session = create_client_session(connector_config, timeout_config)
+            cls.sessions[key] = session
+            cls.ref_counts[key] = 0
+        cls.ref_counts[key] += 1
+        return session
+
+
+    @classmethod
+    def detach(cls, session):
+        """Decrease the reference count of given shared session without closing it.
+
+        Args:
+            session (aiohttp.ClientSession): Session obtained by acquire().
+
+        Returns:
+            bool: True if this was the last reference and the session was removed from the registry, so the caller has to close it.
+        """
+        for key, shared_session in list(cls.sessions.items()):
+            if shared_session is session:
+                cls.ref_counts[key] -= 1
+                if cls.ref_counts[key] <= 0:
+                    del cls.sessions[key]
+                    del cls.ref_counts[key]
+                    return True
+                return False
+        return False
+
+
+    @classmethod
+    async def release(cls, session):
+        """Decrease the reference count of given shared session and close it if it is no longer used.
+
+        Args:
+            session (aiohttp.ClientSession): Session obtained by acquire().
+        """
+        if cls.detach(session):
+            await session.close()
+
+
+    @classmethod
+    def get_ref_count(cls, session):
+        """Number of ModelAPI instances currently sharing given session.
+
+        Args:
+            session (aiohttp.ClientSession): Session obtained by acquire().
+
+        Returns:
+            int: Reference count, 0 if the session is not registered.
+        """
+        for key, shared_session in cls.sessions.items():
+            if shared_session is session:
+                return cls.ref_counts[key]
+        return 0
@@ -0,0 +1,83 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+"""Micro-benchmark of the conversion of base64 data URI result fields by ModelAPI.
+
+Compares the former decode, re-encode and compare check followed by a second decode with the current conversion, which
+recognizes data URIs by their header and decodes each payload at most once. Reports throughput and tracemalloc peak.
+
+Usage:
+
+    pip install -e . && python benchmarks/benchmark_decode.py [--repeat 5]
+"""
+
+import argparse
+import base64
+import os
+import time
+import tracemalloc
+
+from aime_api_client_interface import ModelAPI
+
+
+PAYLOADS = {
+    '3 MB PNG': ('image/PNG', 3 * 2**20),
+    '20 MB WAV': ('audio/wav', 20 * 2**20),
+}
+
+
+def legacy_check_if_valid_base64_string(test_string):
+    try:
+        body = test_string.split(',')[1] if ',' in test_string else None
+        return base64.b64encode(base64.b64decode(body.encode('utf-8'))).decode('utf-8') == body if body else False
+    except (TypeError, base64.binascii.Error, ValueError):
+        return False
+
+
+def legacy_convert_result_params(result, output_format):
+    converted = dict()
+    for key, value in result.items():
+        if isinstance(value, str) and legacy_check_if_valid_base64_string(value):
+            value = base64.b64decode(value.split(',')[1].encode('utf-8')) if output_format == 'byte_string' else value
+        converted[key] = value
+    return converted
+
+
+def measure(convert, result, repeat):
+    """Run convert(result) repeat times.
+
+    Returns:
+        float, int: Best duration in seconds and tracemalloc peak in bytes of one run.
+    """
+    durations = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        convert(result)
+        durations.append(time.perf_counter() - start)
+    tracemalloc.start()
+    convert(result)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return min(durations), peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, the best is reported. Default: 5')
+    args = parser.parse_args()
+
+    print(f'{"payload":<12} {"output_format":<14} {"legacy":>24} {"current":>24}')
+    for name, (mime_type, size) in PAYLOADS.items():
+        result = {'success': True, 'job_id': 'JID1', 'text': 'a, b', 'payload': f'data:{mime_type};base64,' + base64.b64encode(os.urandom(size)).decode()}
+        for output_format in ('base64', 'byte_string'):
+            model_api = ModelAPI('http://localhost', 'benchmark', output_format=output_format)
+            rows = list()
+            for convert in (lambda result: legacy_convert_result_params(result, output_format), model_api._ModelAPI__convert_result_params):
+                duration, peak = measure(convert, result, args.repeat)
+                rows.append(f'{size / duration / 1e6:8.0f} MB/s {peak / 1e6:7.1f} MB')
+            print(f'{name:<12} {output_format:<14} {rows[0]:>24} {rows[1]:>24}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+"""Benchmark of the cold import time of aime_api_client_interface, as paid by short-lived workers.
+
+Each scenario runs in a fresh interpreter. Reports the median duration and which of the optional heavy modules
+(requests, aiohttp, orjson, ujson) got imported.
+
+Usage:
+
+    pip install -e . && python benchmarks/benchmark_import_time.py [--runs 15]
+"""
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+
+HEAVY_MODULES = ('requests', 'aiohttp', 'orjson', 'ujson')
+
+SCENARIOS = {
+    'import + get_version()': 'import aime_api_client_interface as a; a.ModelAPI.get_version()',
+    'first sync session': 'import aime_api_client_interface as a; a.ModelAPI("http://localhost", "ep").setup_sync_session()',
+    'import + aiohttp': 'import aime_api_client_interface as a; import aiohttp',
+    'first JSON encoding': 'import aime_api_client_interface as a; a.get_json_codec().dumps({})',
+}
+
+RUNNER = '''
+import sys, time
+start = time.perf_counter()
+exec({code!r})
+duration = time.perf_counter() - start
+print(__import__("json").dumps([duration, [name for name in {heavy_modules!r} if name in sys.modules]]))
+'''
+
+
+def run_scenario(code):
+    """Run code in a fresh interpreter.
+
+    Returns:
+        float, list: Duration in seconds and names of the heavy modules imported.
+    """
+    output = subprocess.run(
+        [sys.executable, '-c', RUNNER.format(code=code, heavy_modules=HEAVY_MODULES)], capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--runs', type=int, default=15, help='Fresh interpreters per scenario, the median is reported. Default: 15')
+    args = parser.parse_args()
+
+    for name, code in SCENARIOS.items():
+        results = [run_scenario(code) for _ in range(args.runs)]
+        median = statistics.median(duration for duration, modules in results)
+        print(f'{name:<26} {median * 1000:8.1f} ms   imported: {", ".join(results[-1][1]) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
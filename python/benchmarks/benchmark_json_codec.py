@@ -0,0 +1,80 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+"""Benchmark of the JSON codecs for typical request and response bodies.
+
+Measures each installed codec of json_codec ('json', 'orjson', 'ujson') on an image request, an image result with
+four images, a chat request with a long context and a small chat progress result. Reports the best duration.
+
+Usage:
+
+    pip install -e . && python benchmarks/benchmark_json_codec.py [--repeat 5] [--image-size 3145728]
+"""
+
+import argparse
+import base64
+import os
+import time
+
+from aime_api_client_interface.json_codec import JSON_CODECS, get_json_codec, is_installed
+
+
+def make_bodies(image_size):
+    """Create the benchmarked bodies.
+
+    Returns:
+        dict: {name: (operation, object)} with operation 'dumps' or 'loads'.
+    """
+    image = 'data:image/PNG;base64,' + base64.b64encode(os.urandom(image_size)).decode()
+    chat_context = [
+        {'role': 'user' if index % 2 else 'assistant', 'content': f'Message {index} of the conversation with some text. ' * 4}
+        for index in range(200)
+    ]
+    return {
+        'image request': ('dumps', {'prompt': 'A cat', 'image': image, 'seed': 1, 'width': 1024, 'height': 1024}),
+        'image result (4 images)': ('loads', {'success': True, 'job_id': 'JID1', 'images': [image] * 4, 'seed': 1}),
+        'chat request (200 messages)': ('dumps', {'prompt_input': 'Tell me a joke', 'chat_context': chat_context, 'top_k': 40}),
+        'chat progress': ('loads', {
+            'success': True, 'job_id': 'JID1', 'job_state': 'processing',
+            'progress': {'progress': 42, 'queue_position': 0, 'estimate': 1.5, 'progress_data': {'text': 'Why did the chicken'}}
+        }),
+    }
+
+
+def measure(function, argument, repeat):
+    """Best duration of function(argument) in seconds, running it often enough for short operations."""
+    start = time.perf_counter()
+    function(argument)
+    loops = max(1, int(0.05 / max(time.perf_counter() - start, 1e-7)))
+    durations = list()
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function(argument)
+        durations.append((time.perf_counter() - start) / loops)
+    return min(durations)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--repeat', type=int, default=5, help='Runs per measurement, the best is reported. Default: 5')
+    parser.add_argument('--image-size', type=int, default=3 * 2**20, help='Size of the raw images in bytes. Default: 3 MiB')
+    args = parser.parse_args()
+
+    codecs = [get_json_codec(name) for name in JSON_CODECS if is_installed(name)]
+    bodies = make_bodies(args.image_size)
+    print(f'{"body":<36}' + ''.join(f'{codec.name:>12}' for codec in codecs))
+    for name, (operation, obj) in bodies.items():
+        row = f'{name + " " + operation:<36}'
+        for codec in codecs:
+            if operation == 'dumps':
+                duration = measure(codec.dumps, obj, args.repeat)
+            else:
+                duration = measure(codec.loads, codec.dumps(obj), args.repeat)
+            row += f'{duration * 1000:9.3f} ms'
+        print(row)
+
+
+if __name__ == '__main__':
+    main()
@@ -10,5 +10,8 @@ setup(
         'requests==2.31.0',
         'aiohttp==3.9.0',
     ],
+    extras_require={
+        'orjson': ['orjson'],
+    },
     zip_safe=False
 )
@@ -0,0 +1,209 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import base64
+import itertools
+import json
+import threading
+
+from aiohttp import web
+
+
+PNG = b'\x89PNG' + bytes(range(256)) * 4
+IMAGE = 'data:image/PNG;base64,' + base64.b64encode(PNG).decode()
+AUTH_KEY = 'AUTH1'
+
+
+class MockState():
+    """
+    State of the local stand-in for an AIME API server.
+
+    Attributes:
+        jobs (dict): Submitted jobs {job_id: {'polls': int, 'params': dict}}.
+        hits (dict): Number of requests per route name.
+        polls_needed (int): Number of progress requests until a job is done.
+        estimate (float): 'estimate' reported in progress results.
+        progress_delay (float): Seconds progress requests of job ids in slow_job_ids take.
+        slow_job_ids (set): Job ids answering progress requests slowly.
+        canceled (set): Job ids of canceled jobs.
+        batch_statuses (list): Status codes answered by the next batched progress requests, 200 if empty.
+        stream_shape (str): 'nested' like route /progress, 'flat' like the JS client reads it or 'malformed'.
+        preview_images (bool): Send preview images in the progress_data of progress results.
+        login_delay (float): Seconds login requests take.
+        result_image (str): Data URI of the image in the results.
+        stream_statuses (list): Status codes answered by the next requests of route /stream_progress, streaming if empty.
+        submit_statuses (list): Tuples (status, headers) answered by the next job submissions without starting a job.
+        submit_delay (float): Seconds job submissions take after the job was started.
+    """
+
+    def __init__(self):
+        self.jobs = dict()
+        self.hits = dict()
+        self.counter = itertools.count(1)
+        self.polls_needed = 3
+        self.estimate = 1.0
+        self.progress_delay = 0.0
+        self.slow_job_ids = set()
+        self.canceled = set()
+        self.batch_statuses = list()
+        self.stream_shape = 'nested'
+        self.preview_images = False
+        self.login_delay = 0.0
+        self.result_image = IMAGE
+        self.stream_statuses = list()
+        self.submit_statuses = list()
+        self.submit_delay = 0.0
+
+
+    def hit(self, name):
+        self.hits[name] = self.hits.get(name, 0) + 1
+
+
+    def poll(self, job_id):
+        """Count a progress request of the job and return its progress result in the shape of route /progress."""
+        job = self.jobs[job_id]
+        if job_id in self.canceled:
+            return {'success': True, 'job_id': job_id, 'job_state': 'canceled', 'progress': {'progress': 0, 'queue_position': 0}}
+        job['polls'] += 1
+        if job['polls'] >= self.polls_needed:
+            return {'success': True, 'job_id': job_id, 'job_state': 'done',
+                'job_result': {'images': [self.result_image], 'text': f'done {job["params"].get("prompt")}'}}
+        progress_data = {'text': 'partial', 'images': [IMAGE]} if self.preview_images else {'text': 'partial'}
+        return {'success': True, 'job_id': job_id, 'job_state': 'processing', 'progress': {
+            'progress': job['polls'] * 10, 'queue_position': 0, 'estimate': self.estimate, 'progress_data': progress_data
+        }}
+
+
+STATE = web.AppKey('state', MockState)
+
+
+def make_app(state=None, batch_progress=False, stream_progress=False):
+    """Create the aiohttp application of the stand-in server.
+
+    Args:
+        state (MockState, optional): Shared state. Defaults to None, creating a new one.
+        batch_progress (bool, optional): Serve route /progress_batch. Defaults to False.
+        stream_progress (bool, optional): Serve route /stream_progress. Defaults to False.
+
+    Returns:
+        aiohttp.web.Application: Application with the state in app[STATE].
+    """
+    state = state or MockState()
+    app = web.Application()
+    app[STATE] = state
+
+    async def login(request):
+        state.hit('login')
+        await asyncio.sleep(state.login_delay)
+        return web.json_response({'success': True, 'client_session_auth_key': AUTH_KEY})
+
+    async def submit(request):
+        state.hit('submit')
+        if state.submit_statuses:
+            status, headers = state.submit_statuses.pop(0)
+            return web.json_response({'success': False, 'error': 'Service unavailable'}, status=status, headers=headers)
+        params = await request.json()
+        if params.get('client_session_auth_key') != AUTH_KEY:
+            return web.json_response({'success': False, 'error': 'Client session authentication key not registered in API Server'}, status=400)
+        job_id = f'JID{next(state.counter)}'
+        state.jobs[job_id] = {'polls': 0, 'params': params}
+        await asyncio.sleep(state.submit_delay)
+        if params.get('wait_for_result'):
+            while job_id not in state.canceled and state.jobs[job_id]['polls'] < state.polls_needed:
+                state.jobs[job_id]['polls'] += 1
+                await asyncio.sleep(0.01)
+            if job_id in state.canceled:
+                return web.json_response({'success': False, 'job_id': job_id, 'error': 'Job canceled'})
+            return web.json_response({'success': True, 'job_id': job_id, 'text': f'done {params.get("prompt")}'})
+        return web.json_response({'success': True, 'job_id': job_id})
+
+    async def progress(request):
+        state.hit('progress')
+        job_id = request.query['job_id']
+        if job_id in state.slow_job_ids:
+            await asyncio.sleep(state.progress_delay)
+        return web.json_response(state.poll(job_id))
+
+    async def progress_batch(request):
+        state.hit('progress_batch')
+        if state.batch_statuses:
+            status = state.batch_statuses.pop(0)
+            if status != 200:
+                return web.json_response({'success': False}, status=status)
+        params = await request.json()
+        return web.json_response({'success': True, 'progress_results': [state.poll(job_id) for job_id in params['job_ids']]})
+
+    async def stream(request):
+        state.hit('stream_progress')
+        if state.stream_statuses:
+            return web.json_response({'success': False}, status=state.stream_statuses.pop(0))
+        job_id = request.query['job_id']
+        response = web.StreamResponse(headers={'Content-Type': 'text/event-stream'})
+        await response.prepare(request)
+        while True:
+            progress_result = state.poll(job_id)
+            event = progress_result
+            if state.stream_shape == 'malformed':
+                event = {'job_id': job_id, 'job_state': 'processing', 'progress': 'half'}
+            elif state.stream_shape == 'flat' and progress_result['job_state'] == 'processing':
+                event = {'success': True, 'job_id': job_id, 'job_state': 'processing', **progress_result['progress']}
+            await response.write(f'data: {json.dumps(event)}\n\n'.encode())
+            if progress_result['job_state'] in ('done', 'canceled') or state.stream_shape == 'malformed':
+                break
+            await asyncio.sleep(0.01)
+        return response
+
+    async def cancel(request):
+        state.hit('cancel')
+        job_id = request.query.get('job_id')
+        if job_id not in state.jobs:
+            return web.json_response({'success': False, 'error': f'Unknown job {job_id}'}, status=400)
+        state.canceled.add(job_id)
+        return web.json_response({'success': True, 'job_id': job_id, 'job_state': 'canceled'})
+
+    app.router.add_get('/{endpoint}/login', login)
+    app.router.add_post('/{endpoint}', submit)
+    app.router.add_get('/{endpoint}/progress', progress)
+    app.router.add_get('/{endpoint}/cancel', cancel)
+    if batch_progress:
+        app.router.add_post('/{endpoint}/progress_batch', progress_batch)
+    if stream_progress:
+        app.router.add_get('/stream_progress', stream)
+    return app
+
+
+async def start_server(app):
+    """Start the stand-in server on a free port of localhost.
+
+    Returns:
+        aiohttp.web.AppRunner, str: Runner to clean up and base URL of the server.
+    """
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+def start_server_in_thread(app):
+    """Run the stand-in server in a background thread for tests of the synchronous interface.
+
+    Returns:
+        str: Base URL of the server.
+    """
+    loop = asyncio.new_event_loop()
+    started = threading.Event()
+    result = dict()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        result['runner'], result['url'] = loop.run_until_complete(start_server(app))
+        started.set()
+        loop.run_forever()
+
+    threading.Thread(target=run, daemon=True).start()
+    started.wait()
+    return result['url']
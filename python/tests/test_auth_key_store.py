@@ -0,0 +1,65 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import multiprocessing
+import threading
+import time
+
+from aime_api_client_interface import ModelAPI, FileAuthKeyStore
+
+from mock_api_server import AUTH_KEY, STATE, make_app, start_server, start_server_in_thread
+
+
+def login_in_process(url, path):
+    return ModelAPI(url, 'test_ep', 'user', 'key', auth_key_store=FileAuthKeyStore(path)).do_api_login()
+
+
+def test_processes_sharing_file_store_login_once(tmp_path):
+    app = make_app()
+    app[STATE].login_delay = 0.2
+    url = start_server_in_thread(app)
+    with multiprocessing.get_context('spawn').Pool(4) as pool:
+        auth_keys = pool.starmap(login_in_process, [(url, tmp_path / 'auth_keys.json')] * 4)
+    assert auth_keys == [AUTH_KEY] * 4
+    assert app[STATE].hits['login'] == 1
+
+
+def test_async_login_does_not_block_event_loop_while_waiting_for_file_lock(tmp_path):
+    auth_key_store = FileAuthKeyStore(tmp_path / 'auth_keys.json')
+    # Another process logging in, simulated by a second store on the same file
+    other_store = FileAuthKeyStore(tmp_path / 'auth_keys.json')
+    identity_lock = other_store.login_lock(None)
+    identity_lock.__enter__()
+
+    async def run():
+        app = make_app()
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', auth_key_store=auth_key_store)
+        ticks = list()
+
+        async def tick():
+            while True:
+                ticks.append(time.monotonic())
+                await asyncio.sleep(0.01)
+
+        def finish_other_login():
+            time.sleep(0.3)
+            other_store.set((url, 'test_ep', 'user'), 'OTHER')
+            identity_lock.__exit__(None, None, None)
+
+        ticker = asyncio.ensure_future(tick())
+        threading.Thread(target=finish_other_login).start()
+        try:
+            auth_key = await model_api.do_api_login_async()
+        finally:
+            ticker.cancel()
+            await model_api.close_session()
+            await runner.cleanup()
+        return auth_key, ticks, app[STATE].hits
+
+    auth_key, ticks, hits = asyncio.run(run())
+    assert auth_key == 'OTHER'
+    assert 'login' not in hits
+    assert len(ticks) >= 10
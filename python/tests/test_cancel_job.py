@@ -0,0 +1,104 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+import pytest
+
+from aime_api_client_interface import ModelAPI
+
+from mock_api_server import STATE, make_app, start_server, start_server_in_thread
+
+
+async def run_with_server(test, **model_api_config):
+    app = make_app()
+    state = app[STATE]
+    runner, url = await start_server(app)
+    model_api = ModelAPI(url, 'test_ep', 'user', 'key', **model_api_config)
+    try:
+        await model_api.do_api_login_async()
+        await test(model_api, state)
+    finally:
+        await model_api.close_session()
+        await runner.cleanup()
+    return state
+
+
+def test_wait_for_timeout_cancels_job():
+    async def test(model_api, state):
+        state.polls_needed = 1000
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                model_api.do_api_request_async({'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_interval=0.01), 0.2
+            )
+
+    state = asyncio.run(run_with_server(test))
+    assert state.hits['cancel'] == 1
+    assert state.canceled == {'JID1'}
+
+
+def test_cancel_abandoned_jobs_disabled():
+    async def test(model_api, state):
+        state.polls_needed = 1000
+        with pytest.raises(asyncio.TimeoutError):
+            await asyncio.wait_for(
+                model_api.do_api_request_async({'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_interval=0.01), 0.2
+            )
+
+    state = asyncio.run(run_with_server(test, cancel_abandoned_jobs=False))
+    assert 'cancel' not in state.hits
+
+
+def test_closing_generator_early_cancels_job():
+    async def test(model_api, state):
+        state.polls_needed = 1000
+        generator = model_api.get_api_request_generator({'prompt': 'cat'}, progress_interval=0.01)
+        async for result in generator:
+            if result.get('job_state') == 'processing':
+                break
+        await generator.aclose()
+
+    state = asyncio.run(run_with_server(test))
+    assert state.canceled == {'JID1'}
+
+
+def test_finished_jobs_are_not_canceled():
+    async def test(model_api, state):
+        result = await model_api.do_api_request_async({'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_interval=0.01)
+        assert result['text'] == 'done cat'
+        async for result in model_api.get_api_request_generator({'prompt': 'dog'}, progress_interval=0.01):
+            pass
+        assert result['job_state'] == 'done'
+
+    state = asyncio.run(run_with_server(test))
+    assert 'cancel' not in state.hits
+
+
+def test_cancel_job_async():
+    async def test(model_api, state):
+        result = await model_api.do_api_request_async({'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_interval=0.01)
+        assert await model_api.cancel_job_async(result['job_id']) == {'success': True, 'job_id': 'JID1', 'job_state': 'canceled'}
+        with pytest.raises(ConnectionError):
+            await model_api.cancel_job_async('JID99')
+
+    state = asyncio.run(run_with_server(test, retry_policy=False))
+    assert state.hits['cancel'] == 2
+
+
+def test_keyboard_interrupt_cancels_job():
+    app = make_app()
+    state = app[STATE]
+    state.polls_needed = 1000
+    model_api = ModelAPI(start_server_in_thread(app), 'test_ep', 'user', 'key')
+    model_api.do_api_login()
+
+    def progress_callback(progress_info, progress_data):
+        if progress_info['progress'] >= 20:
+            raise KeyboardInterrupt()
+
+    with pytest.raises(KeyboardInterrupt):
+        model_api.do_api_request({'prompt': 'cat'}, progress_callback=progress_callback, progress_interval=0.01)
+    assert state.canceled == {'JID1'}
+    assert model_api.cancel_job('JID1')['job_state'] == 'canceled'
+    model_api.close_sync_session()
@@ -0,0 +1,33 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import pytest
+
+from aime_api_client_interface.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+def test_failing_listener_does_not_fail_requests(caplog):
+    changes = list()
+
+    def failing_listener(circuit_breaker, old_state, new_state):
+        raise RuntimeError('alert service down')
+
+    circuit_breaker = CircuitBreaker('http://api', minimum_calls=2, window_size=2, open_duration=0)
+    circuit_breaker.add_listener(failing_listener)
+    circuit_breaker.add_listener(lambda circuit_breaker, old_state, new_state: changes.append((old_state, new_state)))
+    for _ in range(2):
+        circuit_breaker.before_request()
+        circuit_breaker.record(True)
+    circuit_breaker.before_request()
+    circuit_breaker.record(False)
+    assert changes == [('closed', 'open'), ('open', 'half_open'), ('half_open', 'closed')]
+    assert len([record for record in caplog.records if 'alert service down' in record.exc_text]) == 3
+
+
+def test_open_circuit_rejects_requests():
+    circuit_breaker = CircuitBreaker('http://api', minimum_calls=1, window_size=1, open_duration=60)
+    circuit_breaker.before_request()
+    circuit_breaker.record(True)
+    with pytest.raises(CircuitOpenError):
+        circuit_breaker.before_request()
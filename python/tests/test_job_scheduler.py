@@ -0,0 +1,104 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+import pytest
+
+from aime_api_client_interface import ModelAPI
+from aime_api_client_interface.job_scheduler import DeadlineMissedError, JobScheduler
+
+from mock_api_server import STATE, make_app, start_server
+
+
+async def run_with_server(test, polls_needed=3, estimate=1.0):
+    app = make_app()
+    state = app[STATE]
+    state.polls_needed = polls_needed
+    state.estimate = estimate
+    runner, url = await start_server(app)
+    model_api = ModelAPI(url, 'test_ep', 'user', 'key')
+    try:
+        await model_api.do_api_login_async()
+        return await test(model_api), state
+    finally:
+        await model_api.close_session()
+        await runner.cleanup()
+
+
+def test_earliest_deadline_first_across_classes():
+    finished = list()
+
+    async def test(model_api):
+        scheduler = JobScheduler(model_api, {'chat': dict(), 'batch': dict(), 'background': {'priority': 1}}, max_in_flight=1)
+
+        async def request(prompt, job_class, deadline):
+            result = await scheduler.do_api_request_async({'prompt': prompt}, job_class, deadline, progress_interval=0.01)
+            finished.append(result['text'])
+
+        requests = [
+            asyncio.ensure_future(request('first', 'batch', None)),
+            asyncio.ensure_future(request('background', 'background', 5)),
+            asyncio.ensure_future(request('batch late', 'batch', 30)),
+            asyncio.ensure_future(request('chat', 'chat', 20)),
+            asyncio.ensure_future(request('batch early', 'batch', 10)),
+        ]
+        await asyncio.gather(*requests)
+
+    asyncio.run(run_with_server(test))
+    assert finished == ['done first', 'done batch early', 'done chat', 'done batch late', 'done background']
+
+
+def test_class_max_in_flight_caps_running_jobs():
+    running = list()
+
+    async def test(model_api):
+        scheduler = JobScheduler(model_api, {'chat': dict(), 'batch': {'max_in_flight': 1}}, max_in_flight=4)
+        progress_callback = lambda info, data: running.append(dict(scheduler.in_flight))
+        return await asyncio.gather(*[
+            scheduler.do_api_request_async(
+                {'prompt': f'{job_class} {index}'}, job_class, progress_callback=progress_callback, progress_interval=0.01
+            ) for job_class in ('batch', 'chat') for index in range(3)
+        ])
+
+    results, state = asyncio.run(run_with_server(test, polls_needed=5))
+    assert [result['text'] for result in results] == [f'done {job_class} {index}' for job_class in ('batch', 'chat') for index in range(3)]
+    assert max(in_flight['batch'] for in_flight in running) == 1
+    assert max(in_flight['chat'] for in_flight in running) == 3
+    assert max(sum(in_flight.values()) for in_flight in running) == 4
+
+
+@pytest.mark.parametrize('drop_missed', [False, True])
+def test_jobs_are_dropped_in_the_queue_before_their_deadline(drop_missed):
+    async def test(model_api):
+        scheduler = JobScheduler(model_api, max_in_flight=1, drop_missed=drop_missed)
+        running = asyncio.ensure_future(scheduler.do_api_request_async({'prompt': 'slow'}, progress_interval=0.01))
+        waiting = asyncio.ensure_future(scheduler.do_api_request_async({'prompt': 'late'}, deadline=0.05, progress_interval=0.01))
+        results = await asyncio.gather(running, waiting, return_exceptions=True)
+        return scheduler, results
+
+    (scheduler, (result, missed)), state = asyncio.run(run_with_server(test, polls_needed=30))
+    assert result['text'] == 'done slow'
+    if drop_missed:
+        assert missed is None
+    else:
+        assert isinstance(missed, DeadlineMissedError) and 'waited in the queue' in missed.reason
+    assert scheduler.missed_count == 1
+    assert scheduler.in_flight == {'default': 0}
+    assert [job['params']['prompt'] for job in state.jobs.values()] == ['slow']
+
+
+def test_job_is_cancelled_when_its_progress_estimate_exceeds_the_deadline():
+    async def test(model_api):
+        scheduler = JobScheduler(model_api)
+        with pytest.raises(DeadlineMissedError) as missed:
+            await scheduler.do_api_request_async({'prompt': 'cat'}, deadline=5, progress_interval=0.01)
+        await asyncio.sleep(0.05)
+        return scheduler, missed.value
+
+    (scheduler, missed), state = asyncio.run(run_with_server(test, polls_needed=1000, estimate=100.0))
+    assert 'progress estimate' in missed.reason
+    assert scheduler.missed_count == 1
+    assert scheduler.in_flight == {'default': 0}
+    assert state.canceled == {'JID1'}
@@ -0,0 +1,104 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+import pytest
+
+from aime_api_client_interface.circuit_breaker import CircuitBreaker, CircuitOpenError
+from aime_api_client_interface.load_balancer import LoadBalancedModelAPI
+
+from mock_api_server import STATE, make_app, start_server, start_server_in_thread
+
+
+@pytest.mark.parametrize('poll_progress, with_progress', [(False, False), (False, True), (True, False)])
+def test_progress_is_only_polled_when_requested(poll_progress, with_progress):
+    async def run():
+        apps = [make_app(), make_app()]
+        servers = [await start_server(app) for app in apps]
+        model_api = LoadBalancedModelAPI([url for runner, url in servers], 'test_ep', 'user', 'key', poll_progress=poll_progress)
+        progress_infos = list()
+        try:
+            await model_api.do_api_login_async()
+            result = await model_api.do_api_request_async(
+                {'prompt': 'cat'}, progress_callback=(lambda info, data: progress_infos.append(info)) if with_progress else None,
+                progress_interval=0.01
+            )
+        finally:
+            await model_api.close_session()
+            for runner, url in servers:
+                await runner.cleanup()
+        jobs = [job for app in apps for job in app[STATE].jobs.values()]
+        progress_hits = sum(app[STATE].hits.get('progress', 0) for app in apps)
+        return result, jobs, progress_hits, progress_infos
+
+    result, jobs, progress_hits, progress_infos = asyncio.run(run())
+    assert result['text'] == 'done cat'
+    assert len(jobs) == 1
+    polled = poll_progress or with_progress
+    assert jobs[0]['params']['wait_for_result'] == (not polled)
+    assert (progress_hits > 0) == polled
+    assert bool(progress_infos) == with_progress
+
+
+class RejectingCircuitBreaker(CircuitBreaker):
+    """Circuit breaker opening between choosing the API server and sending the request."""
+
+    def before_request(self):
+        raise CircuitOpenError(self.api_server, 30.0)
+
+
+def test_circuit_open_fails_over_without_counting_an_error():
+    async def run():
+        servers = [await start_server(make_app()), await start_server(make_app())]
+        model_api = LoadBalancedModelAPI([url for runner, url in servers], 'test_ep', 'user', 'key', balancing='least_wait')
+        first, second = [url for runner, url in servers]
+        try:
+            await model_api.do_api_login_async()
+            model_api.model_apis[first].circuit_breaker = RejectingCircuitBreaker(first)
+            result = await model_api.do_api_request_async({'prompt': 'cat'})
+        finally:
+            await model_api.close_session()
+            for runner, url in servers:
+                await runner.cleanup()
+        return model_api, result, first, second
+
+    model_api, result, first, second = asyncio.run(run())
+    assert result['api_server'] == second
+    assert model_api.scores[first].error_rate == 0.0
+    assert model_api.scores[first].in_flight == 0
+    assert model_api.scores[second].job_duration > 0.0
+
+
+def test_circuit_open_fails_over_without_counting_an_error_sync():
+    first, second = start_server_in_thread(make_app()), start_server_in_thread(make_app())
+    model_api = LoadBalancedModelAPI([first, second], 'test_ep', 'user', 'key', balancing='least_wait')
+    model_api.do_api_login()
+    model_api.model_apis[first].circuit_breaker = RejectingCircuitBreaker(first)
+    result = model_api.do_api_request({'prompt': 'cat'})
+    model_api.close_sync_session()
+    assert result['api_server'] == second
+    assert model_api.scores[first].error_rate == 0.0
+    assert model_api.scores[first].in_flight == 0
+
+
+def test_poll_progress_updates_the_queue_wait():
+    async def run():
+        app = make_app()
+        app[STATE].estimate = 2.5
+        runner, url = await start_server(app)
+        model_api = LoadBalancedModelAPI([url], 'test_ep', 'user', 'key', poll_progress=True)
+        try:
+            await model_api.do_api_login_async()
+            await model_api.do_api_request_async({'prompt': 'cat'}, progress_interval=0.01)
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+        return model_api.scores[url]
+
+    score = asyncio.run(run())
+    assert score.queue_wait == 2.5
+    assert score.submit_latency > 0.0
+    assert score.error_rate == 0.0
+    assert score.in_flight == 0
@@ -0,0 +1,63 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+import pytest
+
+from aime_api_client_interface import ModelAPI
+from aime_api_client_interface.media_writer import MediaWriter
+
+from mock_api_server import IMAGE, PNG, make_app, start_server, start_server_in_thread
+
+
+def test_file_output_async(tmp_path):
+    async def run():
+        runner, url = await start_server(make_app())
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', output_format='file', output_directory=tmp_path)
+        try:
+            await model_api.do_api_login_async()
+            result = await model_api.do_api_request_async({'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_interval=0.01)
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+        return model_api, result
+
+    model_api, result = asyncio.run(run())
+    assert result['images'] == [{'path': str(tmp_path / 'JID1_images_0.png'), 'size': len(PNG), 'mime_type': 'image/PNG'}]
+    assert (tmp_path / 'JID1_images_0.png').read_bytes() == PNG
+    assert model_api.media_writer.executor is None
+
+
+def test_file_output_sync(tmp_path):
+    url = start_server_in_thread(make_app())
+    model_api = ModelAPI(url, 'test_ep', 'user', 'key', output_format='file', output_directory=tmp_path)
+    model_api.do_api_login()
+    result = model_api.do_api_request({'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_interval=0.01)
+    model_api.close_sync_session()
+    assert result['images'][0]['size'] == len(PNG)
+    assert (tmp_path / 'JID1_images_0.png').read_bytes() == PNG
+
+
+@pytest.mark.parametrize('result', [
+    {'job_id': '../escaped', 'images': [IMAGE]},
+    {'job_id': 'JID1/sub', 'images': [IMAGE]},
+    {'job_id': '..', 'images': [IMAGE]},
+    {'job_id': 'JID1', '..\\images': [IMAGE]},
+])
+def test_path_separators_from_server_are_rejected(tmp_path, result):
+    media_writer = MediaWriter(tmp_path / 'out')
+    with pytest.raises(ValueError):
+        media_writer.write_result(result)
+    media_writer.shutdown()
+    assert not (tmp_path / 'escaped').exists()
+    assert list(tmp_path.rglob('*.png')) == []
+
+
+def test_results_without_job_id_are_not_overwritten(tmp_path):
+    media_writer = MediaWriter(tmp_path)
+    paths = [media_writer.write_result({'images': [IMAGE]})['images'][0]['path'] for _ in range(3)]
+    media_writer.shutdown()
+    assert len(set(paths)) == 3
+    assert sorted(path.read_bytes() for path in tmp_path.iterdir()) == [PNG] * 3
@@ -0,0 +1,109 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import base64
+import json
+
+from aime_api_client_interface import ModelAPI, BytesSink, FileSink
+from aime_api_client_interface.response_parser import IncrementalJSONParser, is_job_result_payload
+
+from mock_api_server import IMAGE, PNG, STATE, make_app, start_server, start_server_in_thread
+
+
+def parse(body, payload_filter, chunk_size=7):
+    parser = IncrementalJSONParser(BytesSink(), payload_filter=payload_filter)
+    for start in range(0, len(body), chunk_size):
+        parser.feed(body[start:start + chunk_size])
+    return parser.finish()
+
+
+def test_payload_filter_sees_path_of_data_uris():
+    paths = list()
+    body = json.dumps({
+        'job_id': 'JID1',
+        'progress': {'progress': 10, 'progress_data': {'images': [IMAGE, IMAGE], 'image': IMAGE}},
+        'job_result': {'images': [IMAGE], 'nested': [{'audio': IMAGE}]},
+        'image': IMAGE
+    }).encode()
+    result = parse(body, lambda path: paths.append(path) or path[:1] == ('job_result',))
+    assert paths == [
+        ('progress', 'progress_data', 'images'), ('progress', 'progress_data', 'images'), ('progress', 'progress_data', 'image'),
+        ('job_result', 'images'), ('job_result', 'nested', 'audio'), ('image',)
+    ]
+    assert result['progress']['progress_data'] == {'images': [IMAGE, IMAGE], 'image': IMAGE}
+    assert result['job_result'] == {'images': [PNG], 'nested': [{'audio': PNG}]}
+    assert result['image'] == IMAGE
+
+
+def test_progress_previews_are_not_sunk(tmp_path):
+    async def run():
+        app = make_app()
+        app[STATE].preview_images = True
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', payload_sink=FileSink(tmp_path))
+        previews = list()
+        try:
+            await model_api.do_api_login_async()
+            result = await model_api.do_api_request_async(
+                {'prompt': 'cat'}, progress_callback=lambda info, data: previews.append(data), progress_interval=0.01
+            )
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+        return result, previews
+
+    result, previews = asyncio.run(run())
+    assert [preview['images'] for preview in previews[1:-1]] == [[IMAGE], [IMAGE]]
+    assert result['images'][0]['size'] == len(PNG)
+    assert [path.read_bytes() for path in tmp_path.iterdir()] == [PNG]
+
+
+def test_progress_previews_are_not_sunk_sync(tmp_path):
+    app = make_app()
+    app[STATE].preview_images = True
+    model_api = ModelAPI(start_server_in_thread(app), 'test_ep', 'user', 'key', payload_sink=FileSink(tmp_path))
+    model_api.do_api_login()
+    result = model_api.do_api_request({'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_interval=0.01)
+    model_api.close_sync_session()
+    assert result['images'][0]['size'] == len(PNG)
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_is_job_result_payload():
+    assert is_job_result_payload(('job_result', 'images'))
+    assert not is_job_result_payload(('progress', 'progress_data', 'images'))
+
+
+def test_concurrent_requests_share_sink(tmp_path):
+    async def run():
+        app = make_app()
+        app[STATE].polls_needed = 1
+        app[STATE].result_image = 'data:image/PNG;base64,' + base64.b64encode(PNG * 2000).decode()
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', payload_sink=FileSink(tmp_path))
+        try:
+            await model_api.do_api_login_async()
+            return await asyncio.gather(*(
+                model_api.do_api_request_async({'prompt': str(index)}, progress_callback=lambda info, data: None, progress_interval=0.01)
+                for index in range(8)
+            ))
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+
+    results = asyncio.run(run())
+    paths = {result['images'][0]['path'] for result in results}
+    assert len(paths) == 8
+    assert all(open(path, 'rb').read() == PNG * 2000 for path in paths)
+
+
+def test_parsers_interleaved_on_one_sink():
+    sink = BytesSink()
+    bodies = [json.dumps({'images': [IMAGE], 'index': index}).encode() for index in range(2)]
+    parsers = [IncrementalJSONParser(sink) for _ in bodies]
+    for start in range(0, len(bodies[0]), 100):
+        for parser, body in zip(parsers, bodies):
+            parser.feed(body[start:start + 100])
+    assert [parser.finish() for parser in parsers] == [{'images': [PNG], 'index': 0}, {'images': [PNG], 'index': 1}]
@@ -0,0 +1,74 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+from aime_api_client_interface import ModelAPI
+from aime_api_client_interface.progress_multiplexer import ProgressMultiplexer
+
+from mock_api_server import STATE, make_app, start_server
+
+
+def test_slow_poll_does_not_stall_other_jobs():
+    async def run():
+        poll_times = dict()
+
+        async def fetch_progress(job_id, progress_error_callback):
+            if job_id == 'slow':
+                await asyncio.sleep(1.0)
+            poll_times.setdefault(job_id, list()).append(asyncio.get_running_loop().time())
+            return {'success': True, 'job_id': job_id, 'job_state': 'processing'}
+
+        multiplexer = ProgressMultiplexer(fetch_progress)
+        for job_id in ('slow', 'a', 'b', 'c'):
+            multiplexer.register(job_id, 0.05)
+        await asyncio.sleep(0.5)
+        await multiplexer.close()
+        return poll_times
+
+    poll_times = asyncio.run(run())
+    assert 'slow' not in poll_times
+    assert all(len(poll_times[job_id]) >= 6 for job_id in 'abc')
+    assert len({poll_times[job_id][-1] for job_id in 'abc'}) > 1
+
+
+def test_transient_batch_error_keeps_batching():
+    async def run():
+        app = make_app(batch_progress=True)
+        state = app[STATE]
+        state.batch_statuses = [503]
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', multiplex_progress=True, retry_policy=False)
+        try:
+            await model_api.do_api_login_async()
+            results = await model_api.do_api_requests_async(
+                [{'prompt': index} for index in range(8)], progress_callback=lambda info, data: None, progress_interval=0.02
+            )
+            return results, model_api.progress_multiplexer.batch_progress, state.hits
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+
+    results, batch_progress, hits = asyncio.run(run())
+    assert [result['text'] for result in results] == [f'done {index}' for index in range(8)]
+    assert batch_progress is True
+    assert hits['progress_batch'] > 1
+
+
+def test_unsupported_batch_progress_falls_back_to_single_polls():
+    async def run():
+        app = make_app()
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', multiplex_progress=True)
+        try:
+            await model_api.do_api_login_async()
+            await model_api.do_api_requests_async(
+                [{'prompt': index} for index in range(4)], progress_callback=lambda info, data: None, progress_interval=0.02
+            )
+            return model_api.progress_multiplexer.batch_progress
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+
+    assert asyncio.run(run()) is False
@@ -0,0 +1,69 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import pytest
+
+from aime_api_client_interface.auth_key_store import AuthKeyStore
+from aime_api_client_interface.json_codec import JSONCodec
+from aime_api_client_interface.progress_policy import (
+    EstimateProgressPolicy, ExponentialProgressPolicy, ProgressPolicy, get_progress_interval
+)
+from aime_api_client_interface.rate_limiter import RateLimiter
+from aime_api_client_interface.response_parser import PayloadSink, PayloadWriter
+from aime_api_client_interface.result_cache import ResultCache
+
+
+def progress_result(progress=0, queue_position=0, estimate=None, text=None):
+    return {'job_state': 'processing', 'progress': {
+        'progress': progress, 'queue_position': queue_position, 'estimate': estimate, 'progress_data': {'text': text}
+    }}
+
+
+def test_exponential_policy_backs_off_until_progress_changes():
+    policy = ExponentialProgressPolicy(min_interval=0.1, max_interval=0.5, factor=2)
+    results = [progress_result(10)] * 5 + [progress_result(20), progress_result(20, text='a'), progress_result(20, text='a')]
+    intervals = [policy.next_interval('JID1', result) for result in results]
+    assert intervals == pytest.approx([0.1, 0.2, 0.4, 0.5, 0.5, 0.1, 0.1, 0.2])
+    assert policy.poll_count == 8
+
+
+def test_exponential_policy_keeps_jobs_apart():
+    policy = ExponentialProgressPolicy(min_interval=0.1, max_interval=5, factor=2)
+    assert [policy.next_interval('JID1', progress_result(10)) for _ in range(3)] == pytest.approx([0.1, 0.2, 0.4])
+    assert policy.next_interval('JID2', progress_result(10)) == pytest.approx(0.1)
+    assert get_progress_interval(policy, 'JID1', {'job_state': 'done'}) == 0
+    assert list(policy.job_states) == ['JID2']
+
+
+@pytest.mark.parametrize('result, interval', [
+    (progress_result(queue_position=4, estimate=100), 2.0),
+    (progress_result(queue_position=40), 5.0),
+    (progress_result(estimate=8), 2.0),
+    (progress_result(estimate=0.1), 0.1),
+    (progress_result(), 0.1),
+    (None, 0.1),
+])
+def test_estimate_policy_interval(result, interval):
+    assert EstimateProgressPolicy().next_interval('JID1', result) == pytest.approx(interval)
+
+
+def test_estimate_policy_polls_streaming_text_every_min_interval():
+    policy = EstimateProgressPolicy(min_interval=0.1, estimate_fraction=0.5)
+    texts = ['a', 'ab', 'ab', 'abc']
+    intervals = [policy.next_interval('JID1', progress_result(estimate=4, text=text)) for text in texts]
+    assert intervals == pytest.approx([0.1, 0.1, 2.0, 0.1])
+
+
+def test_polls_saved_compared_to_baseline():
+    policy = EstimateProgressPolicy(baseline_interval=0.5)
+    for _ in range(4):
+        policy.next_interval('JID1', progress_result(estimate=8))
+    assert policy.waited_duration == pytest.approx(8.0)
+    assert policy.polls_saved == 12
+
+
+@pytest.mark.parametrize('base_class', [ProgressPolicy, PayloadSink, PayloadWriter, JSONCodec, AuthKeyStore, ResultCache, RateLimiter])
+def test_base_classes_are_abstract(base_class):
+    with pytest.raises(TypeError):
+        base_class()
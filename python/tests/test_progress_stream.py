@@ -0,0 +1,116 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+import pytest
+
+from aime_api_client_interface import ModelAPI
+from aime_api_client_interface.progress_stream import ServerSentEventParser, normalize_progress_event
+
+from mock_api_server import STATE, make_app, start_server, start_server_in_thread
+
+
+def test_parser_accepts_nested_and_flat_events():
+    parser = ServerSentEventParser()
+    events = parser.feed(
+        b'data: {"success": true, "job_id": "JID1", "job_state": "processing", "progress": {"progress": 10, "queue_position": 2}}\n\n'
+        b'data: {"job_id": "JID1", "progress": 20, "queue_position": 1, "progress_data": {"text": "a"}}\n\n'
+    )
+    assert events[0]['progress'] == {'progress': 10, 'queue_position': 2}
+    assert events[1] == {
+        'job_id': 'JID1', 'success': True, 'job_state': 'processing',
+        'progress': {'progress': 20, 'queue_position': 1, 'estimate': None, 'progress_data': {'text': 'a'}}
+    }
+
+
+@pytest.mark.parametrize('event', [['list'], {'job_id': 'JID1', 'progress': 'half'}, {'job_id': 'JID1', 'job_state': 'done'}])
+def test_malformed_events_raise_value_error(event):
+    with pytest.raises(ValueError):
+        normalize_progress_event(event)
+
+
+@pytest.mark.parametrize('stream_shape', ['nested', 'flat', 'malformed'])
+def test_stream_progress_async(stream_shape):
+    async def run():
+        app = make_app(stream_progress=True)
+        app[STATE].stream_shape = stream_shape
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key')
+        progress_infos = list()
+        try:
+            await model_api.do_api_login_async()
+            result = await model_api.do_api_request_async(
+                {'prompt': 'cat'}, progress_callback=lambda info, data: progress_infos.append(info),
+                progress_stream=True, progress_interval=0.01
+            )
+            return result, progress_infos, app[STATE].hits
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+
+    result, progress_infos, hits = asyncio.run(run())
+    assert result['text'] == 'done cat'
+    assert hits['stream_progress'] == 1
+    if stream_shape == 'malformed':
+        assert hits['progress'] >= 1
+    else:
+        assert 'progress' not in hits
+        assert [info['progress'] for info in progress_infos] == [0, 10, 20, 100]
+        assert progress_infos[1]['estimate'] == 1.0
+
+
+@pytest.mark.parametrize('stream_shape', ['flat', 'malformed'])
+def test_stream_progress_sync(stream_shape):
+    app = make_app(stream_progress=True)
+    app[STATE].stream_shape = stream_shape
+    model_api = ModelAPI(start_server_in_thread(app), 'test_ep', 'user', 'key')
+    model_api.do_api_login()
+    progress_infos = list()
+    result = model_api.do_api_request(
+        {'prompt': 'dog'}, progress_callback=lambda info, data: progress_infos.append(info), progress_stream=True, progress_interval=0.01
+    )
+    model_api.close_sync_session()
+    assert result['text'] == 'done dog'
+    assert progress_infos[-1]['progress'] == 100
+    assert ('progress' in app[STATE].hits) == (stream_shape == 'malformed')
+
+
+@pytest.mark.parametrize('status, supported', [(503, True), (429, True), (401, True), (404, False), (405, False)])
+def test_stream_error_falls_back_to_polling(status, supported):
+    async def run():
+        app = make_app(stream_progress=True)
+        app[STATE].stream_statuses = [status]
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', retry_policy=False)
+        try:
+            await model_api.do_api_login_async()
+            results = [
+                await model_api.do_api_request_async(
+                    {'prompt': 'cat'}, progress_callback=lambda info, data: None, progress_stream=True, progress_interval=0.01
+                ) for _ in range(2)
+            ]
+            return results, app[STATE].hits, model_api.progress_stream_supported
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+
+    results, hits, progress_stream_supported = asyncio.run(run())
+    assert [result['text'] for result in results] == ['done cat'] * 2
+    assert hits['progress'] >= 1
+    assert hits['stream_progress'] == (2 if supported else 1)
+    assert progress_stream_supported is supported
+
+
+def test_stream_error_falls_back_to_polling_sync():
+    app = make_app(stream_progress=True)
+    app[STATE].stream_statuses = [503]
+    model_api = ModelAPI(start_server_in_thread(app), 'test_ep', 'user', 'key', retry_policy=False)
+    model_api.do_api_login()
+    for _ in range(2):
+        result = model_api.do_api_request({'prompt': 'dog'}, progress_callback=lambda info, data: None, progress_stream=True, progress_interval=0.01)
+        assert result['text'] == 'done dog'
+    model_api.close_sync_session()
+    assert app[STATE].hits['stream_progress'] == 2
+    assert model_api.progress_stream_supported is True
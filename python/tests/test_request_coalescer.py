@@ -0,0 +1,84 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+from aime_api_client_interface import ModelAPI
+
+from mock_api_server import STATE, make_app, start_server
+
+
+async def run_with_server(test, polls_needed=3):
+    app = make_app()
+    state = app[STATE]
+    state.polls_needed = polls_needed
+    runner, url = await start_server(app)
+    model_api = ModelAPI(url, 'test_ep', 'user', 'key', coalesce_requests=True)
+    try:
+        await model_api.do_api_login_async()
+        return await test(model_api), state
+    finally:
+        await model_api.close_session()
+        await runner.cleanup()
+
+
+def test_requests_with_and_without_progress_callback_are_not_coalesced():
+    progress_infos = list()
+
+    async def test(model_api):
+        return await asyncio.gather(
+            model_api.do_api_request_async({'prompt': 'cat', 'seed': 1}),
+            model_api.do_api_request_async(
+                {'prompt': 'cat', 'seed': 1}, progress_callback=lambda info, data: progress_infos.append(info), progress_interval=0.01
+            ),
+            model_api.do_api_request_async(
+                {'prompt': 'cat', 'seed': 1}, progress_callback=lambda info, data: progress_infos.append(info), progress_interval=0.01
+            ),
+        )
+
+    (waiting_result, *progress_results), state = asyncio.run(run_with_server(test))
+    assert state.hits['submit'] == 2
+    assert waiting_result['success'] and waiting_result['text'] == 'done cat'
+    assert progress_results[0] == progress_results[1]
+    assert 'success' not in progress_results[0] and progress_results[0]['text'] == 'done cat'
+    assert [info['progress'] for info in progress_infos].count(100) == 2
+
+
+def test_cancelling_one_of_two_waiters_keeps_the_job():
+    async def test(model_api):
+        requests = [
+            asyncio.ensure_future(model_api.do_api_request_async(
+                {'prompt': 'cat', 'seed': 1}, progress_callback=lambda info, data: None, progress_interval=0.01
+            )) for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+        requests[0].cancel()
+        result = await requests[1]
+        assert requests[0].cancelled()
+        return result
+
+    result, state = asyncio.run(run_with_server(test, polls_needed=10))
+    assert result['text'] == 'done cat'
+    assert state.hits['submit'] == 1
+    assert 'cancel' not in state.hits
+
+
+def test_cancelling_all_waiters_cancels_the_job():
+    async def test(model_api):
+        requests = [
+            asyncio.ensure_future(model_api.do_api_request_async(
+                {'prompt': 'cat', 'seed': 1}, progress_callback=lambda info, data: None, progress_interval=0.01
+            )) for _ in range(2)
+        ]
+        await asyncio.sleep(0.05)
+        for request in requests:
+            request.cancel()
+        await asyncio.gather(*requests, return_exceptions=True)
+        await asyncio.sleep(0.05)
+        return model_api.request_coalescer
+
+    request_coalescer, state = asyncio.run(run_with_server(test, polls_needed=1000))
+    assert state.hits['submit'] == 1
+    assert state.canceled == {'JID1'}
+    assert not request_coalescer.flights
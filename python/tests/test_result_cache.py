@@ -0,0 +1,100 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+
+import pytest
+
+from aime_api_client_interface import ModelAPI
+from aime_api_client_interface.result_cache import DiskResultCache, MemoryResultCache
+
+from mock_api_server import STATE, make_app, start_server
+
+
+def test_requests_without_seed_are_random():
+    cache = MemoryResultCache()
+    assert cache.make_key('ep', {'prompt': 'cat'}) is None
+    assert cache.make_key('ep', {'prompt': 'cat', 'seed': -1}) is None
+    assert cache.make_key('ep', {'prompt': 'cat', 'seed': None}) is None
+    assert cache.make_key('ep', {'prompt': 'cat', 'seed': 0}) == cache.make_key('ep', {'seed': 0, 'prompt': 'cat'})
+    assert MemoryResultCache(cache_random_seed=True).make_key('ep', {'prompt': 'cat'})
+
+
+class FullDiskResultCache(DiskResultCache):
+
+    def set(self, key, result):
+        raise OSError(28, 'No space left on device')
+
+
+@pytest.mark.parametrize('result', [{'success': True, 'images': ['data:image/PNG;base64,abc']}, {'success': True, 'text': 'cat'}])
+def test_store_errors_are_logged(tmp_path, caplog, result):
+    cache = FullDiskResultCache(tmp_path) if 'text' in result else DiskResultCache(tmp_path)
+    cache.store('key', result)
+    asyncio.run(cache.store_async('key', result))
+    assert cache.get('key') is None
+    assert len([record for record in caplog.records if 'Storing result' in record.message]) == 2
+
+
+@pytest.mark.parametrize('with_progress', [True, False])
+def test_cache_hit_returns_result_as_received(tmp_path, with_progress):
+    async def run(result_cache):
+        app = make_app()
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', result_cache=result_cache)
+        progress_callback = (lambda info, data: None) if with_progress else None
+        try:
+            await model_api.do_api_login_async()
+            results = [
+                await model_api.do_api_request_async({'prompt': 'cat', 'seed': 1}, progress_callback=progress_callback, progress_interval=0.01)
+                for _ in range(2)
+            ]
+            other_shape = await model_api.do_api_request_async(
+                {'prompt': 'cat', 'seed': 1}, progress_callback=None if with_progress else (lambda info, data: None), progress_interval=0.01
+            )
+            return results, other_shape, app[STATE].hits['submit']
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+
+    for result_cache in (MemoryResultCache(), DiskResultCache(tmp_path)):
+        (live_result, cached_result), other_shape, submit_count = asyncio.run(run(result_cache))
+        assert cached_result == live_result
+        assert ('success' in cached_result) == (not with_progress)
+        assert cached_result['job_id'] == 'JID1'
+        assert other_shape['job_id'] == 'JID2'
+        assert submit_count == 2
+
+    (live_result, uncached_result), other_shape, submit_count = asyncio.run(run(FullDiskResultCache(tmp_path / 'full')))
+    assert uncached_result['text'] == live_result['text'] == 'done cat'
+    assert submit_count == 3
+
+
+def test_coalesced_results_are_cached_by_their_shape():
+    async def run():
+        app = make_app()
+        runner, url = await start_server(app)
+        result_cache = MemoryResultCache()
+        coalescing_api = ModelAPI(url, 'test_ep', 'user', 'key', result_cache=result_cache, coalesce_requests=True)
+        plain_api = ModelAPI(url, 'test_ep', 'user', 'key', result_cache=result_cache)
+        try:
+            await coalescing_api.do_api_login_async()
+            await plain_api.do_api_login_async()
+            waiting_result = await coalescing_api.do_api_request_async({'prompt': 'cat', 'seed': 1})
+            progress_result = await plain_api.do_api_request_async(
+                {'prompt': 'cat', 'seed': 1}, progress_callback=lambda info, data: None, progress_interval=0.01
+            )
+            cached_results = [
+                await model_api.do_api_request_async({'prompt': 'cat', 'seed': 1}, progress_callback=progress_callback, progress_interval=0.01)
+                for model_api in (coalescing_api, plain_api) for progress_callback in (None, lambda info, data: None)
+            ]
+            return waiting_result, progress_result, cached_results, app[STATE].hits['submit']
+        finally:
+            await coalescing_api.close_session()
+            await plain_api.close_session()
+            await runner.cleanup()
+
+    waiting_result, progress_result, cached_results, submit_count = asyncio.run(run())
+    assert submit_count == 2
+    assert waiting_result['success'] and 'success' not in progress_result
+    assert cached_results == [waiting_result, progress_result, waiting_result, progress_result]
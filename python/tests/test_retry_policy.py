@@ -0,0 +1,76 @@
+# Copyright (c) AIME GmbH and affiliates. Find more info at https://www.aime.info/api
+#
+# This software may be used and distributed according to the terms of the MIT LICENSE
+
+import asyncio
+import email.utils
+import time
+
+import pytest
+
+from aime_api_client_interface import ModelAPI
+from aime_api_client_interface.retry_policy import RetryPolicy
+
+from mock_api_server import STATE, make_app, start_server, start_server_in_thread
+
+
+def test_submission_timing_out_after_sending_is_not_repeated():
+    async def run():
+        app = make_app()
+        app[STATE].submit_delay = 0.5
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', timeout_config={'sock_read': 0.1}, retry_policy=RetryPolicy(backoff_base=0.01))
+        try:
+            await model_api.do_api_login_async()
+            with pytest.raises(ConnectionError):
+                await model_api.do_api_request_async({'prompt': 'cat'})
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+        return app[STATE], model_api.retry_policy
+
+    state, retry_policy = asyncio.run(run())
+    assert state.hits['submit'] == 1
+    assert list(state.jobs) == ['JID1']
+    assert retry_policy.retry_count == 0
+
+
+@pytest.mark.parametrize('retry_after', [
+    lambda: '1',
+    lambda: email.utils.formatdate(time.time() + 3, usegmt=True),
+])
+def test_rejected_submission_is_repeated_after_retry_after(retry_after):
+    async def run():
+        app = make_app()
+        app[STATE].submit_statuses.append((503, {'Retry-After': retry_after()}))
+        runner, url = await start_server(app)
+        model_api = ModelAPI(url, 'test_ep', 'user', 'key', retry_policy=RetryPolicy(backoff_base=0.01, jitter=False))
+        try:
+            await model_api.do_api_login_async()
+            started = time.monotonic()
+            result = await model_api.do_api_request_async({'prompt': 'cat'})
+            duration = time.monotonic() - started
+        finally:
+            await model_api.close_session()
+            await runner.cleanup()
+        return app[STATE], result, duration
+
+    state, result, duration = asyncio.run(run())
+    assert result['text'] == 'done cat'
+    assert state.hits['submit'] == 2
+    assert list(state.jobs) == ['JID1']
+    assert 1.0 <= duration < 5.0
+
+
+def test_rejected_submission_is_repeated_after_retry_after_sync():
+    app = make_app()
+    app[STATE].submit_statuses.append((503, {'Retry-After': '1'}))
+    model_api = ModelAPI(start_server_in_thread(app), 'test_ep', 'user', 'key', retry_policy=RetryPolicy(backoff_base=0.01, jitter=False))
+    model_api.do_api_login()
+    started = time.monotonic()
+    result = model_api.do_api_request({'prompt': 'cat'})
+    duration = time.monotonic() - started
+    model_api.close_sync_session()
+    assert result['text'] == 'done cat'
+    assert app[STATE].hits['submit'] == 2
+    assert 1.0 <= duration < 5.0